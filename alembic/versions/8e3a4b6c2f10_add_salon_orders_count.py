@@ -0,0 +1,39 @@
+"""add salon orders_count counter
+
+Revision ID: 8e3a4b6c2f10
+Revises: 5d1f7e0c9a21
+Create Date: 2025-09-05 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8e3a4b6c2f10"
+down_revision: Union[str, Sequence[str], None] = "5d1f7e0c9a21"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "salon",
+        sa.Column("orders_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    # Бэкфилл по существующей истории заказов
+    op.execute(
+        """
+        UPDATE salon SET orders_count = (
+            SELECT count(*)
+            FROM orders JOIN user_salon ON orders.user_salon_id = user_salon.id
+            WHERE user_salon.salon_id = salon.id
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("salon", "orders_count")
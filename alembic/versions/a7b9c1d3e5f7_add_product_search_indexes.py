@@ -0,0 +1,47 @@
+"""add product full-text and trigram search indexes
+
+Revision ID: a7b9c1d3e5f7
+Revises: f3a5b7c9d1e2
+Create Date: 2025-09-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a7b9c1d3e5f7"
+down_revision: Union[str, Sequence[str], None] = "f3a5b7c9d1e2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Должно совпадать с database.orm_query._product_search_vector
+SEARCH_VECTOR = (
+    "(setweight(to_tsvector('simple'::regconfig, coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple'::regconfig, coalesce(description, '')), 'B'))"
+)
+
+
+def upgrade() -> None:
+    # Поиск есть только в Postgres; в SQLite (тесты) работает LIKE без индексов
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_product_search "
+            f"ON product USING gin ({SEARCH_VECTOR})"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_product_name_trgm "
+            "ON product USING gin (name gin_trgm_ops)"
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("DROP INDEX IF EXISTS ix_product_name_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_product_search")
@@ -0,0 +1,33 @@
+"""add telegram_file path cache table
+
+Revision ID: b8c0d2e4f6a8
+Revises: a7b9c1d3e5f7
+Create Date: 2025-09-20 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b8c0d2e4f6a8"
+down_revision: Union[str, Sequence[str], None] = "a7b9c1d3e5f7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "telegram_file",
+        sa.Column("file_id", sa.String(length=255), nullable=False),
+        sa.Column("file_path", sa.String(length=255), nullable=False),
+        sa.Column("created", sa.DateTime(), server_default=sa.text("now()"), nullable=False),
+        sa.Column("updated", sa.DateTime(), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("file_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("telegram_file")
@@ -0,0 +1,48 @@
+"""add indexes for hot lookup columns
+
+Revision ID: c41d2e7f8a90
+Revises: 8e3a4b6c2f10
+Create Date: 2025-09-10 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c41d2e7f8a90"
+down_revision: Union[str, Sequence[str], None] = "8e3a4b6c2f10"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    ("ix_product_salon_category", "product", ["salon_id", "category_id", "id"]),
+    ("ix_product_category_id", "product", ["category_id"]),
+    ("ix_category_salon_id", "category", ["salon_id"]),
+    ("ix_banner_salon_id", "banner", ["salon_id"]),
+    ("ix_user_salon_salon_id", "user_salon", ["salon_id"]),
+    ("ix_cart_user_salon_product", "cart", ["user_salon_id", "product_id"]),
+    ("ix_orders_user_salon_created", "orders", ["user_salon_id", "created"]),
+    ("ix_order_item_order_id", "order_item", ["order_id"]),
+]
+
+
+def upgrade() -> None:
+    is_postgres = op.get_bind().dialect.name == "postgresql"
+    if is_postgres:
+        # CONCURRENTLY не блокирует запись в таблицы, но требует autocommit
+        with op.get_context().autocommit_block():
+            for name, table, columns in INDEXES:
+                op.create_index(
+                    name, table, columns, if_not_exists=True, postgresql_concurrently=True
+                )
+    else:
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
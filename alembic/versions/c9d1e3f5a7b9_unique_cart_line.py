@@ -0,0 +1,48 @@
+"""make cart (user_salon_id, product_id) unique
+
+Revision ID: c9d1e3f5a7b9
+Revises: b8c0d2e4f6a8
+Create Date: 2025-09-22 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c9d1e3f5a7b9"
+down_revision: Union[str, Sequence[str], None] = "b8c0d2e4f6a8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEX = "ix_cart_user_salon_product"
+COLUMNS = ["user_salon_id", "product_id"]
+
+
+def upgrade() -> None:
+    # дубли от гонок старого read-modify-write: количество сливаем в самую раннюю строку
+    op.execute(
+        """
+        UPDATE cart SET quantity = (
+            SELECT SUM(c.quantity) FROM cart AS c
+            WHERE c.user_salon_id = cart.user_salon_id AND c.product_id = cart.product_id
+        )
+        WHERE id IN (
+            SELECT MIN(id) FROM cart GROUP BY user_salon_id, product_id HAVING COUNT(*) > 1
+        )
+        """
+    )
+    op.execute(
+        "DELETE FROM cart WHERE id NOT IN (SELECT MIN(id) FROM cart GROUP BY user_salon_id, product_id)"
+    )
+    # в той же транзакции, без CONCURRENTLY: иначе между чисткой и индексом
+    # могут появиться новые дубли; таблица корзин маленькая
+    op.drop_index(INDEX, table_name="cart", if_exists=True)
+    op.create_index(INDEX, "cart", COLUMNS, unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(INDEX, table_name="cart")
+    op.create_index(INDEX, "cart", COLUMNS)
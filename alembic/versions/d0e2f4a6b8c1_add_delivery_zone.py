@@ -0,0 +1,42 @@
+"""add delivery_zone table
+
+Revision ID: d0e2f4a6b8c1
+Revises: c9d1e3f5a7b9
+Create Date: 2025-09-24 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d0e2f4a6b8c1"
+down_revision: Union[str, Sequence[str], None] = "c9d1e3f5a7b9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "delivery_zone",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("salon_id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("radius_km", sa.Numeric(7, 3), nullable=True),
+        sa.Column("polygon", sa.JSON(), nullable=True),
+        sa.Column("price", sa.Numeric(10, 2), nullable=False),
+        sa.Column("price_per_km", sa.Numeric(10, 2), nullable=False),
+        sa.Column("priority", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("created", sa.DateTime(), server_default=sa.text("now()"), nullable=False),
+        sa.Column("updated", sa.DateTime(), server_default=sa.text("now()"), nullable=False),
+        sa.ForeignKeyConstraint(["salon_id"], ["salon.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_delivery_zone_salon_id", "delivery_zone", ["salon_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_delivery_zone_salon_id", table_name="delivery_zone")
+    op.drop_table("delivery_zone")
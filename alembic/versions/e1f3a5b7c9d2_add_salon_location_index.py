@@ -0,0 +1,36 @@
+"""add salon (latitude, longitude) index for bounding-box lookups
+
+Revision ID: e1f3a5b7c9d2
+Revises: d0e2f4a6b8c1
+Create Date: 2025-09-26 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e1f3a5b7c9d2"
+down_revision: Union[str, Sequence[str], None] = "d0e2f4a6b8c1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        # CONCURRENTLY не блокирует запись в salon, но требует autocommit
+        with op.get_context().autocommit_block():
+            op.create_index(
+                "ix_salon_location",
+                "salon",
+                ["latitude", "longitude"],
+                if_not_exists=True,
+                postgresql_concurrently=True,
+            )
+    else:
+        op.create_index("ix_salon_location", "salon", ["latitude", "longitude"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_salon_location", table_name="salon", if_exists=True)
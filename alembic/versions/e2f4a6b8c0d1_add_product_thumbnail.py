@@ -0,0 +1,26 @@
+"""add product thumbnail
+
+Revision ID: e2f4a6b8c0d1
+Revises: c41d2e7f8a90
+Create Date: 2025-09-14 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e2f4a6b8c0d1"
+down_revision: Union[str, Sequence[str], None] = "c41d2e7f8a90"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("product", sa.Column("thumbnail", sa.String(length=150), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("product", "thumbnail")
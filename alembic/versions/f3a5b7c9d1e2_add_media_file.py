@@ -0,0 +1,33 @@
+"""add media_file registry table
+
+Revision ID: f3a5b7c9d1e2
+Revises: e2f4a6b8c0d1
+Create Date: 2025-09-16 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f3a5b7c9d1e2"
+down_revision: Union[str, Sequence[str], None] = "e2f4a6b8c0d1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "media_file",
+        sa.Column("key", sa.String(length=512), nullable=False),
+        sa.Column("file_id", sa.String(length=255), nullable=False),
+        sa.Column("created", sa.DateTime(), server_default=sa.text("now()"), nullable=False),
+        sa.Column("updated", sa.DateTime(), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("key"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("media_file")
@@ -0,0 +1,25 @@
+"""drop salon (latitude, longitude) index: no query filters salons by bounding box
+
+Revision ID: f4b6d8e0a2c3
+Revises: e1f3a5b7c9d2
+Create Date: 2025-09-30 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f4b6d8e0a2c3"
+down_revision: Union[str, Sequence[str], None] = "e1f3a5b7c9d2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_index("ix_salon_location", table_name="salon", if_exists=True)
+
+
+def downgrade() -> None:
+    op.create_index("ix_salon_location", "salon", ["latitude", "longitude"], if_not_exists=True)
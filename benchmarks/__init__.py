@@ -0,0 +1 @@
+"""Микробенчмарки горячих путей; запуск: ``python -m benchmarks.<name>``."""
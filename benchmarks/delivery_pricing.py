@@ -0,0 +1,76 @@
+"""Цена доставки и «ближайший салон» на 10k салонов: цикл Python против NumPy.
+
+    python -m benchmarks.delivery_pricing [--salons 10000] [--queries 200]
+
+Базовая линия — то, что было до зон: ``haversine`` из :mod:`utils.geo` в
+цикле по всем салонам. Векторный вариант — :class:`utils.delivery.DeliveryPricing`
+с тремя зонами на салон (два радиуса и многоугольник на 6 вершин).
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+
+from utils.delivery import DeliveryPricing, SalonPoint, Zone
+from utils.geo import haversine
+
+
+def build(n: int, seed: int = 1) -> tuple[list[SalonPoint], list[Zone]]:
+    rnd = random.Random(seed)
+    salons, zones = [], []
+    for salon_id in range(1, n + 1):
+        lat, lon = rnd.uniform(55.5, 56.0), rnd.uniform(37.3, 37.9)
+        salons.append(SalonPoint(salon_id, lat, lon))
+        zones.append(Zone(salon_id, "3 km", 150, radius_km=3))
+        zones.append(Zone(salon_id, "7 km", 250, 20, priority=1, radius_km=7))
+        d = 0.05
+        hexagon = tuple(
+            (lat + d * dy, lon + d * dx)
+            for dy, dx in ((1, 0), (0.5, 1), (-0.5, 1), (-1, 0), (-0.5, -1), (0.5, -1))
+        )
+        zones.append(Zone(salon_id, "center", 100, priority=-1, polygon=hexagon))
+    return salons, zones
+
+
+def _timeit(fn, points) -> list[float]:
+    samples = []
+    for lat, lon in points:
+        started = time.perf_counter()
+        fn(lat, lon)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--salons", type=int, default=10_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    salons, zones = build(args.salons)
+    started = time.perf_counter()
+    pricing = DeliveryPricing(salons, zones)
+    print(f"build: {args.salons} salons, {len(zones)} zones in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    rnd = random.Random(2)
+    points = [(rnd.uniform(55.5, 56.0), rnd.uniform(37.3, 37.9)) for _ in range(args.queries)]
+
+    def python_nearest(lat, lon):
+        return min(salons, key=lambda s: haversine(s.latitude, s.longitude, lat, lon))
+
+    runs = {
+        "python haversine loop (nearest)": _timeit(python_nearest, points),
+        "numpy nearest delivering salon": _timeit(pricing.nearest, points),
+        "numpy quote for one salon": _timeit(lambda lat, lon: pricing.quote(1, lat, lon), points),
+    }
+    for name, samples in runs.items():
+        samples.sort()
+        p95 = samples[int(len(samples) * 0.95) - 1]
+        print(f"{name:34s} median {statistics.median(samples):7.3f} ms   p95 {p95:7.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Стоимость клавиатуры на один callback: сборка InlineKeyboardBuilder против кэша.
+
+    python -m benchmarks.keyboards [--callbacks 20000] [--products 30]
+
+Имитирует листание меню покупателем: главное меню, каталог, список
+товаров, карточка товара и корзина в случайном порядке. Кэш прогревается
+первыми обращениями, как в работающем боте.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+from math import ceil
+from types import SimpleNamespace
+
+from kbds import inline
+from utils.i18n import i18n
+
+PER_PAGE = 3
+
+
+def _scenario(rnd: random.Random, categories, products, cached: bool):
+    """Callback покупателя как (функция, kwargs) — те же вызовы, что в menu_processing."""
+    catalog = {"catalog_key": (1, 0, 0.0)} if cached else {}
+    pagination = [("◀ Пред.", "previous"), ("След. ▶", "next")]
+    kind = rnd.choice(("main", "catalog", "list", "detail", "cart"))
+    if kind == "main":
+        fn = inline.get_user_main_btns if cached else inline._build_user_main_btns
+        return fn, {"level": 0}
+    if kind == "catalog":
+        fn = inline.get_user_catalog_btns if cached else inline._build_user_catalog_btns
+        return fn, {"level": 1, "categories": categories, **catalog}
+    if kind == "list":
+        page = rnd.randint(1, ceil(len(products) / PER_PAGE))
+        fn = inline.get_product_list_btns if cached else inline._build_product_list_btns
+        return fn, {
+            "level": 2,
+            "category": 1,
+            "page": page,
+            "pagination_btns": pagination,
+            "products": products[(page - 1) * PER_PAGE:page * PER_PAGE],
+            "category_menu_name": "product_list",
+            "start_index": (page - 1) * PER_PAGE + 1,
+            **catalog,
+        }
+    if kind == "detail":
+        page = rnd.randint(1, len(products))
+        fn = inline.get_product_detail_btns if cached else inline._build_product_detail_btns
+        return fn, {
+            "level": 2,
+            "category": 1,
+            "page": page,
+            "pagination_btns": pagination,
+            "product_id": products[page - 1].id,
+            "list_page": ceil(page / PER_PAGE),
+            "category_menu_name": "Волосы",
+            **catalog,
+        }
+    page = rnd.randint(1, 5)
+    fn = inline.get_user_cart if cached else inline._build_user_cart
+    return fn, {"level": 3, "page": page, "pagination_btns": pagination, "product_id": page}
+
+
+def _run(callbacks: int, categories, products, cached: bool) -> list[float]:
+    rnd = random.Random(1)
+    samples = []
+    for _ in range(callbacks):
+        fn, kwargs = _scenario(rnd, categories, products, cached)
+        started = time.perf_counter()
+        fn(**kwargs)
+        samples.append((time.perf_counter() - started) * 1_000_000)
+    return sorted(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--callbacks", type=int, default=20_000)
+    parser.add_argument("--categories", type=int, default=8)
+    parser.add_argument("--products", type=int, default=30)
+    args = parser.parse_args()
+
+    categories = [SimpleNamespace(id=i, name=f"Категория {i}") for i in range(1, args.categories + 1)]
+    products = [SimpleNamespace(id=i, name=f"Товар {i}") for i in range(1, args.products + 1)]
+
+    i18n.ctx_locale.set("ru")
+    runs = {
+        "build every callback": _run(args.callbacks, categories, products, cached=False),
+        "keyboard cache": _run(args.callbacks, categories, products, cached=True),
+    }
+    for name, samples in runs.items():
+        p95 = samples[int(len(samples) * 0.95) - 1]
+        print(f"{name:22s} median {statistics.median(samples):7.1f} us   p95 {p95:7.1f} us")
+    print(f"cache: {inline.keyboard_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""In-process snapshot of a salon's catalog for the customer menu.
+
+The catalog (categories, products, banners, currency) changes only when an
+admin edits it, while customers browse it on every callback.  Snapshots are
+loaded once per salon and dropped by :func:`invalidate_catalog`, which the
+admin write paths in :mod:`database.orm_query` call after each commit.
+
+Products are not loaded wholesale: each snapshot memoises the pages and
+positions it was asked for, fetched with the paginated queries from
+:mod:`database.orm_query`, so a miss costs O(page size) rather than a full
+category read.
+
+Other workers pick up an edit within ``CATALOG_CACHE_TTL`` (see
+:mod:`utils.cache`).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Mapping
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import Banner, Category, Product, Salon
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CURRENCY = "RUB"
+
+
+@dataclass(frozen=True, slots=True)
+class CategoryView:
+    id: int
+    name: str
+
+
+@dataclass(frozen=True, slots=True)
+class ProductView:
+    id: int
+    name: str
+    description: str | None
+    details_url: str | None
+    price: Decimal
+    image: str | None
+    image_file_id: str | None
+    category_id: int
+
+
+@dataclass(frozen=True, slots=True)
+class BannerView:
+    name: str
+    image: str | None
+    description: str | None
+
+
+@dataclass(frozen=True, slots=True)
+class ProductPageView:
+    items: tuple[ProductView, ...]
+    total: int
+    page: int
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """Read-only view of a salon catalog at a given version."""
+
+    salon_id: int
+    version: int
+    currency: str
+    categories: tuple[CategoryView, ...]
+    banners: Mapping[str, BannerView]
+    loaded_at: float = field(default_factory=time.monotonic)
+    _categories_by_id: dict[int, CategoryView] = field(default_factory=dict, repr=False)
+    # (category_id, page, per_page) -> страница; (category_id, product_id) -> позиция
+    _pages: dict[tuple[int, int, int], ProductPageView] = field(default_factory=dict, repr=False)
+    _positions: dict[tuple[int, int], int | None] = field(default_factory=dict, repr=False)
+
+    def __post_init__(self) -> None:
+        self._categories_by_id.update({c.id: c for c in self.categories})
+
+    def banner(self, name: str) -> BannerView | None:
+        return self.banners.get(name)
+
+    def category(self, category_id: int) -> CategoryView | None:
+        return self._categories_by_id.get(int(category_id))
+
+
+class CatalogCache:
+    """Per-salon catalog snapshots with versioned invalidation.
+
+    Every :meth:`invalidate` bumps the salon version; a load that started
+    before the bump is returned to its caller but never stored, so a slow
+    reader cannot resurrect a stale catalog.
+    """
+
+    def __init__(self, ttl: float | None = None) -> None:
+        self.ttl = ttl
+        self._snapshots: dict[int, CatalogSnapshot] = {}
+        self._versions: dict[int, int] = {}
+        self._locks: dict[int, asyncio.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def version(self, salon_id: int) -> int:
+        """Current catalog version of the salon (grows on every invalidation)."""
+        return self._versions.get(salon_id, 0)
+
+    def _fresh(self, snapshot: CatalogSnapshot | None) -> bool:
+        if snapshot is None or snapshot.version != self.version(snapshot.salon_id):
+            return False
+        return self.ttl is None or time.monotonic() - snapshot.loaded_at < self.ttl
+
+    async def get(self, session: AsyncSession, salon_id: int) -> CatalogSnapshot:
+        """Return the salon snapshot, loading it from the DB on a miss."""
+        snapshot = self._snapshots.get(salon_id)
+        if self._fresh(snapshot):
+            self.hits += 1
+            return snapshot
+
+        lock = self._locks.setdefault(salon_id, asyncio.Lock())
+        async with lock:
+            # Пока ждали блокировку, снапшот мог загрузить соседний апдейт
+            snapshot = self._snapshots.get(salon_id)
+            if self._fresh(snapshot):
+                self.hits += 1
+                return snapshot
+
+            self.misses += 1
+            version = self.version(salon_id)
+            snapshot = await _load_snapshot(session, salon_id, version)
+            if version == self.version(salon_id):
+                self._snapshots[salon_id] = snapshot
+            return snapshot
+
+    async def get_products_page(
+        self,
+        session: AsyncSession,
+        salon_id: int,
+        category_id: int,
+        page: int,
+        per_page: int,
+    ) -> ProductPageView:
+        """Page of category products (ordered by id), cached in the snapshot."""
+        from database.orm_query import orm_get_products_page
+
+        snapshot = await self.get(session, salon_id)
+        key = (int(category_id), page, per_page)
+        cached = snapshot._pages.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        result = await orm_get_products_page(session, salon_id, category_id, page, per_page)
+        view = ProductPageView(
+            items=tuple(_product_view(p) for p in result.items),
+            total=result.total,
+            page=result.page,
+        )
+        snapshot._pages[key] = view
+        if view.page != page:
+            snapshot._pages[(key[0], view.page, per_page)] = view
+        return view
+
+    async def get_product_position(
+        self,
+        session: AsyncSession,
+        salon_id: int,
+        category_id: int,
+        product_id: int,
+    ) -> int | None:
+        """1-based position of the product inside its category, cached."""
+        from database.orm_query import orm_get_product_position
+
+        snapshot = await self.get(session, salon_id)
+        key = (int(category_id), int(product_id))
+        if key in snapshot._positions:
+            self.hits += 1
+            return snapshot._positions[key]
+
+        self.misses += 1
+        position = await orm_get_product_position(session, product_id, salon_id, category_id)
+        snapshot._positions[key] = position
+        return position
+
+    def invalidate(self, salon_id: int) -> None:
+        """Drop the salon snapshot and bump its version."""
+        self._versions[salon_id] = self.version(salon_id) + 1
+        self._snapshots.pop(salon_id, None)
+        self.invalidations += 1
+        logger.debug("catalog cache invalidated: salon_id=%s version=%s", salon_id, self._versions[salon_id])
+
+    def clear(self) -> None:
+        """Forget all snapshots and counters (versions keep growing)."""
+        for salon_id in list(self._snapshots):
+            self._versions[salon_id] = self.version(salon_id) + 1
+        self._snapshots.clear()
+        self.hits = self.misses = self.invalidations = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "salons": len(self._snapshots),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+
+async def _load_snapshot(session: AsyncSession, salon_id: int, version: int) -> CatalogSnapshot:
+    currency = await session.scalar(select(Salon.currency).where(Salon.id == salon_id))
+
+    categories = await session.execute(
+        select(Category.id, Category.name)
+        .where(Category.salon_id == salon_id)
+        .order_by(Category.id)
+    )
+    banners = await session.execute(
+        select(Banner.name, Banner.image, Banner.description).where(Banner.salon_id == salon_id)
+    )
+
+    return CatalogSnapshot(
+        salon_id=salon_id,
+        version=version,
+        currency=currency or DEFAULT_CURRENCY,
+        categories=tuple(CategoryView(*row) for row in categories.all()),
+        banners={row.name: BannerView(*row) for row in banners.all()},
+    )
+
+
+def _product_view(product: Product) -> ProductView:
+    return ProductView(
+        id=product.id,
+        name=product.name,
+        description=product.description,
+        details_url=product.details_url,
+        price=product.price,
+        image=product.image,
+        image_file_id=product.image_file_id,
+        category_id=product.category_id,
+    )
+
+
+def _ttl_from_env() -> float | None:
+    raw = os.getenv("CATALOG_CACHE_TTL", "60")
+    try:
+        ttl = float(raw)
+    except ValueError:
+        logger.warning("Invalid CATALOG_CACHE_TTL=%r, using 60s", raw)
+        return 60.0
+    return ttl if ttl > 0 else None
+
+
+catalog_cache = CatalogCache(ttl=_ttl_from_env())
+
+
+def invalidate_catalog(salon_id: int | None) -> None:
+    """Hook for admin write paths: the salon catalog has changed."""
+    if salon_id is not None:
+        catalog_cache.invalidate(int(salon_id))
@@ -0,0 +1,204 @@
+"""Оформление заказа одной транзакцией с минимумом обращений к БД.
+
+:func:`place_order` — единственный путь создания заказа:
+
+1. одна выборка корзины (:func:`~database.orm_query.cart_lines_select`, те же
+   :class:`~database.orm_query.CartLine`, что и на экране корзины) вместе с
+   данными клиента и салона;
+2. условный ``UPDATE salon SET orders_count = orders_count + 1 ... RETURNING``:
+   O(1) проверка ``order_limit`` бесплатного тарифа без ``COUNT(*)`` по истории,
+   параллельные оформления в одном салоне его не перешагнут;
+3. ``INSERT ... RETURNING`` заказа;
+4. один многострочный ``INSERT`` позиций;
+5. удаление прочитанных строк корзины и ``COMMIT``.
+
+Время каждого шага возвращается в :attr:`CheckoutResult.timings` и пишется
+в лог.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from sqlalchemy import delete, insert, or_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import Cart, Order, OrderItem, Salon, UserSalon
+from database.orm_query import CartLine, cart_lines_select
+
+logger = logging.getLogger(__name__)
+
+
+class CheckoutError(Exception):
+    """Заказ не может быть оформлен."""
+
+
+class EmptyCartError(CheckoutError):
+    """Корзина пуста (или клиент/салон не найдены)."""
+
+
+class OrderLimitReached(CheckoutError):
+    """Салон на бесплатном тарифе исчерпал лимит заказов."""
+
+    def __init__(self, limit: int) -> None:
+        super().__init__(f"order limit reached: {limit}")
+        self.limit = limit
+
+
+@dataclass(frozen=True)
+class CheckoutResult:
+    order_id: int
+    total: Decimal
+    lines: tuple[CartLine, ...]
+    salon_id: int
+    currency: str
+    group_chat_id: int | None
+    customer_first_name: str | None
+    timings: dict[str, float] = field(default_factory=dict)
+
+
+class _Timer:
+    def __init__(self) -> None:
+        self.timings: dict[str, float] = {}
+        self._started = self._last = time.perf_counter()
+
+    def step(self, name: str) -> None:
+        now = time.perf_counter()
+        self.timings[name] = round((now - self._last) * 1000, 3)
+        self._last = now
+
+    def finish(self) -> dict[str, float]:
+        self.timings["total"] = round((time.perf_counter() - self._started) * 1000, 3)
+        return self.timings
+
+
+async def place_order(
+    session: AsyncSession,
+    user_salon_id: int,
+    *,
+    phone: str,
+    delivery_type: str,
+    payment_method: str,
+    name: str | None = None,
+    fallback_name: str = "",
+    email: str | None = None,
+    address: str | None = None,
+    comment: str | None = None,
+    status: str = "NEW",
+) -> CheckoutResult:
+    """
+    Создаёт заказ из корзины ``user_salon_id`` и очищает корзину.
+
+    ``name`` по умолчанию — имя и фамилия клиента в салоне, а если их нет —
+    ``fallback_name`` (обычно ``full_name`` из Telegram). При любой ошибке
+    транзакция откатывается (загруженные в сессию объекты истекают).
+
+    :raises EmptyCartError: корзина пуста.
+    :raises OrderLimitReached: бесплатный тариф салона исчерпан.
+    """
+    timer = _Timer()
+    try:
+        rows = (
+            await session.execute(
+                cart_lines_select(user_salon_id)
+                .add_columns(
+                    Cart.id.label("cart_id"),
+                    UserSalon.salon_id,
+                    UserSalon.first_name,
+                    UserSalon.last_name,
+                    Salon.currency,
+                    Salon.group_chat_id,
+                    Salon.order_limit,
+                )
+                .join(UserSalon, UserSalon.id == Cart.user_salon_id)
+                .join(Salon, Salon.id == UserSalon.salon_id)
+            )
+        ).all()
+        timer.step("cart")
+        if not rows:
+            raise EmptyCartError(f"cart of user_salon {user_salon_id} is empty")
+
+        head = rows[0]
+        # Атомарный счётчик: UPDATE берёт блокировку строки салона, а условие
+        # перепроверяется после параллельного коммита — лимит не перешагнуть
+        counted = await session.scalar(
+            update(Salon)
+            .where(
+                Salon.id == head.salon_id,
+                or_(Salon.free_plan.is_(False), Salon.orders_count < Salon.order_limit),
+            )
+            .values(orders_count=Salon.orders_count + 1)
+            .returning(Salon.orders_count)
+        )
+        timer.step("limit")
+        if counted is None:
+            raise OrderLimitReached(head.order_limit)
+
+        lines = tuple(CartLine.from_row(row) for row in rows)
+        total = Decimal(head.grand_total)
+        customer_name = (
+            name
+            or " ".join(filter(None, [head.first_name, head.last_name]))
+            or fallback_name
+        )
+
+        order_id = await session.scalar(
+            insert(Order)
+            .values(
+                user_salon_id=user_salon_id,
+                name=customer_name,
+                phone=phone,
+                email=email,
+                address=address,
+                delivery_type=delivery_type,
+                payment_method=payment_method,
+                comment=comment,
+                status=status,
+                total=total,
+            )
+            .returning(Order.id)
+        )
+        timer.step("order")
+
+        await session.execute(
+            insert(OrderItem)
+            .values(
+                [
+                    {
+                        "order_id": order_id,
+                        "product_id": line.product_id,
+                        "product_name": line.name,
+                        "quantity": line.quantity,
+                        "price": line.price,
+                    }
+                    for line in lines
+                ]
+            )
+        )
+        timer.step("items")
+
+        # Удаляем только прочитанные строки: товар, добавленный параллельно, останется
+        await session.execute(delete(Cart).where(Cart.id.in_([row.cart_id for row in rows])))
+        timer.step("cart_clear")
+
+        await session.commit()
+        timer.step("commit")
+    except BaseException:
+        await session.rollback()
+        raise
+
+    timings = timer.finish()
+    logger.info("order %s placed for user_salon %s: %s", order_id, user_salon_id, timings)
+    return CheckoutResult(
+        order_id=order_id,
+        total=total,
+        lines=lines,
+        salon_id=head.salon_id,
+        currency=head.currency,
+        group_chat_id=head.group_chat_id,
+        customer_first_name=head.first_name,
+        timings=timings,
+    )
@@ -0,0 +1,94 @@
+"""Настройки движка БД, читаемые из переменных окружения.
+
+* ``DB_ECHO`` — логировать каждый SQL-запрос (по умолчанию выключено);
+* ``DB_POOL_SIZE`` / ``DB_MAX_OVERFLOW`` — постоянные и дополнительные соединения пула;
+* ``DB_POOL_TIMEOUT`` — сколько секунд ждать свободное соединение;
+* ``DB_POOL_RECYCLE`` — пересоздавать соединения старше N секунд;
+* ``DB_POOL_PRE_PING`` — проверять соединение перед выдачей из пула;
+* ``DB_STATEMENT_CACHE_SIZE`` — кэш prepared statements asyncpg (0 — для pgbouncer).
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from dataclasses import asdict, dataclass
+from typing import Any, Mapping
+
+from sqlalchemy.engine import make_url
+
+from utils.env import env_number
+
+logger = logging.getLogger(__name__)
+
+_TRUE = {"1", "true", "yes", "on"}
+_FALSE = {"0", "false", "no", "off", ""}
+
+
+def _env_bool(env: Mapping[str, str], name: str, default: bool) -> bool:
+    raw = env.get(name)
+    if raw is None:
+        return default
+    value = raw.strip().lower()
+    if value in _TRUE:
+        return True
+    if value in _FALSE:
+        return False
+    logger.warning("Invalid %s=%r, using %s", name, raw, default)
+    return default
+
+
+@dataclass(frozen=True)
+class EngineSettings:
+    """Эффективные параметры ``create_async_engine``."""
+
+    echo: bool = False
+    pool_size: int = 10
+    max_overflow: int = 20
+    pool_timeout: float = 10.0
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+    statement_cache_size: int = 100
+
+    @classmethod
+    def from_env(cls, env: Mapping[str, str] | None = None) -> "EngineSettings":
+        env = os.environ if env is None else env
+        default = cls()
+        return cls(
+            echo=_env_bool(env, "DB_ECHO", default.echo),
+            pool_size=max(1, int(env_number("DB_POOL_SIZE", default.pool_size, env))),
+            max_overflow=max(0, int(env_number("DB_MAX_OVERFLOW", default.max_overflow, env))),
+            pool_timeout=max(0.0, env_number("DB_POOL_TIMEOUT", default.pool_timeout, env)),
+            # -1 — не пересоздавать соединения
+            pool_recycle=max(-1, int(env_number("DB_POOL_RECYCLE", default.pool_recycle, env))),
+            pool_pre_ping=_env_bool(env, "DB_POOL_PRE_PING", default.pool_pre_ping),
+            statement_cache_size=max(
+                0, int(env_number("DB_STATEMENT_CACHE_SIZE", default.statement_cache_size, env))
+            ),
+        )
+
+    def engine_kwargs(self, url: str) -> dict[str, Any]:
+        """Аргументы для ``create_async_engine`` с учётом драйвера из ``url``."""
+        parsed = make_url(url)
+        kwargs: dict[str, Any] = {"echo": self.echo, "pool_pre_ping": self.pool_pre_ping}
+
+        # SQLite (тесты, локальный запуск) работает без QueuePool
+        if parsed.get_backend_name() != "sqlite":
+            kwargs.update(
+                pool_size=self.pool_size,
+                max_overflow=self.max_overflow,
+                pool_timeout=self.pool_timeout,
+                pool_recycle=self.pool_recycle,
+            )
+
+        if parsed.get_driver_name() == "asyncpg":
+            kwargs["connect_args"] = {
+                # кэш самого asyncpg и кэш адаптера SQLAlchemy поверх него
+                "statement_cache_size": self.statement_cache_size,
+                "prepared_statement_cache_size": self.statement_cache_size,
+            }
+        return kwargs
+
+    def describe(self) -> str:
+        """Строка для стартового лога."""
+        return ", ".join(f"{key}={value}" for key, value in asdict(self).items())
@@ -0,0 +1,182 @@
+"""Снимок салонов и зон доставки для :class:`utils.delivery.DeliveryPricing`.
+
+Это единственная копия координат салонов в процессе: по ней же ищет
+:mod:`database.salon_locator`.
+
+Координаты салонов и зоны меняются редко, а цена доставки считается на
+каждую присланную геолокацию, поэтому массивы строятся один раз на процесс
+и сбрасываются :func:`invalidate_delivery_pricing` — его вызывают
+``SalonRepository.update_location`` и :func:`replace_delivery_zones`.
+Другие воркеры увидят новые зоны в пределах ``DELIVERY_PRICING_TTL`` (см.
+:mod:`utils.cache`); координаты салона, прочитанные из БД,
+:func:`quote_delivery` сверяет со снапшотом сразу.
+
+Зоны пока задаются только через :func:`replace_delivery_zones` (скриптом или
+из консоли): в админке бота их редактирования нет.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Iterable, Sequence
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from database.models import DeliveryZone, Salon
+from utils.delivery import DeliveryPricing, DeliveryQuote, SalonPoint, Zone
+from utils.env import env_number
+
+logger = logging.getLogger(__name__)
+
+
+async def load_delivery_pricing(session: AsyncSession) -> DeliveryPricing:
+    """Два запроса: салоны с координатами и все зоны."""
+    salons = (
+        await session.execute(
+            select(Salon.id, Salon.latitude, Salon.longitude).where(
+                Salon.latitude.is_not(None), Salon.longitude.is_not(None)
+            )
+        )
+    ).all()
+    zones = (
+        await session.execute(
+            select(
+                DeliveryZone.salon_id,
+                DeliveryZone.name,
+                DeliveryZone.price,
+                DeliveryZone.price_per_km,
+                DeliveryZone.priority,
+                DeliveryZone.radius_km,
+                DeliveryZone.polygon,
+            )
+        )
+    ).all()
+    return DeliveryPricing(
+        (SalonPoint(row.id, float(row.latitude), float(row.longitude)) for row in salons),
+        (
+            Zone(
+                salon_id=row.salon_id,
+                name=row.name,
+                price=float(row.price),
+                price_per_km=float(row.price_per_km),
+                priority=row.priority,
+                radius_km=float(row.radius_km) if row.radius_km is not None else None,
+                polygon=tuple((float(lat), float(lon)) for lat, lon in row.polygon)
+                if row.polygon
+                else None,
+            )
+            for row in zones
+        ),
+    )
+
+
+class DeliveryPricingCache:
+    def __init__(self, ttl: float | None = None) -> None:
+        self.ttl = ttl
+        self._pricing: DeliveryPricing | None = None
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+        self.loads = 0
+
+    async def start(self, session_pool: async_sessionmaker) -> int:
+        """Загружает снапшот заранее, в ``on_startup``."""
+        async with session_pool() as session:
+            return len(await self.get(session))
+
+    def _fresh(self) -> bool:
+        if self._pricing is None:
+            return False
+        return self.ttl is None or time.monotonic() - self._loaded_at < self.ttl
+
+    async def get(self, session: AsyncSession) -> DeliveryPricing:
+        if self._fresh():
+            return self._pricing
+        async with self._lock:
+            if not self._fresh():
+                started = time.perf_counter()
+                self._pricing = await load_delivery_pricing(session)
+                self._loaded_at = time.monotonic()
+                self.loads += 1
+                logger.info(
+                    "Delivery pricing loaded: %d salons in %.1f ms",
+                    len(self._pricing),
+                    (time.perf_counter() - started) * 1000,
+                )
+        return self._pricing
+
+    def invalidate(self) -> None:
+        self._pricing = None
+
+    def stats(self) -> dict[str, Any]:
+        return {"loads": self.loads, "salons": len(self._pricing) if self._pricing else 0}
+
+
+_ttl = env_number("DELIVERY_PRICING_TTL", 300)
+delivery_pricing = DeliveryPricingCache(ttl=_ttl if _ttl > 0 else None)
+
+
+def invalidate_delivery_pricing() -> None:
+    """Hook для путей записи: сменились координаты салона или его зоны."""
+    delivery_pricing.invalidate()
+
+
+async def quote_delivery(
+    session: AsyncSession,
+    salon_id: int,
+    lat: float,
+    lon: float,
+    salon_location: tuple[float, float] | None = None,
+) -> DeliveryQuote | None:
+    """
+    Стоимость доставки салона в точку; ``None`` — салон туда не доставляет.
+
+    ``salon_location`` — координаты салона, только что прочитанные из БД. Если
+    снапшот с ними расходится (салон задал или сменил адрес на другом
+    воркере), он перечитывается, не дожидаясь ``DELIVERY_PRICING_TTL``.
+    """
+    pricing = await delivery_pricing.get(session)
+    if salon_location is not None and pricing.location(salon_id) != salon_location:
+        delivery_pricing.invalidate()
+        pricing = await delivery_pricing.get(session)
+    return pricing.quote(salon_id, lat, lon)
+
+
+async def nearest_delivering_salon(
+    session: AsyncSession,
+    lat: float,
+    lon: float,
+    salon_ids: Sequence[int] | None = None,
+    max_km: float | None = None,
+) -> DeliveryQuote | None:
+    """
+    Ближайший (из ``salon_ids`` или вообще) салон, доставляющий в точку.
+
+    ``max_km`` — предел для салонов без зон (см. :meth:`DeliveryPricing.quotes`).
+    """
+    return (await delivery_pricing.get(session)).nearest(lat, lon, salon_ids, max_km)
+
+
+async def replace_delivery_zones(
+    session: AsyncSession, salon_id: int, zones: Iterable[Zone]
+) -> None:
+    """Заменяет зоны салона целиком."""
+    rows = [
+        {
+            "salon_id": salon_id,
+            "name": zone.name,
+            "price": zone.price,
+            "price_per_km": zone.price_per_km,
+            "priority": zone.priority,
+            "radius_km": zone.radius_km,
+            "polygon": [list(point) for point in zone.polygon] if zone.polygon else None,
+        }
+        for zone in zones
+    ]
+    await session.execute(delete(DeliveryZone).where(DeliveryZone.salon_id == salon_id))
+    if rows:
+        await session.execute(insert(DeliveryZone), rows)
+    await session.commit()
+    invalidate_delivery_pricing()
@@ -0,0 +1,58 @@
+"""Диалектно-зависимые конструкции SQL (PostgreSQL в проде, SQLite в тестах)."""
+
+from __future__ import annotations
+
+from typing import Any, Iterable, Mapping, Sequence
+
+from sqlalchemy import DateTime, Table, cast, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.sql.dml import Insert
+from sqlalchemy.sql.elements import ColumnElement
+
+_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def insert_for(dialect_name: str, table: Table) -> Insert:
+    """``INSERT`` диалекта, у которого есть ``on_conflict_do_update``."""
+    try:
+        insert = _INSERTS[dialect_name]
+    except KeyError:
+        raise NotImplementedError(f"upsert is not supported for dialect {dialect_name!r}") from None
+    return insert(table)
+
+
+def upsert(
+    dialect_name: str,
+    table: Table,
+    rows: Sequence[Mapping[str, Any]],
+    index_elements: Iterable[str],
+    update_columns: Iterable[str],
+    extra_set: Mapping[str, Any] | None = None,
+) -> Insert:
+    """
+    ``INSERT ... ON CONFLICT (index_elements) DO UPDATE`` для PostgreSQL и SQLite.
+
+    ``update_columns`` берутся из вставляемой строки (``excluded``),
+    ``extra_set`` — произвольные выражения (например, ``updated=func.now()``).
+    """
+    stmt = insert_for(dialect_name, table).values(list(rows))
+    set_ = {name: stmt.excluded[name] for name in update_columns}
+    if extra_set:
+        set_.update(extra_set)
+    return stmt.on_conflict_do_update(index_elements=list(index_elements), set_=set_)
+
+
+def db_now(dialect_name: str) -> ColumnElement:
+    """
+    Текущее время сервера БД в том виде, в каком ``func.now()`` ложится в
+    колонку ``DateTime`` без зоны (``created``/``updated``): на PostgreSQL —
+    ``now()::timestamp`` в зоне сессии, на SQLite — ``CURRENT_TIMESTAMP`` (UTC).
+
+    Сравнивать с ``updated`` нужно это значение, а не часы приложения.
+    """
+    if dialect_name == "sqlite":
+        return func.now()
+    return cast(func.now(), DateTime)
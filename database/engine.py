@@ -1,3 +1,4 @@
+import logging
 import os
 
 from dotenv import load_dotenv
@@ -5,23 +6,33 @@ load_dotenv()  # загрузит переменные из .env
 
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
+from database.config import EngineSettings
 from database.models import Base
 
-
+logger = logging.getLogger(__name__)
 
 
 db_url = os.getenv("DB_URL")
 if not db_url:
     raise RuntimeError("DB_URL environment variable is not set")
 
-# engine = create_async_engine(os.getenv('DB_URL'), echo=True)
-engine = create_async_engine(db_url, echo=True)
+engine_settings = EngineSettings.from_env()
+engine = create_async_engine(db_url, **engine_settings.engine_kwargs(db_url))
 
 session_maker = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
 
 
+def log_engine_settings() -> None:
+    """Пишет в лог эффективные настройки движка и текущее состояние пула."""
+    logger.info(
+        "DB engine: %s; driver=%s; %s",
+        engine.url.render_as_string(hide_password=True),
+        engine.dialect.driver,
+        engine_settings.describe(),
+    )
+    logger.info("DB pool: %s", engine.pool.status())
 
 
 async def drop_db():
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)
\ No newline at end of file
+        await conn.run_sync(Base.metadata.drop_all)
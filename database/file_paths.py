@@ -0,0 +1,130 @@
+"""Кэш ``file_path`` Telegram для превью в инлайн-режиме.
+
+Ссылка ``https://api.telegram.org/file/bot<token>/<file_path>`` живёт не
+меньше часа, поэтому ``file_path`` держится ``ttl`` секунд (по умолчанию
+50 минут) в ограниченном LRU и в таблице ``telegram_file`` — после
+рестарта свежие пути не запрашиваются заново. В БД хранится только
+``file_path``: токен бота подставляется при сборке URL.
+
+:meth:`FilePathCache.resolve_many` получает пути для пачки ``file_id``
+параллельно, не больше ``concurrency`` запросов ``getFile`` одновременно.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Any, Iterable
+
+from aiogram import Bot
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from database.dialects import db_now, upsert
+from database.models import TelegramFile
+from utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class FilePathCache:
+    def __init__(
+        self,
+        session_pool: async_sessionmaker | None = None,
+        ttl: float = 50 * 60,
+        maxsize: int = 5000,
+        concurrency: int = 8,
+    ) -> None:
+        self.session_pool = session_pool
+        self.ttl = ttl
+        self.concurrency = concurrency
+        self._paths: TTLCache[str, str] = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.api_calls = 0
+
+    async def start(self, session_pool: async_sessionmaker) -> int:
+        """Подключает БД и поднимает ещё не истёкшие пути в память."""
+        self.session_pool = session_pool
+        async with session_pool() as session:
+            # возраст записи — по часам БД: ``updated`` пишет её func.now()
+            now = await session.scalar(select(db_now(session.bind.dialect.name)))
+            since = now - timedelta(seconds=self.ttl)
+            rows = (
+                await session.execute(
+                    select(TelegramFile.file_id, TelegramFile.file_path, TelegramFile.updated)
+                    .where(TelegramFile.updated > since)
+                    .order_by(TelegramFile.updated)
+                    .limit(self._paths.maxsize)
+                )
+            ).all()
+        for row in rows:
+            remaining = self.ttl - (now - row.updated).total_seconds()
+            if remaining > 0:
+                self._paths.set(row.file_id, row.file_path, ttl=remaining)
+        return len(rows)
+
+    @staticmethod
+    def url(bot: Bot, file_path: str) -> str:
+        return bot.session.api.file_url(bot.token, file_path)
+
+    async def resolve_many(self, bot: Bot, file_ids: Iterable[str]) -> dict[str, str]:
+        """``{file_id: url}``; ``file_id``, для которых ``getFile`` не удался, пропускаются."""
+        paths: dict[str, str] = {}
+        missing: list[str] = []
+        for file_id in dict.fromkeys(file_ids):
+            path = self._paths.get(file_id)
+            if path is None:
+                missing.append(file_id)
+            else:
+                paths[file_id] = path
+
+        if missing:
+            fetched = await self._fetch(bot, missing)
+            for file_id, path in fetched.items():
+                self._paths.set(file_id, path)
+            paths.update(fetched)
+            await self._persist(fetched)
+
+        return {file_id: self.url(bot, path) for file_id, path in paths.items()}
+
+    async def _fetch(self, bot: Bot, file_ids: list[str]) -> dict[str, str]:
+        limit = asyncio.Semaphore(self.concurrency)
+
+        async def one(file_id: str) -> str | None:
+            async with limit:
+                self.api_calls += 1
+                try:
+                    return (await bot.get_file(file_id)).file_path
+                except Exception as e:
+                    logger.warning("getFile failed for %s: %s", file_id, e)
+                    return None
+
+        results = await asyncio.gather(*(one(file_id) for file_id in file_ids))
+        return {file_id: path for file_id, path in zip(file_ids, results) if path}
+
+    async def _persist(self, paths: dict[str, str]) -> None:
+        if not paths or self.session_pool is None:
+            return
+        try:
+            async with self.session_pool() as session:
+                await session.execute(
+                    upsert(
+                        session.bind.dialect.name,
+                        TelegramFile.__table__,
+                        [{"file_id": k, "file_path": v} for k, v in paths.items()],
+                        index_elements=["file_id"],
+                        update_columns=["file_path"],
+                        extra_set={"updated": func.now()},
+                    )
+                )
+                await session.commit()
+        except Exception:
+            # кэш в памяти уже обновлён — без БД только потеряем его при рестарте
+            logger.exception("Failed to persist %d Telegram file paths", len(paths))
+
+    def stats(self) -> dict[str, Any]:
+        return {"api_calls": self.api_calls, "cache": self._paths.stats()}
+
+
+# БД подключается в on_startup (start)
+file_paths = FilePathCache()
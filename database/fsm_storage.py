@@ -0,0 +1,393 @@
+"""FSM-хранилище aiogram поверх SQL (Postgres проекта или отдельный SQLite-файл).
+
+Состояние переживает рестарт и общее для всех воркеров. По умолчанию БД —
+единственный источник правды: каждое чтение идёт в БД, каждая запись сразу
+в неё уходит, так что следующий апдейт пользователя может попасть на любой
+воркер. ``set_state`` и ``set_data`` пишут только свою колонку одним upsert
+без предварительного чтения, так что ``update_data`` — это одно чтение и
+одна запись.
+
+Для развёртывания в один процесс можно включить:
+
+* **кэш чтений** — ``FSM_CACHE_TTL`` секунд запись держится в LRU-кэше:
+  за один апдейт middleware и хендлеры читают данные несколько раз;
+* **склейку записей** — ``FSM_FLUSH_DELAY`` секунд ``set_state``/
+  ``update_data`` видны только в процессе и уходят в БД одним батчем: серия
+  ``update_data`` внутри хендлера превращается в один upsert. Ключ, который
+  не записался ``max_attempts`` раз подряд, отбрасывается с ошибкой в лог,
+  чтобы не задерживать остальные.
+
+Другие воркеры не узнают о закэшированных и ещё не записанных изменениях, а
+``update_data`` по устаревшему кэшу перезапишет чужие данные, поэтому при
+нескольких воркерах (вебхук за балансировщиком) обе настройки должны
+оставаться ``0``.
+
+Данные сериализуются в JSON прямо в ``set_data``: несериализуемое значение
+даёт ``TypeError`` в хендлере, который его положил.
+
+Настройки:
+
+* ``FSM_STORAGE`` — ``sql`` (по умолчанию) или ``memory`` (старое поведение);
+* ``FSM_STORAGE_URL`` — отдельная БД для FSM, например
+  ``sqlite+aiosqlite:///fsm.sqlite3`` для одного узла (таблица создаётся сама,
+  SQLite работает в WAL с mmap). Без неё используется основная БД
+  (таблица ``fsm_state`` из миграций).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Mapping, NamedTuple, Optional
+
+from aiogram.exceptions import DataNotDictLikeError
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import (
+    BaseStorage,
+    DefaultKeyBuilder,
+    KeyBuilder,
+    StateType,
+    StorageKey,
+)
+from aiogram.fsm.storage.memory import MemoryStorage
+from sqlalchemy import delete, event, func, or_, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from database.dialects import upsert
+from database.models import FSMRecord
+from utils.cache import TTLCache
+from utils.env import env_number
+
+logger = logging.getLogger(__name__)
+
+
+# Колонка, которую запись не трогает
+_UNSET: Any = object()
+
+
+class _Record(NamedTuple):
+    state: Optional[str]
+    data: Dict[str, Any]
+    raw: str = "{}"  # data в JSON — то, что уйдёт в БД
+
+    @property
+    def complete(self) -> bool:
+        return self.state is not _UNSET and self.data is not _UNSET
+
+    @property
+    def columns(self) -> tuple[str, ...]:
+        """Колонки, которые задаёт запись."""
+        return tuple(
+            name for name, value in (("state", self.state), ("data", self.data))
+            if value is not _UNSET
+        )
+
+    @property
+    def clears(self) -> bool:
+        """Обнуляет ли запись хотя бы одну колонку (строка могла стать пустой)."""
+        return self.state is None or self.data == {}
+
+    def over(self, base: "_Record") -> "_Record":
+        """Эта запись поверх ``base``: заданные колонки заменяют старые."""
+        if self.data is _UNSET:
+            return base._replace(state=self.state) if self.state is not _UNSET else base
+        state = base.state if self.state is _UNSET else self.state
+        return _Record(state, self.data, self.raw)
+
+
+_EMPTY = _Record(None, {})
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return {"__decimal__": str(value)}
+    raise TypeError(f"FSM data value of type {type(value).__name__} is not JSON serializable")
+
+
+def _json_object_hook(obj: dict[str, Any]) -> Any:
+    if len(obj) == 1 and "__decimal__" in obj:
+        return Decimal(obj["__decimal__"])
+    return obj
+
+
+def dump_data(data: Mapping[str, Any]) -> str:
+    return json.dumps(data, ensure_ascii=False, default=_json_default)
+
+
+def load_data(raw: Optional[str]) -> Dict[str, Any]:
+    return json.loads(raw, object_hook=_json_object_hook) if raw else {}
+
+
+class SQLStorage(BaseStorage):
+    """
+    ``BaseStorage`` на таблице ``fsm_state`` с кэшем чтений и отложенной
+    пакетной записью (см. описание модуля).
+    """
+
+    def __init__(
+        self,
+        session_pool: async_sessionmaker,
+        key_builder: KeyBuilder | None = None,
+        cache_ttl: float = 0.0,
+        cache_size: int = 10_000,
+        flush_delay: float = 0.0,
+        max_attempts: int = 3,
+        create_schema: bool = False,
+    ) -> None:
+        self.session_pool = session_pool
+        self.key_builder = key_builder or DefaultKeyBuilder(with_destiny=True)
+        self.cache_ttl = cache_ttl
+        self.flush_delay = flush_delay
+        self.max_attempts = max_attempts
+        self._cache: TTLCache[str, _Record] = TTLCache(maxsize=cache_size, ttl=cache_ttl or None)
+        # Записи, которые ещё не ушли в БД (последняя версия на ключ)
+        self._dirty: dict[str, _Record] = {}
+        # ключ -> сколько раз подряд не записался
+        self._failures: dict[str, int] = {}
+        self._flush_task: asyncio.Task | None = None
+        self._flush_lock = asyncio.Lock()
+        self._create_schema = create_schema
+        self._schema_ready = not create_schema
+        self.db_reads = 0
+        self.db_writes = 0
+        self.flushes = 0
+        self.dropped = 0
+
+    # ---- чтение -------------------------------------------------------------
+
+    async def _read(self, key: StorageKey) -> _Record:
+        k = self.key_builder.build(key)
+        pending = self._dirty.get(k)
+        if pending is not None and pending.complete:
+            return pending
+        if self.cache_ttl:
+            record = self._cache.get(k)
+            if record is not None:
+                return record
+
+        await self._ensure_schema()
+        async with self.session_pool() as session:
+            row = (
+                await session.execute(
+                    select(FSMRecord.state, FSMRecord.data).where(FSMRecord.key == k)
+                )
+            ).first()
+        self.db_reads += 1
+        record = _Record(row.state, load_data(row.data), row.data or "{}") if row else _EMPTY
+        # Незаписанные изменения (в том числе сделанные, пока читали) — поверх БД
+        pending = self._dirty.get(k)
+        if pending is not None:
+            record = pending.over(record)
+        if self.cache_ttl:
+            self._cache.set(k, record)
+        return record
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return (await self._read(key)).state
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return (await self._read(key)).data.copy()
+
+    # ---- запись -------------------------------------------------------------
+
+    async def _write(self, key: StorageKey, change: _Record) -> None:
+        k = self.key_builder.build(key)
+        pending = self._dirty.get(k)
+        self._dirty[k] = change.over(pending) if pending is not None else change
+        if self.cache_ttl:
+            cached = self._cache.get(k)
+            if cached is not None:
+                self._cache.set(k, change.over(cached))
+        if self.flush_delay <= 0:
+            # только свой ключ: ошибка чужой записи должна уйти её хендлеру
+            await self.flush([k])
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._delayed_flush())
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        state = state.state if isinstance(state, State) else state
+        await self._write(key, _Record(state, _UNSET))
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        if not isinstance(data, dict):
+            raise DataNotDictLikeError(
+                f"Data must be a dict or dict-like object, got {type(data).__name__}"
+            )
+        raw = dump_data(data)
+        await self._write(key, _Record(_UNSET, data.copy(), raw))
+
+    async def _delayed_flush(self) -> None:
+        delay = self.flush_delay
+        # Пока идёт запись, могли накопиться новые изменения — дописываем их тут же
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                await self.flush()
+                delay = self.flush_delay
+            except Exception:
+                logger.exception("FSM flush failed, %d keys will be retried", len(self._dirty))
+                delay = max(self.flush_delay, 1.0)
+            if not self._dirty:
+                return
+
+    async def flush(self, keys: Iterable[str] | None = None) -> None:
+        """Записывает накопленные изменения (или только ``keys``) в БД одной транзакцией.
+
+        Если батч не записался, ключи пишутся по одному: сбойная запись не
+        держит остальные. Ошибка пробрасывается после этого.
+        """
+        async with self._flush_lock:
+            if keys is None:
+                batch, self._dirty = self._dirty, {}
+            else:
+                batch = {k: self._dirty.pop(k) for k in keys if k in self._dirty}
+            if not batch:
+                return
+            failed: dict[str, _Record] = {}
+            error: Exception | None = None
+            try:
+                await self._ensure_schema()
+                await self._flush_batch(batch)
+            except Exception as exc:
+                error = exc
+                failed = batch if len(batch) == 1 else await self._flush_each(batch)
+            for k in batch.keys() - failed.keys():
+                self._failures.pop(k, None)
+            self.db_writes += len(batch) - len(failed)
+            self.flushes += 1
+            if error is not None and failed:
+                self._retry_later(failed)
+                raise error
+
+    async def _flush_each(self, batch: dict[str, _Record]) -> dict[str, _Record]:
+        failed = {}
+        for k, record in batch.items():
+            try:
+                await self._flush_batch({k: record})
+            except Exception:
+                failed[k] = record
+        return failed
+
+    def _retry_later(self, failed: dict[str, _Record]) -> None:
+        """Возвращает незаписанные ключи в очередь, а безнадёжные отбрасывает.
+
+        При записи сразу (``flush_delay`` = 0) ошибка уходит в хендлер,
+        записавший ключ, и повторять нечего.
+        """
+        for k, record in failed.items():
+            if k in self._dirty:
+                # пока писали, пришла новая версия — попробуем её вместе с неудачной
+                self._failures.pop(k, None)
+                self._dirty[k] = self._dirty[k].over(record)
+                continue
+            attempts = self._failures.get(k, 0) + 1
+            if self.flush_delay > 0 and attempts < self.max_attempts:
+                self._failures[k] = attempts
+                self._dirty[k] = record
+                continue
+            self._failures.pop(k, None)
+            self._cache.pop(k)
+            self.dropped += 1
+            logger.error("FSM record %s dropped after %d failed writes", k, attempts)
+
+    async def _flush_batch(self, batch: dict[str, _Record]) -> None:
+        # Один upsert на набор колонок: обычно все записи батча задают одно и то же
+        groups: dict[tuple[str, ...], list[dict[str, Any]]] = {}
+        for k, record in batch.items():
+            row: dict[str, Any] = {"key": k, "state": None, "data": "{}"}
+            if record.state is not _UNSET:
+                row["state"] = record.state
+            if record.data is not _UNSET:
+                row["data"] = record.raw
+            groups.setdefault(record.columns, []).append(row)
+        cleared = [k for k, record in batch.items() if record.clears]
+
+        async with self.session_pool() as session:
+            dialect = session.bind.dialect.name
+            for columns, rows in groups.items():
+                await session.execute(
+                    upsert(
+                        dialect,
+                        FSMRecord.__table__,
+                        rows,
+                        index_elements=["key"],
+                        update_columns=columns,
+                        extra_set={"updated": func.now()},
+                    )
+                )
+            if cleared:
+                await session.execute(
+                    delete(FSMRecord).where(
+                        FSMRecord.key.in_(cleared),
+                        FSMRecord.state.is_(None),
+                        or_(FSMRecord.data.is_(None), FSMRecord.data == "{}"),
+                    )
+                )
+            await session.commit()
+
+    async def _ensure_schema(self) -> None:
+        if self._schema_ready:
+            return
+        async with self.session_pool() as session:
+            conn = await session.connection()
+            await conn.run_sync(lambda sync_conn: FSMRecord.__table__.create(sync_conn, checkfirst=True))
+            await session.commit()
+        self._schema_ready = True
+
+    async def close(self) -> None:
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+        logger.info("FSM storage closed: %s", self.stats())
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "db_reads": self.db_reads,
+            "db_writes": self.db_writes,
+            "flushes": self.flushes,
+            "dropped": self.dropped,
+            "pending": len(self._dirty),
+            "cache": self._cache.stats(),
+        }
+
+
+def _sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.close()
+
+
+def create_fsm_storage(env: Mapping[str, str] | None = None) -> BaseStorage:
+    """Хранилище FSM для ``Dispatcher`` согласно ``FSM_STORAGE*``."""
+    env = os.environ if env is None else env
+    backend = (env.get("FSM_STORAGE") or "sql").strip().lower()
+    if backend == "memory":
+        return MemoryStorage()
+    if backend != "sql":
+        raise RuntimeError(f"FSM_STORAGE must be 'sql' or 'memory', got {backend!r}")
+
+    options = dict(
+        cache_ttl=max(0.0, env_number("FSM_CACHE_TTL", 0.0, env)),
+        flush_delay=max(0.0, env_number("FSM_FLUSH_DELAY", 0.0, env)),
+    )
+    url = env.get("FSM_STORAGE_URL")
+    if not url:
+        from database.engine import session_maker
+
+        return SQLStorage(session_maker, **options)
+
+    fsm_engine = create_async_engine(url)
+    if make_url(url).get_backend_name() == "sqlite":
+        event.listen(fsm_engine.sync_engine, "connect", _sqlite_pragmas)
+    pool = async_sessionmaker(bind=fsm_engine, class_=AsyncSession, expire_on_commit=False)
+    return SQLStorage(pool, create_schema=True, **options)
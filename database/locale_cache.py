@@ -0,0 +1,66 @@
+"""Кэш языка пользователя (Telegram user id -> локаль) для горячего пути.
+
+``UserLocaleMiddleware`` и меню определяют локаль на каждом апдейте; язык же
+меняется только при выборе в /language или при создании пользователя. Поэтому
+локаль читается из БД один раз и дальше берётся из ограниченного LRU-кэша.
+
+Пути записи (:func:`database.orm_query.orm_set_user_language` и другие места,
+где создаётся/меняется ``User``) вызывают :func:`invalidate_locale` после
+коммита. Другие воркеры увидят новый язык в пределах ``LOCALE_CACHE_TTL``
+(см. :mod:`utils.cache`).
+"""
+
+from __future__ import annotations
+
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import User
+from utils.cache import TTLCache
+from utils.env import env_number
+
+SUPPORTED_LOCALES = {"ru", "en"}
+
+# Значение для пользователей без записи/языка в БД: кэшируем и «нет данных»,
+# чтобы не ходить в БД за новичками на каждом апдейте
+NO_LOCALE = ""
+
+
+def normalize_locale(code: Optional[str]) -> Optional[str]:
+    """
+    'en-US' -> 'en', 'ru' -> 'ru'. None, если пусто/неподдерживаемо.
+    """
+    if not code:
+        return None
+    base = code.split("-")[0].lower()
+    return base if base in SUPPORTED_LOCALES else None
+
+
+_ttl = env_number("LOCALE_CACHE_TTL", 600)
+locale_cache: TTLCache[int, str] = TTLCache(
+    maxsize=max(1, int(env_number("LOCALE_CACHE_SIZE", 50_000))),
+    ttl=_ttl if _ttl > 0 else None,
+)
+
+
+async def get_user_locale(session: AsyncSession, user_id: int) -> Optional[str]:
+    """Локаль пользователя из БД (через кэш) или None, если она не задана."""
+    locale = locale_cache.get(user_id)
+    if locale is None:
+        lang = await session.scalar(select(User.language).where(User.user_id == user_id))
+        locale = (normalize_locale(lang) or lang) if lang else NO_LOCALE
+        locale_cache.set(user_id, locale)
+    return locale or None
+
+
+def invalidate_locale(user_id: int | None) -> None:
+    """Hook для путей записи: язык пользователя изменился (или он создан)."""
+    if user_id is not None:
+        locale_cache.pop(int(user_id))
+
+
+def locale_cache_stats() -> dict[str, float]:
+    """Счётчики кэша локалей (size/hits/misses/evictions/hit_rate)."""
+    return locale_cache.stats()
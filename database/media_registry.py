@@ -0,0 +1,168 @@
+"""Реестр ``file_id`` Telegram для уже отправленных картинок.
+
+Первая отправка URL или локального файла заставляет Telegram скачать
+или принять загрузку; в ответе приходит ``file_id``, по которому ту же
+картинку можно слать мгновенно. Реестр запоминает соответствие
+«источник → file_id» в памяти и в таблице ``media_file``, а
+:class:`middlewares.media_registry.MediaRegistryMiddleware` подставляет
+его во все исходящие ``send_photo``/``edit_message_media``.
+
+Ключ источника:
+
+* URL — сам URL;
+* локальный файл — ``file:<абсолютный путь>:<mtime_ns>``, поэтому
+  изменённый на диске баннер будет загружен заново.
+
+Запись в БД — фоновая, батчем (как в :mod:`database.fsm_storage`):
+отправка сообщения не ждёт INSERT.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from typing import Any
+
+from aiogram.types import FSInputFile
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from database.dialects import upsert
+from database.models import MediaFile
+from utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+def media_key(source: Any) -> str | None:
+    """Ключ реестра для URL/пути/``FSInputFile``; ``None`` — кэшировать нечего."""
+    if isinstance(source, FSInputFile):
+        source = str(source.path)
+    if not isinstance(source, str) or not source:
+        return None
+    if source.startswith(("http://", "https://")):
+        return source
+    try:
+        stat = os.stat(source)
+    except OSError:
+        # не файл на диске — значит, уже file_id
+        return None
+    return f"file:{os.path.abspath(source)}:{stat.st_mtime_ns}"
+
+
+class MediaRegistry:
+    def __init__(
+        self,
+        session_pool: async_sessionmaker | None = None,
+        maxsize: int = 10_000,
+        flush_delay: float = 0.5,
+    ) -> None:
+        self.session_pool = session_pool
+        self.flush_delay = flush_delay
+        self._file_ids: TTLCache[str, str] = TTLCache(maxsize=maxsize)
+        self._pending: dict[str, str | None] = {}
+        self._flush_task: asyncio.Task | None = None
+        self._flush_lock = asyncio.Lock()
+        self.substitutions = 0
+
+    def get(self, source: Any) -> str | None:
+        key = media_key(source)
+        return self._file_ids.get(key) if key else None
+
+    def resolve(self, source: Any) -> Any:
+        """``file_id`` для известного источника, иначе сам источник."""
+        file_id = self.get(source)
+        if file_id is None:
+            return source
+        self.substitutions += 1
+        return file_id
+
+    def remember(self, source: Any, file_id: str) -> None:
+        key = media_key(source)
+        if key is None or self._file_ids.get(key) == file_id:
+            return
+        self._file_ids.set(key, file_id)
+        self._schedule(key, file_id)
+
+    def forget(self, source: Any) -> None:
+        key = media_key(source)
+        if key is not None and self._file_ids.pop(key) is not None:
+            self._schedule(key, None)
+
+    def _schedule(self, key: str, file_id: str | None) -> None:
+        if self.session_pool is None:
+            return
+        self._pending[key] = file_id
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._delayed_flush())
+
+    async def _delayed_flush(self) -> None:
+        await asyncio.sleep(self.flush_delay)
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Media registry flush failed, %d keys dropped", len(self._pending))
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            if not self._pending or self.session_pool is None:
+                return
+            batch, self._pending = self._pending, {}
+            gone = [key for key, file_id in batch.items() if file_id is None]
+            rows = [
+                {"key": key, "file_id": file_id}
+                for key, file_id in batch.items()
+                if file_id is not None
+            ]
+            async with self.session_pool() as session:
+                if gone:
+                    await session.execute(delete(MediaFile).where(MediaFile.key.in_(gone)))
+                if rows:
+                    await session.execute(
+                        upsert(
+                            session.bind.dialect.name,
+                            MediaFile.__table__,
+                            rows,
+                            index_elements=["key"],
+                            update_columns=["file_id"],
+                            extra_set={"updated": func.now()},
+                        )
+                    )
+                await session.commit()
+
+    async def start(self, session_pool: async_sessionmaker) -> int:
+        """Подключает БД и поднимает последние записи в память (при старте бота)."""
+        self.session_pool = session_pool
+        async with self.session_pool() as session:
+            rows = (
+                await session.execute(
+                    select(MediaFile.key, MediaFile.file_id)
+                    .order_by(MediaFile.updated.desc())
+                    .limit(self._file_ids.maxsize)
+                )
+            ).all()
+        # от старых к новым, чтобы свежие остались «горячими» в LRU
+        for row in reversed(rows):
+            self._file_ids.set(row.key, row.file_id)
+        return len(rows)
+
+    async def close(self) -> None:
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "substitutions": self.substitutions,
+            "pending": len(self._pending),
+            "cache": self._file_ids.stats(),
+        }
+
+
+# БД подключается в on_startup (start), до этого реестр работает только в памяти
+media_registry = MediaRegistry()
@@ -0,0 +1,42 @@
+"""Кэш членства пользователя в салонах (Telegram user id -> id салонов).
+
+Инлайн-режим проверяет членство на каждом нажатии клавиши, а список салонов
+пользователя меняется только когда он привязывается к новому салону
+(:func:`database.orm_query.orm_add_user`), который вызывает
+:func:`invalidate_membership` после коммита. Другие воркеры увидят новый
+список в пределах ``MEMBERSHIP_CACHE_TTL`` (см. :mod:`utils.cache`).
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import UserSalon
+from utils.cache import TTLCache
+from utils.env import env_number
+
+
+_ttl = env_number("MEMBERSHIP_CACHE_TTL", 300)
+membership_cache: TTLCache[int, tuple[int, ...]] = TTLCache(
+    maxsize=max(1, int(env_number("MEMBERSHIP_CACHE_SIZE", 50_000))),
+    ttl=_ttl if _ttl > 0 else None,
+)
+
+
+async def get_user_salon_ids(session: AsyncSession, user_id: int) -> tuple[int, ...]:
+    """Салоны пользователя в порядке привязки (через кэш)."""
+    salon_ids = membership_cache.get(user_id)
+    if salon_ids is None:
+        result = await session.scalars(
+            select(UserSalon.salon_id).where(UserSalon.user_id == user_id).order_by(UserSalon.id)
+        )
+        salon_ids = tuple(result.all())
+        membership_cache.set(user_id, salon_ids)
+    return salon_ids
+
+
+def invalidate_membership(user_id: int | None) -> None:
+    """Hook для путей записи: пользователь привязан к новому салону."""
+    if user_id is not None:
+        membership_cache.pop(int(user_id))
@@ -6,11 +6,11 @@ from sqlalchemy import (
     Text,
     BigInteger,
     func,
-    Boolean, Integer,
+    Boolean, Integer, JSON,
 )
 from sqlalchemy import text as sa_text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
-from sqlalchemy import UniqueConstraint
+from sqlalchemy import Index, UniqueConstraint
 
 class Base(DeclarativeBase):
     created: Mapped[DateTime] = mapped_column(
@@ -40,6 +40,9 @@ class Salon(Base):
     group_chat_id: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
     free_plan: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default=sa_text("true"))
     order_limit: Mapped[int] = mapped_column(Integer, nullable=False, server_default="30")
+    # Сколько заказов оформлено в салоне; ведётся в place_order,
+    # сверяется командой ``python -m database.reconcile``
+    orders_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
 
     user_salons: Mapped[list['UserSalon']] = relationship(back_populates='salon')
 
@@ -57,6 +60,7 @@ class Banner(Base):
 
     __table_args__ = (
         UniqueConstraint('name', 'salon_id', name='unique_banner_name_per_salon'),
+        Index('ix_banner_salon_id', 'salon_id'),
     )
 
 class Category(Base):
@@ -68,6 +72,10 @@ class Category(Base):
 
     salon: Mapped['Salon'] = relationship(backref='categories')
 
+    __table_args__ = (
+        Index('ix_category_salon_id', 'salon_id'),
+    )
+
 
 class Product(Base):
     __tablename__ = 'product'
@@ -79,12 +87,20 @@ class Product(Base):
     price: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False)
     image: Mapped[str] = mapped_column(String(150))
     image_file_id: Mapped[str | None] = mapped_column(String(150), nullable=True)
+    # превью 320×320 для инлайн-выдачи (см. utils.images)
+    thumbnail: Mapped[str | None] = mapped_column(String(150), nullable=True)
     category_id: Mapped[int] = mapped_column(ForeignKey('category.id', ondelete='CASCADE'), nullable=False)
     salon_id: Mapped[int] = mapped_column(ForeignKey('salon.id'), nullable=False)
 
     category: Mapped['Category'] = relationship(backref='product')
     salon: Mapped['Salon'] = relationship(backref='product')
 
+    __table_args__ = (
+        # страницы каталога: WHERE salon_id AND category_id ORDER BY id
+        Index('ix_product_salon_category', 'salon_id', 'category_id', 'id'),
+        Index('ix_product_category_id', 'category_id'),
+    )
+
 
 class User(Base):
     __tablename__ = 'users'
@@ -121,6 +137,7 @@ class UserSalon(Base):
 
     __table_args__ = (
         UniqueConstraint('user_id', 'salon_id', name='uq_user_salon'),
+        Index('ix_user_salon_salon_id', 'salon_id'),
     )
 
 
@@ -139,6 +156,11 @@ class Cart(Base):
     user_salon: Mapped['UserSalon'] = relationship(backref='cart')
     product: Mapped['Product'] = relationship(backref='cart')
 
+    __table_args__ = (
+        # одна строка на товар: на нём держатся атомарные upsert-ы корзины
+        Index('ix_cart_user_salon_product', 'user_salon_id', 'product_id', unique=True),
+    )
+
 
 class Order(Base):
     __tablename__ = "orders"
@@ -159,6 +181,11 @@ class Order(Base):
 
     user_salon: Mapped['UserSalon'] = relationship(backref='orders')
 
+    __table_args__ = (
+        # заказы салона (через user_salon) от новых к старым
+        Index('ix_orders_user_salon_created', 'user_salon_id', 'created'),
+    )
+
 
 class OrderItem(Base):
     __tablename__ = "order_item"
@@ -171,4 +198,55 @@ class OrderItem(Base):
     price: Mapped[float] = mapped_column(Numeric(10, 2))
 
     order: Mapped['Order'] = relationship(backref='items')
-    product: Mapped['Product'] = relationship(backref='order_items')
\ No newline at end of file
+    product: Mapped['Product'] = relationship(backref='order_items')
+
+    __table_args__ = (
+        Index('ix_order_item_order_id', 'order_id'),
+    )
+
+class FSMRecord(Base):
+    """Состояние и данные FSM aiogram (см. :mod:`database.fsm_storage`)."""
+
+    __tablename__ = "fsm_state"
+
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    state: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    data: Mapped[str] = mapped_column(Text, nullable=False, default="{}")
+
+
+class MediaFile(Base):
+    """``file_id`` Telegram для URL/локального файла (см. :mod:`database.media_registry`)."""
+
+    __tablename__ = "media_file"
+
+    key: Mapped[str] = mapped_column(String(512), primary_key=True)
+    file_id: Mapped[str] = mapped_column(String(255), nullable=False)
+
+
+class TelegramFile(Base):
+    """``file_path`` для ``file_id`` из ``getFile`` (см. :mod:`database.file_paths`)."""
+
+    __tablename__ = "telegram_file"
+
+    file_id: Mapped[str] = mapped_column(String(255), primary_key=True)
+    file_path: Mapped[str] = mapped_column(String(255), nullable=False)
+
+
+class DeliveryZone(Base):
+    """Зона доставки салона: круг или многоугольник со своим тарифом (см. :mod:`utils.delivery`)."""
+
+    __tablename__ = "delivery_zone"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    salon_id: Mapped[int] = mapped_column(ForeignKey('salon.id', ondelete='CASCADE'), nullable=False)
+    name: Mapped[str] = mapped_column(String(100), nullable=False)
+    # либо радиус вокруг салона, либо [[lat, lon], ...]
+    radius_km: Mapped[float | None] = mapped_column(Numeric(7, 3), nullable=True)
+    polygon: Mapped[list | None] = mapped_column(JSON, nullable=True)
+    price: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False, default=0)
+    price_per_km: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False, default=0)
+    priority: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        Index('ix_delivery_zone_salon_id', 'salon_id'),
+    )
@@ -1,8 +1,17 @@
 import math
-from sqlalchemy import select, update, delete, func
+import re
+from datetime import datetime
+from decimal import Decimal
+from typing import NamedTuple
+
+from sqlalchemy import case, literal_column, or_, select, update, delete, func, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload, selectinload
 from common.texts_for_db import  description_for_info_pages, images_for_info_pages
+from database.catalog_cache import invalidate_catalog
+from database.dialects import insert_for
+from database.locale_cache import invalidate_locale
+from database.membership_cache import invalidate_membership
 from database.models import Banner, Cart, Category, Product, User, Salon, UserSalon
 
 
@@ -54,6 +63,7 @@ async def orm_add_banner_description(
             )
 
     await session.commit()
+    invalidate_catalog(salon_id)
 
 
 async def orm_change_banner_image(session: AsyncSession, name: str, image: str, salon_id: int):
@@ -64,6 +74,7 @@ async def orm_change_banner_image(session: AsyncSession, name: str, image: str,
     )
     await session.execute(query)
     await session.commit()
+    invalidate_catalog(salon_id)
 
 
 async def orm_change_banner_description(session: AsyncSession, name: str, description: str, salon_id: int):
@@ -74,6 +85,7 @@ async def orm_change_banner_description(session: AsyncSession, name: str, descri
     )
     await session.execute(query)
     await session.commit()
+    invalidate_catalog(salon_id)
 
 
 async def orm_get_banner(session: AsyncSession, page: str, salon_id: int):
@@ -108,18 +120,21 @@ async def orm_create_categories(session: AsyncSession, categories: list, salon_i
         return
     session.add_all([Category(name=name, salon_id=salon_id) for name in categories])
     await session.commit()
+    invalidate_catalog(salon_id)
 
 
 async def orm_add_category(session: AsyncSession, name: str, salon_id: int):
     """Create a single category for the salon."""
     session.add(Category(name=name, salon_id=salon_id))
     await session.commit()
+    invalidate_catalog(salon_id)
 
 async def orm_delete_category(session: AsyncSession, category_id: int, salon_id: int) -> None:
     """Delete category by id belonging to a salon."""
     query = delete(Category).where(Category.id == category_id, Category.salon_id == salon_id)
     await session.execute(query)
     await session.commit()
+    invalidate_catalog(salon_id)
 
 
 
@@ -133,11 +148,13 @@ async def orm_add_product(session: AsyncSession, data: dict, salon_id: int):
         price=float(data["price"]),
         image=data["image"],
         image_file_id=data.get("image_file_id"),
+        thumbnail=data.get("thumbnail"),
         category_id=int(data["category"]),
         salon_id=salon_id,
     )
     session.add(obj)
     await session.commit()
+    invalidate_catalog(salon_id)
 
 
 async def orm_get_products(session: AsyncSession, category_id=None, salon_id: int = None):
@@ -150,6 +167,159 @@ async def orm_get_products(session: AsyncSession, category_id=None, salon_id: in
     return result.scalars().all()
 
 
+# Полнотекстовый поиск товаров. Выражение должно совпадать с индексом
+# ix_product_search из миграции a7b9c1d3e5f7, иначе Postgres его не использует.
+_TS_CONFIG = literal_column("'simple'::regconfig")
+_EMPTY_TEXT = literal_column("''")
+
+
+def _product_search_vector():
+    return func.setweight(
+        func.to_tsvector(_TS_CONFIG, func.coalesce(Product.name, _EMPTY_TEXT)),
+        literal_column("'A'"),
+    ).op("||")(
+        func.setweight(
+            func.to_tsvector(_TS_CONFIG, func.coalesce(Product.description, _EMPTY_TEXT)),
+            literal_column("'B'"),
+        )
+    )
+
+
+def _search_terms(text: str) -> list[str]:
+    return re.findall(r"\w+", text.lower())[:8]
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+async def orm_search_products(
+    session: AsyncSession,
+    salon_id: int,
+    text: str = "",
+    *,
+    category_id: int | None = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> list[Product]:
+    """Товары салона по строке поиска, лучшие совпадения первыми.
+
+    Каждое слово запроса ищется как префикс (``пеп`` находит «Пепперони»).
+    В Postgres — ``tsvector`` с весами (название важнее описания) плюс
+    триграммная близость названия; в SQLite — ``LIKE`` по словам, товары с
+    совпадением в названии выше. Пустой запрос — все товары по ``id``.
+    """
+    query = select(Product).where(*_products_filter(salon_id, category_id))
+    terms = _search_terms(text)
+
+    if not terms:
+        query = query.order_by(Product.id)
+    elif session.bind.dialect.name == "postgresql":
+        vector = _product_search_vector()
+        tsquery = func.to_tsquery(_TS_CONFIG, " & ".join(f"{t}:*" for t in terms))
+        phrase = " ".join(terms)
+        query = query.where(
+            or_(vector.op("@@")(tsquery), Product.name.ilike(f"%{_escape_like(phrase)}%"))
+        ).order_by(
+            (func.ts_rank(vector, tsquery) + func.similarity(Product.name, phrase)).desc(),
+            Product.id,
+        )
+    else:
+        name_hits = []
+        for term in terms:
+            pattern = f"%{_escape_like(term)}%"
+            query = query.where(
+                or_(
+                    Product.name.ilike(pattern, escape="\\"),
+                    Product.description.ilike(pattern, escape="\\"),
+                )
+            )
+            name_hits.append(
+                case((Product.name.ilike(f"{_escape_like(term)}%", escape="\\"), 2),
+                     (Product.name.ilike(pattern, escape="\\"), 1), else_=0)
+            )
+        query = query.order_by(sum(name_hits).desc(), Product.id)
+
+    result = await session.execute(query.offset(offset).limit(limit))
+    return list(result.scalars().all())
+
+
+class ProductsPage(NamedTuple):
+    """One page of products plus the data needed to paginate it."""
+
+    items: list[Product]
+    total: int
+    page: int
+
+
+def _products_filter(salon_id: int, category_id: int | None):
+    conditions = [Product.salon_id == salon_id]
+    if category_id is not None:
+        conditions.append(Product.category_id == int(category_id))
+    return conditions
+
+
+async def orm_get_products_page(
+    session: AsyncSession,
+    salon_id: int,
+    category_id: int | None = None,
+    page: int = 1,
+    per_page: int = 1,
+) -> ProductsPage:
+    """Return a single page of products ordered by id.
+
+    The total count comes from ``count(*) OVER ()`` in the same query, so a
+    page costs one round-trip and hydrates at most ``per_page`` rows. Pages
+    past the end are clamped to the last page.
+    """
+    page = max(1, page)
+    conditions = _products_filter(salon_id, category_id)
+
+    async def fetch(page_no: int):
+        result = await session.execute(
+            select(Product, func.count().over().label("total"))
+            .where(*conditions)
+            .order_by(Product.id)
+            .offset((page_no - 1) * per_page)
+            .limit(per_page)
+        )
+        return result.all()
+
+    rows = await fetch(page)
+    if rows:
+        return ProductsPage([row[0] for row in rows], rows[0].total, page)
+
+    total = await session.scalar(select(func.count()).select_from(Product).where(*conditions)) or 0
+    if not total:
+        return ProductsPage([], 0, 1)
+    page = math.ceil(total / per_page)
+    rows = await fetch(page)
+    return ProductsPage([row[0] for row in rows], total, page)
+
+
+async def orm_get_product_position(
+    session: AsyncSession,
+    product_id: int,
+    salon_id: int,
+    category_id: int | None = None,
+) -> int | None:
+    """Return the 1-based position of a product in its listing (ordered by id).
+
+    Uses ``row_number()`` so the database does the counting instead of the
+    whole category being loaded to find an index. ``None`` if the product is
+    not in the listing.
+    """
+    ranked = (
+        select(
+            Product.id.label("id"),
+            func.row_number().over(order_by=Product.id).label("position"),
+        )
+        .where(*_products_filter(salon_id, category_id))
+        .subquery()
+    )
+    return await session.scalar(select(ranked.c.position).where(ranked.c.id == product_id))
+
+
 async def orm_get_product(session: AsyncSession, product_id: int, salon_id: int):
     query = select(Product).where(Product.id == product_id, Product.salon_id == salon_id)
     result = await session.execute(query)
@@ -172,6 +342,7 @@ async def orm_update_product(session: AsyncSession, product_id: int, data, salon
     )
     await session.execute(query)
     await session.commit()
+    invalidate_catalog(salon_id)
 
 async def orm_change_product_image(
     session: AsyncSession, product_id: int, image: str, salon_id: int, image_file_id: str | None = None
@@ -183,6 +354,7 @@ async def orm_change_product_image(
     )
     await session.execute(query)
     await session.commit()
+    invalidate_catalog(salon_id)
 
 async def orm_change_product_field(
     session: AsyncSession,
@@ -201,12 +373,35 @@ async def orm_change_product_field(
     )
     await session.execute(query)
     await session.commit()
+    invalidate_catalog(salon_id)
+
+
+async def orm_image_in_use(
+    session: AsyncSession, image: str, exclude_product_id: int | None = None
+) -> bool:
+    """
+    Используется ли картинка ещё где-то. Фото в хранилище дедуплицируются
+    по содержимому, поэтому один URL может быть у нескольких товаров и
+    баннеров — удалять объект можно только когда ссылок не осталось.
+    """
+    product_q = select(Product.id).where(
+        (Product.image == image) | (Product.thumbnail == image)
+    )
+    if exclude_product_id is not None:
+        product_q = product_q.where(Product.id != exclude_product_id)
+    banner_q = select(Banner.id).where(Banner.image == image)
+    result = await session.execute(
+        select(product_q.exists().label("p"), banner_q.exists().label("b"))
+    )
+    row = result.one()
+    return bool(row.p or row.b)
 
 
 async def orm_delete_product(session: AsyncSession, product_id: int, salon_id: int):
     query = delete(Product).where(Product.id == product_id, Product.salon_id == salon_id)
     await session.execute(query)
     await session.commit()
+    invalidate_catalog(salon_id)
 
 async def init_default_salon_content(session: AsyncSession, salon_id: int):
     """Fill newly created salon with default categories and banners."""
@@ -236,7 +431,8 @@ async def orm_add_user(
         await session.execute(select(User).where(User.user_id == user_id))
     ).scalar_one_or_none()
 
-    if user is None:
+    created = user is None
+    if created:
         user = User(user_id=user_id, is_super_admin=is_super_admin)
         session.add(user)
     else:
@@ -252,7 +448,8 @@ async def orm_add_user(
         )
     ).scalar_one_or_none()
 
-    if user_salon is None:
+    joined = user_salon is None
+    if joined:
         user_salon = UserSalon(
             user_id=user_id,
             salon_id=salon_id,
@@ -276,6 +473,10 @@ async def orm_add_user(
     user_salon.updated = func.now()
 
     await session.commit()
+    if created:
+        invalidate_locale(user_id)
+    if joined:
+        invalidate_membership(user_id)
 
     # 👉 Повторно получаем user_salon с подгруженным user
     result = await session.execute(
@@ -307,6 +508,7 @@ async def orm_set_user_language(
         update(User).where(User.user_id == user_id).values(language=language)
     )
     await session.commit()
+    invalidate_locale(user_id)
 
 
 async def orm_get_user_salons(session: AsyncSession, user_id: int) -> list[UserSalon]:
@@ -319,6 +521,23 @@ async def orm_get_user_salons(session: AsyncSession, user_id: int) -> list[UserS
     return result.scalars().all()
 
 
+async def orm_get_category_salon(
+    session: AsyncSession, category_id: int, user_id: int
+) -> int | None:
+    """
+    Салон категории, если пользователь в нём состоит, иначе ``None``.
+
+    Один запрос по первичному ключу категории и ``ix_user_salon_salon_id``
+    вместо перебора категорий всех салонов пользователя.
+    """
+    return await session.scalar(
+        select(Category.salon_id)
+        .join(UserSalon, UserSalon.salon_id == Category.salon_id)
+        .where(Category.id == category_id, UserSalon.user_id == user_id)
+        .limit(1)
+    )
+
+
 async def orm_get_user_salon(session: AsyncSession, user_id: int, salon_id: int) -> UserSalon | None:
     stmt = (
         select(UserSalon)
@@ -333,31 +552,31 @@ async def orm_get_user_salon(session: AsyncSession, user_id: int, salon_id: int)
 
 async def orm_add_to_cart(
     session: AsyncSession, user_salon_id: int, product_id: int
-):
-    user_salon = await session.get(UserSalon, user_salon_id)
-    if not user_salon:
-        return
+) -> int | None:
+    """
+    +1 к позиции корзины одним ``INSERT ... SELECT ... ON CONFLICT DO UPDATE``.
 
-    product_check = await session.execute(
-        select(Product.id).where(
-            Product.id == product_id, Product.salon_id == user_salon.salon_id
-        )
+    Товар вставляется, только если он из салона этого ``user_salon``;
+    параллельные нажатия не теряют друг друга — инкремент делает сама БД
+    (уникальный индекс ``ix_cart_user_salon_product``). Возвращает новое
+    количество или ``None``, если товар/пользователь не найден.
+    """
+    owned = (
+        select(UserSalon.id, Product.id, literal_column("1"))
+        .join(UserSalon, UserSalon.salon_id == Product.salon_id)
+        .where(Product.id == product_id, UserSalon.id == user_salon_id)
     )
-    if not product_check.scalar():
-        return
-
-    query = select(Cart).where(
-        Cart.user_salon_id == user_salon_id,
-        Cart.product_id == product_id,
-    ).options(joinedload(Cart.product))
-    cart = (await session.execute(query)).scalar()
-    if cart:
-        cart.quantity += 1
-        await session.commit()
-        return cart
-    else:
-        session.add(Cart(user_salon_id=user_salon_id, product_id=product_id, quantity=1))
-        await session.commit()
+    stmt = (
+        insert_for(session.bind.dialect.name, Cart.__table__)
+        .from_select(["user_salon_id", "product_id", "quantity"], owned)
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_salon_id", "product_id"],
+        set_={"quantity": Cart.__table__.c.quantity + 1, "updated": func.now()},
+    ).returning(Cart.__table__.c.quantity)
+    quantity = (await session.execute(stmt)).scalar()
+    await session.commit()
+    return quantity
 
 
 async def orm_get_user_carts(session: AsyncSession, user_salon_id: int):
@@ -365,11 +584,74 @@ async def orm_get_user_carts(session: AsyncSession, user_salon_id: int):
         select(Cart)
         .where(Cart.user_salon_id == user_salon_id)
         .options(joinedload(Cart.product))
+        # количество меняется UPDATE-ами мимо ORM — не отдаём устаревшие объекты сессии
+        .execution_options(populate_existing=True)
     )
     result = await session.execute(query)
     return result.scalars().all()
 
 
+class CartLine(NamedTuple):
+    """Позиция корзины — общая модель чтения для экрана корзины, чека и оформления заказа."""
+
+    product_id: int
+    name: str
+    price: Decimal
+    quantity: int
+    line_total: Decimal
+    image: str | None
+    image_file_id: str | None
+
+    @classmethod
+    def from_row(cls, row) -> "CartLine":
+        """Первые колонки строки :func:`cart_lines_select` (остальные — дополнительные)."""
+        return cls(*row[: len(cls._fields)])
+
+
+class CartSummary(NamedTuple):
+    lines: tuple[CartLine, ...]
+    total: Decimal
+
+    def __bool__(self) -> bool:
+        return bool(self.lines)
+
+
+def cart_lines_select(user_salon_id: int):
+    """
+    Позиции корзины в порядке добавления: колонки :class:`CartLine` и
+    ``grand_total``. Сумма по позиции и общий итог (оконный ``SUM() OVER ()``)
+    считаются в БД тем же запросом.
+
+    Вызывающий может добавить свои колонки и join-ы (так делает
+    :func:`database.checkout.place_order`).
+    """
+    line_total = Product.price * Cart.quantity
+    return (
+        select(
+            Cart.product_id,
+            Product.name,
+            Product.price,
+            Cart.quantity,
+            line_total.label("line_total"),
+            Product.image,
+            Product.image_file_id,
+            func.sum(line_total).over().label("grand_total"),
+        )
+        .join(Product, Product.id == Cart.product_id)
+        .where(Cart.user_salon_id == user_salon_id)
+        .order_by(Cart.id)
+    )
+
+
+async def orm_get_cart_summary(session: AsyncSession, user_salon_id: int) -> CartSummary:
+    """Корзина для экранов «только чтение»: плоские строки без ORM-объектов."""
+    rows = (await session.execute(cart_lines_select(user_salon_id))).all()
+    if not rows:
+        return CartSummary(lines=(), total=Decimal(0))
+    lines = tuple(CartLine.from_row(row) for row in rows)
+    return CartSummary(lines=lines, total=Decimal(rows[0].grand_total))
+
+
 async def orm_delete_from_cart(session: AsyncSession, user_salon_id: int, product_id: int):
     query = delete(Cart).where(
         Cart.user_salon_id == user_salon_id, Cart.product_id == product_id
@@ -380,23 +662,29 @@ async def orm_delete_from_cart(session: AsyncSession, user_salon_id: int, produc
 
 async def orm_reduce_product_in_cart(
     session: AsyncSession, user_salon_id: int, product_id: int
-):
-    query = select(Cart).where(
-        Cart.user_salon_id == user_salon_id, Cart.product_id == product_id
-    ).options(joinedload(Cart.product))
-    cart = await session.execute(query)
-    cart = cart.scalar()
+) -> int | None:
+    """
+    −1 к позиции корзины; последняя штука удаляет строку.
 
-    if not cart:
-        return
-    if cart.quantity > 1:
-        cart.quantity -= 1
-        await session.commit()
-        return True
-    else:
-        await orm_delete_from_cart(session, user_salon_id, product_id)
-        await session.commit()
-        return False
+    Возвращает новое количество (``0`` — позиция удалена) или ``None``,
+    если её не было.
+    """
+    where = (Cart.user_salon_id == user_salon_id, Cart.product_id == product_id)
+    quantity = (
+        await session.execute(
+            update(Cart)
+            .where(*where, Cart.quantity > 1)
+            .values(quantity=Cart.quantity - 1)
+            .returning(Cart.quantity)
+        )
+    ).scalar()
+    if quantity is None:
+        removed = (
+            await session.execute(delete(Cart).where(*where, Cart.quantity <= 1).returning(Cart.id))
+        ).scalar()
+        quantity = 0 if removed is not None else None
+    await session.commit()
+    return quantity
 
 
 async def orm_clear_cart(session: AsyncSession, user_salon_id: int) -> None:
@@ -405,55 +693,8 @@ async def orm_clear_cart(session: AsyncSession, user_salon_id: int) -> None:
     await session.commit()
 
 
-async def orm_create_order(
-    session: AsyncSession,
-    user_salon_id: int,
-    name: str,
-    phone: str,
-    email: str | None,
-    address: str | None,
-    delivery_type: str,
-    payment_method: str,
-    comment: str | None,
-    cart_items: list,
-    status: str = "NEW",
-) -> "Order":
-    from database.models import Order, OrderItem
-
-    total = sum(item.product.price * item.quantity for item in cart_items)
-
-    order = Order(
-        user_salon_id=user_salon_id,
-        name=name,
-        phone=phone,
-        email=email,
-        address=address,
-        delivery_type=delivery_type,
-        payment_method=payment_method,
-        comment=comment,
-        status=status,
-        total=total,
-    )
-    session.add(order)
-    await session.flush()
-
-    session.add_all(
-        [
-            OrderItem(
-                order_id=order.id,
-                product_id=item.product_id,
-                product_name=item.product.name,
-                quantity=item.quantity,
-                price=item.product.price,
-            )
-            for item in cart_items
-        ]
-    )
-    await session.commit()
-    await session.refresh(order)
-    return order
-
 async def orm_get_orders_count(session: AsyncSession, salon_id: int) -> int:
+    """Точный COUNT(*) заказов салона (для сверки со ``Salon.orders_count``)."""
     from database.models import Order, UserSalon
     return await session.scalar(
         select(func.count())
@@ -476,6 +717,67 @@ async def orm_get_orders(session: AsyncSession, salon_id: int):
     return result.scalars().all()
 
 
+class OrderListRow(NamedTuple):
+    id: int
+    created: datetime
+    status: str
+    total: Decimal
+
+
+class OrdersPage(NamedTuple):
+    items: list[OrderListRow]
+    has_newer: bool
+    has_older: bool
+
+
+async def orm_get_orders_page(
+    session: AsyncSession,
+    salon_id: int,
+    *,
+    status: str | None = None,
+    created_from: datetime | None = None,
+    created_to: datetime | None = None,
+    after: tuple[datetime, int] | None = None,
+    before: tuple[datetime, int] | None = None,
+    limit: int = 10,
+) -> OrdersPage:
+    """Страница заказов салона от новых к старым (keyset по ``(created, id)``).
+
+    ``after`` — курсор последней строки текущей страницы (листаем к старым),
+    ``before`` — курсор первой строки (листаем к новым). Фильтры по статусу и
+    дате выполняются в SQL, выбираются только id/created/status/total.
+    """
+    from database.models import Order
+
+    query = (
+        select(Order.id, Order.created, Order.status, Order.total)
+        .join(UserSalon, Order.user_salon_id == UserSalon.id)
+        .where(UserSalon.salon_id == salon_id)
+    )
+    if status:
+        query = query.where(Order.status == status)
+    if created_from is not None:
+        query = query.where(Order.created >= created_from)
+    if created_to is not None:
+        query = query.where(Order.created < created_to)
+
+    key = tuple_(Order.created, Order.id)
+    if before is not None:
+        query = query.where(key > tuple_(*before)).order_by(Order.created, Order.id)
+    else:
+        if after is not None:
+            query = query.where(key < tuple_(*after))
+        query = query.order_by(Order.created.desc(), Order.id.desc())
+
+    rows = [OrderListRow(*row) for row in (await session.execute(query.limit(limit + 1))).all()]
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if before is not None:
+        rows.reverse()
+        return OrdersPage(rows, has_newer=more, has_older=True)
+    return OrdersPage(rows, has_newer=after is not None, has_older=more)
+
+
 async def orm_get_order(session: AsyncSession, order_id: int, salon_id: int):
     from database.models import Order, OrderItem, Product, UserSalon
     result = await session.execute(
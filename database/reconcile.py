@@ -0,0 +1,78 @@
+"""Сверка денормализованного ``Salon.orders_count`` с реальным числом заказов.
+
+Запуск::
+
+    python -m database.reconcile            # исправить расхождения
+    python -m database.reconcile --dry-run  # только показать
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import Order, Salon, UserSalon
+
+logger = logging.getLogger(__name__)
+
+
+def _actual_count(salon_id_column):
+    return (
+        select(func.count())
+        .select_from(Order)
+        .join(UserSalon, Order.user_salon_id == UserSalon.id)
+        .where(UserSalon.salon_id == salon_id_column)
+        .scalar_subquery()
+    )
+
+
+async def reconcile_orders_count(
+    session: AsyncSession, fix: bool = True
+) -> dict[int, tuple[int, int]]:
+    """
+    Находит салоны, где счётчик разошёлся с ``COUNT(*)`` заказов, и (если
+    ``fix``) выставляет правильное значение.
+
+    :return: ``{salon_id: (stored, actual)}`` для салонов с расхождением.
+    """
+    actual = _actual_count(Salon.id)
+    rows = (
+        await session.execute(
+            select(Salon.id, Salon.orders_count, actual.label("actual")).where(
+                Salon.orders_count != actual
+            )
+        )
+    ).all()
+    mismatches = {row.id: (row.orders_count, row.actual) for row in rows}
+
+    if fix and mismatches:
+        await session.execute(
+            update(Salon)
+            .where(Salon.id.in_(mismatches))
+            .values(orders_count=_actual_count(Salon.id))
+        )
+        await session.commit()
+    return mismatches
+
+
+async def _main(fix: bool) -> None:
+    from database.engine import session_maker
+
+    async with session_maker() as session:
+        mismatches = await reconcile_orders_count(session, fix=fix)
+    for salon_id, (stored, actual) in sorted(mismatches.items()):
+        logger.info("salon %s: orders_count=%s, actual=%s", salon_id, stored, actual)
+    action = "fixed" if fix else "found"
+    logger.info("%s %d mismatched salon counters", action, len(mismatches))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="только показать расхождения")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s:%(name)s:%(message)s")
+    asyncio.run(_main(fix=not args.dry_run))
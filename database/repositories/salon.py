@@ -5,6 +5,7 @@ from __future__ import annotations
 from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from database.delivery_zones import invalidate_delivery_pricing
 from database.models import Salon
 
 
@@ -80,6 +81,7 @@ class SalonRepository:
             .values(latitude=latitude, longitude=longitude)
         )
         await self._session.commit()
+        invalidate_delivery_pricing()
 
     async def update_group_chat(self, salon_id: int, group_chat_id: int) -> None:
         """Сохраняет идентификатор группового чата салона."""
@@ -0,0 +1,65 @@
+"""Поиск салонов рядом с пользователем.
+
+Координаты берутся из общего снапшота салонов
+:data:`database.delivery_zones.delivery_pricing` — того же, по которому
+считается доставка: одна копия на процесс, один hook инвалидации
+(``SalonRepository.update_location``) и один TTL (``DELIVERY_PRICING_TTL``),
+так что поиск и тарификация не расходятся. Ближайший *доставляющий* салон
+ищет :func:`database.delivery_zones.nearest_delivering_salon`.
+
+Здесь же — последняя присланная пользователем геолокация
+(:func:`remember_location`): по ней ``/start`` сортирует салоны от
+ближайшего. Она хранится только в памяти процесса: при нескольких воркерах
+сортировка срабатывает, если геолокацию принял тот же воркер, иначе салоны
+показываются в прежнем порядке.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.delivery_zones import DeliveryPricingCache, delivery_pricing
+from utils.cache import TTLCache
+from utils.delivery import DeliveryPricing
+from utils.geo import haversine
+
+
+class SalonLocator:
+    def __init__(self, snapshots: DeliveryPricingCache) -> None:
+        self._snapshots = snapshots
+        self.queries = 0
+
+    async def _locations(self, session: AsyncSession) -> DeliveryPricing:
+        self.queries += 1
+        return await self._snapshots.get(session)
+
+    async def order_by_distance(
+        self, session: AsyncSession, lat: float, lon: float, salon_ids: Sequence[int]
+    ) -> list[int]:
+        """``salon_ids`` от ближайшего; салоны без координат — в конце, в прежнем порядке."""
+        snapshot = await self._locations(session)
+        distances = {}
+        for salon_id in salon_ids:
+            point = snapshot.location(salon_id)
+            if point is not None:
+                distances[salon_id] = haversine(lat, lon, *point)
+        return sorted(salon_ids, key=lambda i: (i not in distances, distances.get(i, 0.0)))
+
+    def stats(self) -> dict[str, Any]:
+        return {"queries": self.queries}
+
+
+salon_locator = SalonLocator(delivery_pricing)
+
+# последняя геолокация пользователя: Telegram user id -> (lat, lon); только этот процесс
+user_locations: TTLCache[int, tuple[float, float]] = TTLCache(maxsize=50_000, ttl=24 * 3600)
+
+
+def remember_location(user_id: int, lat: float, lon: float) -> None:
+    user_locations.set(user_id, (lat, lon))
+
+
+def last_location(user_id: int) -> tuple[float, float] | None:
+    return user_locations.get(user_id)
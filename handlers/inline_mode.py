@@ -13,52 +13,48 @@ from aiogram.types import (
 )
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from database.orm_query import (
-    orm_get_user_salons,
-    orm_get_products,
-    orm_get_categories,
-)
+from database.orm_query import orm_get_category_salon, orm_search_products
+from database.file_paths import file_paths
+from database.membership_cache import get_user_salon_ids
 from database.repositories import SalonRepository
 from utils.currency import get_currency_symbol
+from utils.images import THUMB_SIZE
 from utils.product_media import select_product_photo
 
 inline_router = Router()
 
-# ---------- Telegram-файлы: кэш превью ------------------------------------
-THUMB_CACHE: dict[str, str] = {}          # {file_id: ready_url}
-
-
-async def _tg_file_url(bot, file_id: str) -> str:
-    file = await bot.get_file(file_id)
-    return f"https://api.telegram.org/file/bot{bot.token}/{file.file_path}"
+# Результатов на одну порцию; следующая запрашивается через next_offset
+INLINE_PAGE_SIZE = 20
+# Ответ зависит от салонов пользователя (is_personal), поэтому Telegram
+# кэширует его для каждого пользователя отдельно — можно держать дольше
+INLINE_CACHE_TIME = 60
 
 
-async def _thumb(bot, file_id: str) -> str:
-    if file_id not in THUMB_CACHE:
-        THUMB_CACHE[file_id] = await _tg_file_url(bot, file_id)
-    return THUMB_CACHE[file_id]
+def _is_url(value: str) -> bool:
+    return value.startswith(("http://", "https://"))
 
 
 # ---------- Инлайн-ответ ---------------------------------------------------
 @inline_router.inline_query()
 async def answer_products_inline(inline_query: InlineQuery, session: AsyncSession) -> None:
-    user_id = inline_query.from_user.id
-    user_salons = await orm_get_user_salons(session, user_id)
-    repo = SalonRepository(session)
-
     q = inline_query.query.strip()
 
     # >>>>>>>>>>>>>>>>>>>>>>>>>>>>>
     # ВОТ ЗДЕСЬ — ПРОВЕРКА!
-    # Если строка запроса пуста — не показываем ничего.
+    # Если строка запроса пуста — не показываем ничего (и не трогаем БД).
     if not q:
         await inline_query.answer([], cache_time=1, is_personal=True)
         return
     # <<<<<<<<<<<<<<<<<<<<<<<<<<<<<
 
+    user_id = inline_query.from_user.id
+    salon_ids = await get_user_salon_ids(session, user_id)
+    repo = SalonRepository(session)
+
     salon_id: int | None = None
     category_id: int | None = None
 
+    search_words: list[str] = []
     for part in q.split():
         if part.startswith("salon_"):
             try:
@@ -70,61 +66,84 @@ async def answer_products_inline(inline_query: InlineQuery, session: AsyncSessio
                 category_id = int(part.split("_", 1)[1])
             except (ValueError, IndexError):
                 pass
-
-    # Если категория указана, а салон нет — определяем салон по категории (НЕ РЕКОМЕНДУЮТ!)
-    if salon_id is None and category_id is not None:
-        for us in user_salons:
-            categories = await orm_get_categories(session, us.salon_id)
-            allowed_category_ids = [c.id for c in categories]
-            if category_id in allowed_category_ids:
-                salon_id = us.salon_id
-                break
+        else:
+            search_words.append(part)
+    search_text = " ".join(search_words)
+    try:
+        offset = max(0, int(inline_query.offset or 0))
+    except ValueError:
+        offset = 0
+
+    # Салон категории одним запросом (и только среди салонов пользователя)
+    category_salon_id = (
+        await orm_get_category_salon(session, category_id, user_id)
+        if category_id is not None
+        else None
+    )
+    if salon_id is None:
+        salon_id = category_salon_id
 
     if salon_id is None:
-        if not user_salons:
+        if not salon_ids:
             await inline_query.answer([], cache_time=1, is_personal=True)
             return
-        salon_id = user_salons[0].salon_id
+        salon_id = salon_ids[0]
     else:
-        if not any(us.salon_id == salon_id for us in user_salons):
+        if salon_id not in salon_ids:
             await inline_query.answer([], cache_time=1, is_personal=True)
             return
 
-    if category_id is not None:
-        categories = await orm_get_categories(session, salon_id)
-        allowed_category_ids = [c.id for c in categories]
-        if category_id in allowed_category_ids:
-            products = await orm_get_products(session, category_id, salon_id)
-        else:
-            products = []
-    else:
-        products = await orm_get_products(session, salon_id=salon_id)
+    category_allowed = category_id is None or category_salon_id == salon_id
+
+    products = []
+    if category_allowed:
+        # на одну строку больше — чтобы понять, есть ли следующая порция
+        products = await orm_search_products(
+            session,
+            salon_id,
+            search_text,
+            category_id=category_id,
+            limit=INLINE_PAGE_SIZE + 1,
+            offset=offset,
+        )
+    has_more = len(products) > INLINE_PAGE_SIZE
+    products = products[:INLINE_PAGE_SIZE]
 
     salon = await repo.get_by_id(salon_id)
     currency = get_currency_symbol(salon.currency) if salon else "RUB"
 
-    results = []
-    for prod in products[:50]:
+    # Превью: своё (thumbnail) или URL картинки; для file_id нужен getFile —
+    # их разрешаем одной параллельной пачкой через кэш file_path
+    photos = {}
+    for prod in products:
         preferred_photo = select_product_photo(prod.image_file_id, prod.image)
-        if preferred_photo and str(preferred_photo).startswith(("http://", "https://")):
-            thumb_url = preferred_photo
+        if prod.thumbnail:
+            # лёгкое превью из хранилища — без get_file и полноразмерного фото
+            photos[prod.id] = prod.thumbnail
         elif preferred_photo:
-            thumb_url = await _thumb(inline_query.bot, preferred_photo)
-        else:
-            thumb_url = None
+            photos[prod.id] = str(preferred_photo)
+    file_ids = [photo for photo in photos.values() if not _is_url(photo)]
+    resolved = await file_paths.resolve_many(inline_query.bot, file_ids) if file_ids else {}
+
+    results = []
+    for prod in products:
+        photo = photos.get(prod.id)
+        thumb_url = photo if photo and _is_url(photo) else resolved.get(photo)
         results.append(
             InlineQueryResultArticle(
                 id=str(prod.id),
                 title=prod.name,
                 description=f"{float(prod.price):.2f}{currency}",
                 thumbnail_url=thumb_url,
+                thumbnail_width=THUMB_SIZE if prod.thumbnail else None,
+                thumbnail_height=THUMB_SIZE if prod.thumbnail else None,
                 input_message_content=InputTextMessageContent(
                     message_text=f"/product_{prod.id}",
                 ),
             )
         )
 
-    if not results:
+    if not results and offset == 0:
         results.append(
             InlineQueryResultArticle(
                 id="no_products",
@@ -136,4 +155,9 @@ async def answer_products_inline(inline_query: InlineQuery, session: AsyncSessio
             )
         )
 
-    await inline_query.answer(results, cache_time=1, is_personal=True)
\ No newline at end of file
+    await inline_query.answer(
+        results,
+        cache_time=INLINE_CACHE_TIME,
+        is_personal=True,
+        next_offset=str(offset + INLINE_PAGE_SIZE) if has_more else "",
+    )
\ No newline at end of file
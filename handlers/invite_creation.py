@@ -18,6 +18,7 @@ from aiogram.types import (
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 from sqlalchemy.ext.asyncio import AsyncSession
+from database.locale_cache import invalidate_locale
 from database.models import User
 
 from database.orm_query import (
@@ -171,6 +172,7 @@ async def invite_set_language(
     else:
         session.add(User(user_id=user_id, language=lang))
     await session.commit()
+    invalidate_locale(user_id)
 
     # Удаляем сообщение с выбором языка
     await callback.message.delete()
@@ -3,21 +3,17 @@ from math import ceil
 from typing import Optional, Sequence
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 
 from aiogram.types import InputMediaPhoto, FSInputFile
 
+from database.catalog_cache import catalog_cache
+from database.locale_cache import get_user_locale
 from database.orm_query import (
     orm_add_to_cart,
     orm_delete_from_cart,
-    orm_get_banner,
-    orm_get_category,
-    orm_get_categories,
-    orm_get_products,
-    orm_get_user_carts,
+    orm_get_cart_summary,
     orm_reduce_product_in_cart,
 )
-from database.repositories import SalonRepository
 from kbds.inline import (
     get_product_detail_btns,
     get_product_list_btns,
@@ -27,10 +23,14 @@ from kbds.inline import (
 )
 from utils.paginator import Paginator
 from utils.currency import get_currency_symbol
-from database.models import UserSalon, User
+from database.models import UserSalon
 from utils.i18n import _, i18n  # ✅ gettext + i18n
 from common.texts_for_db import get_default_banner_description
 from utils.product_media import select_product_photo
+from utils.cache import TTLCache
+
+# user_salon_id -> (salon_id, user_id): связь не меняется, поэтому кэшируем без TTL
+_USER_SALON_CACHE: TTLCache[int, tuple[int, int]] = TTLCache(maxsize=10_000)
 
 
 def get_image_banner(
@@ -75,19 +75,46 @@ async def _ensure_locale_from_user_salon(session: AsyncSession, user_salon_id: O
     """
     if not user_salon_id:
         return
-    lang = await session.scalar(
-        select(User.language)
-        .join(UserSalon, User.user_id == UserSalon.user_id)
-        .where(UserSalon.id == user_salon_id)
-    )
-    if lang:
-        # нормализация en-US -> en
-        base = lang.split("-")[0].lower()
-        i18n.ctx_locale.set(base)
+    link = await _resolve_user_salon(session, user_salon_id)
+    if link is None:
+        return
+    locale = await get_user_locale(session, link[1])
+    if locale:
+        i18n.ctx_locale.set(locale)
+
+
+async def _resolve_user_salon(session: AsyncSession, user_salon_id: int) -> tuple[int, int] | None:
+    """Возвращает (salon_id, user_id) для user_salon_id, обращаясь к БД только один раз."""
+    link = _USER_SALON_CACHE.get(user_salon_id)
+    if link is None:
+        user_salon = await session.get(UserSalon, user_salon_id)
+        if not user_salon:
+            return None
+        link = (user_salon.salon_id, user_salon.user_id)
+        _USER_SALON_CACHE.set(user_salon_id, link)
+    return link
+
+
+async def _resolve_salon_id(session: AsyncSession, user_salon_id: int) -> int | None:
+    """Возвращает salon_id для user_salon_id, обращаясь к БД только один раз."""
+    link = await _resolve_user_salon(session, user_salon_id)
+    return link[0] if link else None
+
+
+def _catalog_key(snapshot) -> tuple[int, int, float]:
+    """
+    Ключ кэша клавиатур для данных каталога: свой у каждой загрузки снапшота.
+
+    Версия растёт только при invalidate в этом процессе, а после истечения
+    TTL снапшот перечитывается с той же версией — поэтому в ключе ещё и
+    момент загрузки.
+    """
+    return snapshot.salon_id, snapshot.version, snapshot.loaded_at
 
 
 async def main_menu(session: AsyncSession, level: int, menu_name: str, salon_id: int):
-    banner = await orm_get_banner(session, menu_name, salon_id)
+    snapshot = await catalog_cache.get(session, salon_id)
+    banner = snapshot.banner(menu_name)
     description = resolve_banner_description(banner, menu_name)
     image = get_image_banner(banner.image if banner else None, description)
     kbds = get_user_main_btns(level=level)
@@ -95,11 +122,13 @@ async def main_menu(session: AsyncSession, level: int, menu_name: str, salon_id:
 
 
 async def catalog(session: AsyncSession, level: int, menu_name: str, salon_id: int):
-    banner = await orm_get_banner(session, menu_name, salon_id)
+    snapshot = await catalog_cache.get(session, salon_id)
+    banner = snapshot.banner(menu_name)
     description = resolve_banner_description(banner, menu_name)
     image = get_image_banner(banner.image if banner else None, description)
-    categories = await orm_get_categories(session, salon_id)
-    kbds = get_user_catalog_btns(level=level, categories=categories)
+    kbds = get_user_catalog_btns(
+        level=level, categories=snapshot.categories, catalog_key=_catalog_key(snapshot)
+    )
     return image, kbds
 
 
@@ -197,27 +226,31 @@ async def products(
     product_id: Optional[int],
     salon_id: int,
 ):
-    repo = SalonRepository(session)
     try:
-        items = await orm_get_products(session, category_id=category, salon_id=salon_id)
-        category_obj = await orm_get_category(session, category, salon_id)
+        snapshot = await catalog_cache.get(session, salon_id)
+        category_obj = snapshot.category(category)
         category_name = category_obj.name if category_obj else _("Категория")
-        salon = await repo.get_by_id(salon_id)
-        currency = get_currency_symbol(salon.currency) if salon else get_currency_symbol("RUB")
+        currency = get_currency_symbol(snapshot.currency)
 
-        if menu_name == "product_detail" and items:
+        if menu_name == "product_detail":
+            # Позицию товара считает БД (row_number), а не линейный поиск по категории
             if product_id is not None:
-                for idx, item in enumerate(items, start=1):
-                    if item.id == product_id:
-                        page = idx
-                        break
-            total_items = len(items)
-            page = max(1, min(page, total_items))
-            detail_paginator = Paginator(items, page=page, per_page=1)
-            page_items = detail_paginator.get_page()
-            product = page_items[0]
-
-            list_page = ceil(page / PRODUCTS_PER_PAGE) if total_items else 1
+                position = await catalog_cache.get_product_position(
+                    session, salon_id, category, product_id
+                )
+                if position:
+                    page = position
+            detail_page = await catalog_cache.get_products_page(
+                session, salon_id, category, page=max(1, page), per_page=1
+            )
+
+        if menu_name == "product_detail" and detail_page.items:
+            detail_paginator = Paginator(
+                detail_page.items, page=detail_page.page, per_page=1, total=detail_page.total
+            )
+            product = detail_paginator.get_page()[0]
+
+            list_page = ceil(detail_paginator.page / PRODUCTS_PER_PAGE)
 
             image = get_image_banner(
                 select_product_photo(product.image_file_id, product.image),
@@ -242,12 +275,16 @@ async def products(
                 product_id=product.id,
                 list_page=list_page,
                 category_menu_name=category_name,
+                catalog_key=_catalog_key(snapshot),
             )
             return image, kbds
 
-        list_paginator = Paginator(items, page=page, per_page=PRODUCTS_PER_PAGE)
-        page = max(1, min(page, max(list_paginator.pages, 1)))
-        list_paginator.page = page
+        list_page = await catalog_cache.get_products_page(
+            session, salon_id, category, page=max(1, page), per_page=PRODUCTS_PER_PAGE
+        )
+        list_paginator = Paginator(
+            list_page.items, page=list_page.page, per_page=PRODUCTS_PER_PAGE, total=list_page.total
+        )
         page_items = list_paginator.get_page()
 
         if not page_items:
@@ -256,11 +293,12 @@ async def products(
                     None,
                     _("В этой категории пока нет товаров. Попробуйте позже или выберите другую категорию."),
                 ),
-                get_user_catalog_btns(level=1, categories=await orm_get_categories(session, salon_id)),
+                get_user_catalog_btns(
+                    level=1, categories=snapshot.categories, catalog_key=_catalog_key(snapshot)
+                ),
             )
 
         start_index = (list_paginator.page - 1) * list_paginator.per_page + 1
-        banner = await orm_get_banner(session, category_name, salon_id)
         # Только заголовок категории без списка товаров
         # 🚫 Всегда без фото
         # Только заголовок категории без списка товаров и без фото
@@ -292,6 +330,7 @@ async def products(
             products=page_items,
             category_menu_name="product_list",
             start_index=start_index,
+            catalog_key=_catalog_key(snapshot),
         )
         return image, kbds
 
@@ -316,24 +355,24 @@ async def carts(
     product_id: Optional[int],
     salon_id: int,
 ):
-    repo = SalonRepository(session)
     # Мутации корзины
     if menu_name == "delete" and product_id is not None:
         await orm_delete_from_cart(session, user_salon_id, product_id)
         if page > 1:
             page -= 1
     elif menu_name == "decrement" and product_id is not None:
-        is_cart = await orm_reduce_product_in_cart(session, user_salon_id, product_id)
-        if page > 1 and not is_cart:
+        quantity = await orm_reduce_product_in_cart(session, user_salon_id, product_id)
+        if page > 1 and not quantity:
             page -= 1
     elif menu_name == "increment" and product_id is not None:
         await orm_add_to_cart(session, user_salon_id, product_id)
 
-    carts_list = await orm_get_user_carts(session, user_salon_id)
+    cart_summary = await orm_get_cart_summary(session, user_salon_id)
+    snapshot = await catalog_cache.get(session, salon_id)
 
-    if not carts_list:
+    if not cart_summary:
         # Пустая корзина — баннер "cart" + кнопки без пагинации
-        banner = await orm_get_banner(session, "cart", salon_id)
+        banner = snapshot.banner("cart")
         desc = resolve_banner_description(banner, "cart")
         image = get_image_banner(
             banner.image if banner else None,
@@ -343,23 +382,22 @@ async def carts(
         return image, kbds
 
     # Есть позиции в корзине
-    paginator = Paginator(carts_list, page=page)
+    paginator = Paginator(cart_summary.lines, page=page)
     page_items = paginator.get_page()
-    cart = page_items[0]
+    line = page_items[0]
 
-    salon = await repo.get_by_id(salon_id)
-    currency = get_currency_symbol(salon.currency) if salon else get_currency_symbol("RUB")
+    currency = get_currency_symbol(snapshot.currency)
 
-    cart_price = round(cart.quantity * cart.product.price, 2)
-    total_price = round(sum(c.quantity * c.product.price for c in carts_list), 2)
+    cart_price = round(line.line_total, 2)
+    total_price = round(cart_summary.total, 2)
 
     image = get_image_banner(
-        select_product_photo(cart.product.image_file_id, cart.product.image),
+        select_product_photo(line.image_file_id, line.image),
         _("<strong>{name}</strong>\n{price}{currency} x {qty} = {sum}{currency}\n").format(
-            name=cart.product.name,
-            price=round(cart.product.price, 2),
+            name=line.name,
+            price=round(line.price, 2),
             currency=currency,
-            qty=cart.quantity,
+            qty=line.quantity,
             sum=cart_price,
         ),
         _("Товар {page} из {pages} в корзине.\nОбщая стоимость: {total}{currency}").format(
@@ -372,7 +410,7 @@ async def carts(
         level=level,
         page=page,
         pagination_btns=pagination_btns,
-        product_id=cart.product.id,
+        product_id=line.product_id,
     )
     return image, kbds
 
@@ -394,10 +432,8 @@ async def get_menu_content(
     # ✅ Приоритет: user_salon_id → salon_id
     if not salon_id:
         if user_salon_id:
-            user_salon = await session.get(UserSalon, user_salon_id)
-            if user_salon:
-                salon_id = user_salon.salon_id
-            else:
+            salon_id = await _resolve_salon_id(session, user_salon_id)
+            if not salon_id:
                 raise ValueError("UserSalon not found for given user_salon_id")
         else:
             raise ValueError("salon_id or user_salon_id is required")
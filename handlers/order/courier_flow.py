@@ -5,10 +5,13 @@ from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from database.delivery_zones import nearest_delivering_salon, quote_delivery
+from database.membership_cache import get_user_salon_ids
 from database.models import UserSalon
+from database.salon_locator import remember_location
 from database.orm_query import orm_get_user
 from database.repositories import SalonRepository
-from utils.geo import calc_delivery_cost, get_address_from_coords, haversine
+from utils.geo import get_address_from_coords
 from utils.i18n import _
 from utils.orders import get_order_summary
 
@@ -18,6 +21,10 @@ from .states import OrderStates
 
 router = Router(name="order-courier")
 
+# Другой салон клиента без зон доставки («доставляет куда угодно») предлагаем,
+# только если он не дальше этого; салоны с зонами — если точка в их зоне
+NEARBY_SALON_KM = 30
+
 
 @router.callback_query(OrderStates.choosing_delivery, F.data == "delivery_courier")
 async def choose_delivery_courier(
@@ -77,11 +84,42 @@ async def receive_location(message: types.Message, state: FSMContext, session: A
         await message.answer(_("Ошибка: координаты салона не заданы."))
         return
 
-    distance_km = haversine(float(salon.latitude), float(salon.longitude), user_lat, user_lon)
-    delivery_cost = calc_delivery_cost(distance_km)
+    remember_location(message.from_user.id, user_lat, user_lon)
+    quote = await quote_delivery(
+        session,
+        salon.id,
+        user_lat,
+        user_lon,
+        salon_location=(float(salon.latitude), float(salon.longitude)),
+    )
+    if quote is None:
+        # точка вне зон салона — подскажем ближайший из других салонов клиента
+        other_ids = [
+            salon_id
+            for salon_id in await get_user_salon_ids(session, message.from_user.id)
+            if salon_id != salon.id
+        ]
+        nearest = (
+            await nearest_delivering_salon(
+                session, user_lat, user_lon, other_ids, max_km=NEARBY_SALON_KM
+            )
+            if other_ids
+            else None
+        )
+        if nearest:
+            await message.answer(
+                _("Салон не доставляет по этому адресу. Сюда доставляет салон «{name}».").format(
+                    name=await repo.get_name_by_id(nearest.salon_id)
+                )
+            )
+        else:
+            await message.answer(_("К сожалению, салон не доставляет по этому адресу."))
+        return
+
+    distance_km, delivery_cost = quote.distance_km, quote.cost
 
     address_str = (
-        get_address_from_coords(user_lat, user_lon)
+        await get_address_from_coords(user_lat, user_lon)
         or _("Геолокация ({lat:.5f}, {lon:.5f})").format(lat=user_lat, lon=user_lon)
     )
 
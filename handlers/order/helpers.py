@@ -5,16 +5,8 @@ from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from database.models import UserSalon
-from database.orm_query import (
-    orm_clear_cart,
-    orm_create_order,
-    orm_get_orders_count,
-    orm_get_user,
-    orm_get_user_carts,
-    orm_get_user_salons,
-)
-from database.repositories import SalonRepository
+from database.checkout import EmptyCartError, OrderLimitReached, place_order
+from database.orm_query import orm_get_user_salons
 from handlers.menu_processing import get_menu_content
 from utils.i18n import _
 from utils.notifications import notify_salon_about_order
@@ -144,68 +136,54 @@ async def enter_phone(message: types.Message, state: FSMContext, session: AsyncS
 async def confirm_order(callback: CallbackQuery, state: FSMContext, session: AsyncSession) -> None:
     """Финализирует заказ и очищает корзину пользователя."""
 
-    repo = SalonRepository(session)
     data = await state.get_data()
     user_salon_id = data.get("user_salon_id")
 
-    cart_items = await orm_get_user_carts(session, user_salon_id) if user_salon_id else []
-
-    if user_salon_id and cart_items:
-        user_salon = await session.get(UserSalon, user_salon_id)
-        salon = await repo.get_by_id(user_salon.salon_id) if user_salon else None
-        if salon and salon.free_plan:
-            orders_count = await orm_get_orders_count(session, salon.id)
-            if orders_count >= salon.order_limit:
-                await callback.message.answer(
-                    _(
-                        "Вы достигли лимита бесплатного тарифа ({limit} заказов). Чтобы продолжить приём заказов, продлите подписку."
-                    ).format(limit=salon.order_limit)
-                )
-                await state.clear()
-                return
-
-        name = " ".join(
-            filter(
-                None,
-                [user_salon.first_name if user_salon else None, user_salon.last_name if user_salon else None],
-            )
-        ) or callback.from_user.full_name or ""
-
-        delivery_type = data.get("delivery") or ""
-        payment_method = data.get("payment_method")
+    delivery_type = data.get("delivery") or ""
+    payment_method = data.get("payment_method")
 
-        if not payment_method:
-            if delivery_type == "delivery_pickup":
-                payment_method = "pickup"  # самовывоз = оплата в салоне
-            elif delivery_type == "delivery_courier":
-                payment_method = "cash"  # курьер = наличные
+    if not payment_method:
+        if delivery_type == "delivery_pickup":
+            payment_method = "pickup"  # самовывоз = оплата в салоне
+        elif delivery_type == "delivery_courier":
+            payment_method = "cash"  # курьер = наличные
 
-        email = data.get("email") or ""
-        comment = data.get("comment") or ""
-
-        await orm_create_order(
+    try:
+        if not user_salon_id:
+            raise EmptyCartError("user_salon_id missing in FSM state")
+        # заказ, позиции, лимит тарифа и очистка корзины — одной транзакцией
+        order = await place_order(
             session,
-            user_salon_id=user_salon_id,
-            name=name,
+            user_salon_id,
+            fallback_name=callback.from_user.full_name or "",
             address=data.get("address"),
             phone=data.get("phone"),
-            email=email,
+            email=data.get("email") or "",
             delivery_type=delivery_type,
             payment_method=payment_method,
-            comment=comment,
-            cart_items=cart_items,
+            comment=data.get("comment") or "",
+        )
+    except OrderLimitReached as exc:
+        await callback.message.answer(
+            _(
+                "Вы достигли лимита бесплатного тарифа ({limit} заказов). Чтобы продолжить приём заказов, продлите подписку."
+            ).format(limit=exc.limit)
         )
-        await notify_salon_about_order(callback, state, session, user_salon_id)
-        await orm_clear_cart(session, user_salon_id)
-        try:
-            await callback.message.edit_reply_markup(reply_markup=None)
-        except Exception:
-            pass
-        await callback.message.answer(_("Спасибо! Ваш заказ принят 👍"))
         await state.clear()
-    else:
+        return
+    except EmptyCartError:
         await callback.message.answer(_("Ваша корзина пуста или не выбран салон. Заказ не оформлен."))
         await state.clear()
+        await callback.answer()
+        return
+
+    await notify_salon_about_order(callback, state, session, user_salon_id, order=order)
+    try:
+        await callback.message.edit_reply_markup(reply_markup=None)
+    except Exception:
+        pass
+    await callback.message.answer(_("Спасибо! Ваш заказ принят 👍"))
+    await state.clear()
 
     await callback.answer()
 
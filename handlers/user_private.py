@@ -9,17 +9,19 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from utils.i18n import _, i18n  # ✅ единый i18n и gettext
 from common.bot_cmds_list import set_commands
+from database.locale_cache import get_user_locale, invalidate_locale
 from database.models import User, UserSalon
 from database.orm_query import (
     orm_add_to_cart,
     orm_add_user,
     orm_get_user_salons,
     orm_get_product,
-    orm_get_products,
+    orm_get_product_position,
     orm_get_user,
     orm_set_user_language,
 )
 from database.repositories import SalonRepository
+from database.salon_locator import last_location, salon_locator
 
 from filters.chat_types import ChatTypeFilter
 from handlers.invite_creation import InviteFilter
@@ -79,9 +81,7 @@ async def cmd_language(message: types.Message, session: AsyncSession):
     чтобы кнопки и текст сразу были на нужном языке.
     """
     # 1) подтянем язык пользователя из БД
-    lang = await session.scalar(
-        select(User.language).where(User.user_id == message.from_user.id)
-    )
+    lang = await get_user_locale(session, message.from_user.id)
     if lang:
         # 2) выставим локаль на этот апдейт
         i18n.ctx_locale.set(lang)
@@ -130,6 +130,7 @@ async def start_cmd(message: types.Message, state: FSMContext, session: AsyncSes
         )
         session.add(user)
         await session.commit()
+        invalidate_locale(user_id)
 
     # подтянем запись с правами/языком
     user_record = await orm_get_user(session, user_id)
@@ -211,10 +212,16 @@ async def start_cmd(message: types.Message, state: FSMContext, session: AsyncSes
         await message.answer_photo(media.media, caption=media.caption, reply_markup=reply_markup)
         return
 
-    # >1 салонов — даём пользователю выбрать среди своих
+    # >1 салонов — даём пользователю выбрать среди своих, ближайшие сверху
+    salons = [us.salon for us in user_salons]
+    location = last_location(user_id)
+    if location:
+        by_id = {s.id: s for s in salons}
+        ordered = await salon_locator.order_by_distance(session, *location, list(by_id))
+        salons = [by_id[salon_id] for salon_id in ordered]
     await message.answer(
         _("Выберите салон:"),
-        reply_markup=get_salon_btns([us.salon for us in user_salons]),
+        reply_markup=get_salon_btns(salons),
     )
 
 
@@ -230,11 +237,14 @@ async def add_to_cart(
         await callback.answer(_("Салон не выбран."))
         return
 
-    await orm_add_to_cart(
+    quantity = await orm_add_to_cart(
         session,
         user_salon_id=user_salon_id,
         product_id=callback_data.product_id,
     )
+    if quantity is None:
+        await callback.answer(_("Товар не найден!"))
+        return
     await callback.answer(_("Товар добавлен в корзину."))
 
 
@@ -344,17 +354,13 @@ async def show_product(message: Message, session: AsyncSession, state: FSMContex
             await message.answer(_("Товар не найден!"))
             return
 
-        products_in_cat = await orm_get_products(
-            session, category_id=product.category_id, salon_id=salon_id
+        page = await orm_get_product_position(
+            session, product_id, salon_id, category_id=product.category_id
         )
-        product_ids = [p.id for p in products_in_cat]
-        if product_id not in product_ids:
+        if not page:
             await message.answer(_("Товар не найден в этой категории!"))
             return
 
-        idx = product_ids.index(product_id)
-        page = idx + 1
-
         image, kbds = await products(
             session,
             level=2,
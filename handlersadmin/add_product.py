@@ -9,7 +9,7 @@ from aiogram.types import (
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.fsm.context import FSMContext
 from sqlalchemy.ext.asyncio import AsyncSession
-from utils.supabase_storage import upload_photo_from_telegram
+from utils.supabase_storage import upload_product_photo
 from database.orm_query import orm_add_product, orm_get_categories
 from database.repositories import SalonRepository
 from utils.currency import get_currency_symbol
@@ -139,9 +139,12 @@ async def invalid_price(message: Message) -> None:
 
 @add_product_router.message(AddProductFSM.photo, F.photo)
 async def process_photo(message: Message, state: FSMContext, session: AsyncSession) -> None:
-    photo_id = message.photo[-1].file_id
-    photo_url = await upload_photo_from_telegram(message.bot, photo_id)
-    await state.update_data(image_file_id=photo_id, image=photo_url)
+    photo = message.photo[-1]
+    photo_id = photo.file_id
+    photo_url, thumbnail_url = await upload_product_photo(
+        message.bot, photo_id, file_unique_id=photo.file_unique_id
+    )
+    await state.update_data(image_file_id=photo_id, image=photo_url, thumbnail=thumbnail_url)
     data = await state.get_data()
 
     prepared_description, details_url = await prepare_description_with_details(
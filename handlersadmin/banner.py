@@ -84,9 +84,12 @@ from utils.supabase_storage import upload_photo_from_telegram
 
 @banner_router.message(BannerFSM.photo, F.photo)
 async def process_photo(message: Message, state: FSMContext, session: AsyncSession) -> None:
-    photo_id = message.photo[-1].file_id
+    photo = message.photo[-1]
+    photo_id = photo.file_id
     # 1. Скачай и загрузи фото в Supabase, получи public_url
-    photo_url = await upload_photo_from_telegram(message.bot, photo_id)
+    photo_url = await upload_photo_from_telegram(
+        message.bot, photo_id, file_unique_id=photo.file_unique_id
+    )
     # 2. Сохрани ссылку в БД
     data = await state.get_data()
     salon_id = data.get("salon_id")
@@ -7,11 +7,23 @@ from aiogram.types import (
 )
 from aiogram.fsm.context import FSMContext
 from aiogram.filters import Command
+from aiogram.filters.callback_data import CallbackData
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+from datetime import datetime, timedelta, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
-from database.orm_query import orm_get_orders, orm_get_order, orm_update_order_status, orm_get_user_salons
+from database.orm_query import (
+    OrdersPage,
+    orm_get_order,
+    orm_get_orders_page,
+    orm_get_user_salons,
+    orm_update_order_status,
+)
+from database.repositories import SalonRepository
 from utils.currency import get_currency_symbol
 from utils.timezone import to_timezone
-from aiogram.exceptions import TelegramForbiddenError, TelegramBadRequest
+from utils.send_queue import Priority, send_queue
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import SendMessage
 from filters.chat_types import ChatTypeFilter, IsAdmin
 
 orders_router = Router()
@@ -61,15 +73,9 @@ async def notify_customer_status_change(bot, order, new_status: str):
 
     text = build_customer_message(order, new_status)
 
-    try:
-        # просто сообщение, без inline-кнопок
-        await bot.send_message(chat_id=chat_id, text=text)
-    except TelegramForbiddenError:
-        # пользователь заблокировал бота
-        pass
-    except TelegramBadRequest:
-        # например, неверный chat_id и т.п.
-        pass
+    # просто сообщение, без inline-кнопок; блокировку бота и неверный chat_id
+    # очередь логирует и считает в failed
+    send_queue.enqueue(bot, SendMessage(chat_id=chat_id, text=text), priority=Priority.CUSTOMER)
 
 
 # Русские названия статусов
@@ -115,27 +121,124 @@ def order_action_kb(order_id: int, status: str) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=[buttons])
 
 
-def orders_kb(orders):
-    buttons = []
-    for o in orders:
-        salon_rel = getattr(o, "user_salon", None)
-        salon_obj = getattr(salon_rel, "salon", None)
-        local_dt = to_timezone(o.created, getattr(salon_obj, "timezone", None))
-        time = local_dt.strftime("%H:%M")
-        currency_code = getattr(salon_obj, "currency", "RUB")
-        currency = get_currency_symbol(currency_code)
+ORDERS_PER_PAGE = 10
+
+STATUS_FILTERS = {
+    "all": "Все",
+    "NEW": "Новые",
+    "IN_PROGRESS": "В работе",
+    "DONE": "Готовые",
+    "CANCELLED": "Отменённые",
+}
+
+PERIOD_FILTERS = {
+    "all": "Всё время",
+    "today": "Сегодня",
+    "week": "7 дней",
+    "month": "30 дней",
+}
+
+
+class OrdersPageCallBack(CallbackData, prefix="aord"):
+    """Фильтры и keyset-курсор списка заказов (``ts`` — created в мкс UTC)."""
+
+    status: str = "all"
+    period: str = "all"
+    direction: str = ""  # "" — первая страница, "older" / "newer"
+    ts: int = 0
+    order_id: int = 0
+
+
+def _to_cursor_ts(dt: datetime) -> int:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp() * 1_000_000)
+
+
+def _from_cursor_ts(ts: int) -> datetime:
+    return datetime.fromtimestamp(ts / 1_000_000, tz=timezone.utc).replace(tzinfo=None)
+
+
+def _period_start(period: str, tz_name: str | None) -> datetime | None:
+    """Начало периода в наивном UTC (так хранится ``Order.created``)."""
+    now = datetime.now(timezone.utc)
+    if period == "today":
+        local_now = to_timezone(now, tz_name)
+        start = local_now.replace(hour=0, minute=0, second=0, microsecond=0)
+    elif period == "week":
+        start = now - timedelta(days=7)
+    elif period == "month":
+        start = now - timedelta(days=30)
+    else:
+        return None
+    return start.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def orders_kb(page: OrdersPage, filters: OrdersPageCallBack, salon=None) -> InlineKeyboardMarkup:
+    tz_name = getattr(salon, "timezone", None)
+    currency = get_currency_symbol(getattr(salon, "currency", None) or "RUB")
+    builder = InlineKeyboardBuilder()
+
+    # фильтры: статус и период (выбранный отмечен точкой)
+    builder.row(*[
+        InlineKeyboardButton(
+            text=("• " if code == filters.status else "") + label,
+            callback_data=OrdersPageCallBack(status=code, period=filters.period).pack(),
+        )
+        for code, label in STATUS_FILTERS.items()
+    ], width=3)
+    builder.row(*[
+        InlineKeyboardButton(
+            text=("• " if code == filters.period else "") + label,
+            callback_data=OrdersPageCallBack(status=filters.status, period=code).pack(),
+        )
+        for code, label in PERIOD_FILTERS.items()
+    ], width=4)
+
+    for o in page.items:
+        local_dt = to_timezone(o.created, tz_name)
         status_ru = STATUS_LABELS_RU.get(o.status, o.status)
-        buttons.append([
+        builder.row(
             InlineKeyboardButton(
-                text=f"#{o.id} • {time} • {status_ru} • {int(o.total)}{currency}",
-                callback_data=f"order_{o.id}"
+                text=f"#{o.id} • {local_dt:%d.%m %H:%M} • {status_ru} • {int(o.total)}{currency}",
+                callback_data=f"order_{o.id}",
             )
-        ])
-    buttons.append([InlineKeyboardButton(text="⬅️ В меню", callback_data="admin_menu")])
-    return InlineKeyboardMarkup(inline_keyboard=buttons)
-
+        )
 
-async def _show_orders(bot, chat_id: int, message_id: int, state: FSMContext, session: AsyncSession):
+    nav = []
+    if page.has_newer and page.items:
+        first = page.items[0]
+        nav.append(InlineKeyboardButton(
+            text="◀ Новее",
+            callback_data=OrdersPageCallBack(
+                status=filters.status, period=filters.period, direction="newer",
+                ts=_to_cursor_ts(first.created), order_id=first.id,
+            ).pack(),
+        ))
+    if page.has_older and page.items:
+        last = page.items[-1]
+        nav.append(InlineKeyboardButton(
+            text="Старее ▶",
+            callback_data=OrdersPageCallBack(
+                status=filters.status, period=filters.period, direction="older",
+                ts=_to_cursor_ts(last.created), order_id=last.id,
+            ).pack(),
+        ))
+    if nav:
+        builder.row(*nav)
+
+    builder.row(InlineKeyboardButton(text="⬅️ В меню", callback_data="admin_menu"))
+    return builder.as_markup()
+
+
+async def _show_orders(
+    bot,
+    chat_id: int,
+    message_id: int,
+    state: FSMContext,
+    session: AsyncSession,
+    filters: OrdersPageCallBack | None = None,
+):
     data = await state.get_data()
     salon_id = data.get("salon_id")
     if salon_id is None:
@@ -145,19 +248,34 @@ async def _show_orders(bot, chat_id: int, message_id: int, state: FSMContext, se
     await state.clear()
     await state.update_data(main_message_id=message_id, salon_id=salon_id)
 
-    orders = await orm_get_orders(session, salon_id)
+    filters = filters or OrdersPageCallBack()
+    salon = await SalonRepository(session).get_by_id(salon_id)
+    cursor = (_from_cursor_ts(filters.ts), filters.order_id) if filters.direction else None
+    page = await orm_get_orders_page(
+        session,
+        salon_id,
+        status=filters.status if filters.status in STATUS_LABELS_RU else None,
+        created_from=_period_start(filters.period, getattr(salon, "timezone", None)),
+        after=cursor if filters.direction == "older" else None,
+        before=cursor if filters.direction == "newer" else None,
+        limit=ORDERS_PER_PAGE,
+    )
+    text = "Список заказов:" if page.items else "Заказов не найдено."
+    markup = orders_kb(page, filters, salon)
     try:
         await bot.edit_message_text(
             chat_id=chat_id,
             message_id=message_id,
-            text="Список заказов:",
-            reply_markup=orders_kb(orders),
+            text=text,
+            reply_markup=markup,
         )
-    except TelegramBadRequest:
+    except TelegramBadRequest as e:
+        if "message is not modified" in str(e):
+            return
         msg = await bot.send_message(
             chat_id=chat_id,
-            text="Список заказов:",
-            reply_markup=orders_kb(orders),
+            text=text,
+            reply_markup=markup,
         )
         await state.update_data(main_message_id=msg.message_id, salon_id=salon_id)
 
@@ -170,6 +288,21 @@ async def show_orders(callback: CallbackQuery, state: FSMContext, session: Async
     await callback.answer()
 
 
+@orders_router.callback_query(OrdersPageCallBack.filter())
+async def orders_page(
+    callback: CallbackQuery,
+    callback_data: OrdersPageCallBack,
+    state: FSMContext,
+    session: AsyncSession,
+):
+    data = await state.get_data()
+    message_id = data.get("main_message_id") or callback.message.message_id
+    await _show_orders(
+        callback.bot, callback.message.chat.id, message_id, state, session, callback_data
+    )
+    await callback.answer()
+
+
 @orders_router.message(Command("orders"))
 async def orders_cmd(message: Message, state: FSMContext, session: AsyncSession):
     data = await state.get_data()
@@ -15,6 +15,7 @@ from database.orm_query import (
     orm_delete_product,
     orm_get_product,
     orm_change_product_field,
+    orm_image_in_use,
 )
 from database.repositories import SalonRepository
 from utils.currency import get_currency_symbol
@@ -173,8 +174,11 @@ async def delete_product(callback: CallbackQuery, state: FSMContext, session: As
 
     # Получаем продукт (для url картинки)
     product = await orm_get_product(session, product_id, salon_id)
-    if product and product.image:
-        filename = get_path_from_url(product.image)
+    images = (product.image, product.thumbnail) if product else ()
+    for image in filter(None, images):
+        if await orm_image_in_use(session, image, exclude_product_id=product.id):
+            continue
+        filename = get_path_from_url(image)
         try:
             await delete_photo_from_supabase(filename)
         except Exception as e:
@@ -1,13 +1,29 @@
-from typing import Sequence
+from typing import Callable, Hashable, Sequence
 
 from aiogram.filters.callback_data import CallbackData
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
-from utils.i18n import _
+from utils.cache import TTLCache
+from utils.i18n import _, i18n
 
+# Готовые клавиатуры меню покупателя: (локаль, вид, ...параметры) -> markup.
+# Типы aiogram неизменяемы (frozen), поэтому один объект можно отдавать во все
+# ответы. Клавиатуры, зависящие от каталога, кэшируются только с
+# ``catalog_key`` — идентификатором загрузки снапшота из catalog_cache: любая
+# перезагрузка (правка в этом процессе или истёкший CATALOG_CACHE_TTL после
+# правки в другом воркере) даёт новый ключ, а старые записи вытесняет LRU.
+keyboard_cache: TTLCache[tuple, InlineKeyboardMarkup] = TTLCache(maxsize=2048)
 
 
+def _cached(key: tuple[Hashable, ...], build: Callable[[], InlineKeyboardMarkup]) -> InlineKeyboardMarkup:
+    key = (i18n.current_locale, *key)
+    markup = keyboard_cache.get(key)
+    if markup is None:
+        markup = build()
+        keyboard_cache.set(key, markup)
+    return markup
+
 
 class MenuCallBack(CallbackData, prefix="menu"):
     level: int
@@ -22,6 +38,10 @@ class SalonCallBack(CallbackData, prefix="salon"):
 
 
 def get_user_main_btns(*, level: int, sizes: tuple[int] = (2,)):
+    return _cached(("main", level, sizes), lambda: _build_user_main_btns(level=level, sizes=sizes))
+
+
+def _build_user_main_btns(*, level: int, sizes: tuple[int] = (2,)):
     keyboard = InlineKeyboardBuilder()
     btns = {
         _("Товары 🛍️"): "catalog",
@@ -56,7 +76,22 @@ def get_salon_btns(salons):
     return keyboard.as_markup()
 
 
-def get_user_catalog_btns(*, level: int, categories: list, sizes: tuple[int] = (2,)):
+def get_user_catalog_btns(
+        *,
+        level: int,
+        categories: list,
+        sizes: tuple[int] = (2,),
+        catalog_key: Hashable | None = None,
+):
+    if catalog_key is None:
+        return _build_user_catalog_btns(level=level, categories=categories, sizes=sizes)
+    return _cached(
+        ("catalog", catalog_key, level, sizes),
+        lambda: _build_user_catalog_btns(level=level, categories=categories, sizes=sizes),
+    )
+
+
+def _build_user_catalog_btns(*, level: int, categories: list, sizes: tuple[int] = (2,)):
     keyboard = InlineKeyboardBuilder()
 
     keyboard.add(
@@ -94,9 +129,39 @@ def get_product_detail_btns(
         product_id: int,
         list_page: int,
         category_menu_name: str,
-        sizes: tuple[int, ...] = (2, 2)
+        sizes: tuple[int, ...] = (2, 2),
+        catalog_key: Hashable | None = None,
 ):
     """Кнопки для карточки товара с переходами и возвратом к списку."""
+    params = dict(
+        level=level,
+        category=category,
+        page=page,
+        pagination_btns=tuple(pagination_btns),
+        product_id=product_id,
+        list_page=list_page,
+        category_menu_name=category_menu_name,
+        sizes=sizes,
+    )
+    if catalog_key is None:
+        return _build_product_detail_btns(**params)
+    return _cached(
+        ("detail", catalog_key, *params.values()),
+        lambda: _build_product_detail_btns(**params),
+    )
+
+
+def _build_product_detail_btns(
+        *,
+        level: int,
+        category: int,
+        page: int,
+        pagination_btns: Sequence[tuple[str, str]],
+        product_id: int,
+        list_page: int,
+        category_menu_name: str,
+        sizes: tuple[int, ...] = (2, 2)
+):
 
     keyboard = InlineKeyboardBuilder()
 
@@ -174,8 +239,39 @@ def get_product_list_btns(
         products: list,
         category_menu_name: str,
         start_index: int,
+        catalog_key: Hashable | None = None,
+):
+    """Формирует клавиатуру для списка товаров с пагинацией.
+
+    Товары страницы определяются снапшотом каталога, категорией и ``page``,
+    поэтому в ключ кэша они не входят.
+    """
+    params = dict(
+        level=level,
+        category=category,
+        page=page,
+        pagination_btns=tuple(pagination_btns),
+        category_menu_name=category_menu_name,
+        start_index=start_index,
+    )
+    if catalog_key is None:
+        return _build_product_list_btns(products=products, **params)
+    return _cached(
+        ("list", catalog_key, *params.values()),
+        lambda: _build_product_list_btns(products=products, **params),
+    )
+
+
+def _build_product_list_btns(
+        *,
+        level: int,
+        category: int,
+        page: int,
+        pagination_btns: Sequence[tuple[str, str]],
+        products: list,
+        category_menu_name: str,
+        start_index: int,
 ):
-    """Формирует клавиатуру для списка товаров с пагинацией."""
 
     keyboard = InlineKeyboardBuilder()
 
@@ -241,6 +337,23 @@ def get_user_cart(
         pagination_btns: Sequence[tuple[str, str]] | None,
         product_id: int | None,
         sizes: tuple[int] = (3,)
+):
+    pagination_btns = tuple(pagination_btns or ())
+    return _cached(
+        ("cart", level, page, pagination_btns, product_id, sizes),
+        lambda: _build_user_cart(
+            level=level, page=page, pagination_btns=pagination_btns, product_id=product_id, sizes=sizes
+        ),
+    )
+
+
+def _build_user_cart(
+        *,
+        level: int,
+        page: int | None,
+        pagination_btns: Sequence[tuple[str, str]] | None,
+        product_id: int | None,
+        sizes: tuple[int] = (3,)
 ):
     keyboard = InlineKeyboardBuilder()
     if page:
@@ -13,6 +13,7 @@ logging.basicConfig(
     format="%(asctime)s %(levelname)s:%(name)s:%(message)s",
 )
 
+from aiohttp import web
 from aiogram import Bot, Dispatcher
 from aiogram.enums import ParseMode
 from aiogram.client.bot import DefaultBotProperties
@@ -21,7 +22,20 @@ from aiogram.types.error_event import ErrorEvent
 # 🟢 Middleware
 from middlewares.db import DataBaseSession
 from middlewares.user_locale import UserLocaleMiddleware
-from database.engine import session_maker
+from middlewares.media_registry import MediaRegistryMiddleware
+from database.engine import log_engine_settings, session_maker
+from database.fsm_storage import create_fsm_storage
+from database.locale_cache import locale_cache_stats
+from database.media_registry import media_registry
+from database.file_paths import file_paths
+from database.delivery_zones import delivery_pricing
+from database.salon_locator import salon_locator
+from utils.webhook import WebhookSettings, build_webhook_app
+from utils.geo import geocoder
+from utils.http import http_client
+from utils.images import shutdown_image_pool
+from utils.send_queue import send_queue
+from kbds.inline import keyboard_cache
 
 # 🟢 Роутеры
 from handlers.user_private import user_private_router
@@ -50,7 +64,8 @@ bot = Bot(
     default=DefaultBotProperties(parse_mode=ParseMode.HTML),
 )
 
-dp = Dispatcher()
+# FSM хранится в БД: переживает рестарт и общее для всех воркеров
+dp = Dispatcher(storage=create_fsm_storage())
 
 # ✅ Подключение роутеров
 dp.include_router(user_private_router)
@@ -69,10 +84,32 @@ dp.include_router(invite_creation_router)
 
 
 async def on_startup(bot: Bot):
+    log_engine_settings()
+    await http_client.start()
+    await send_queue.start()
+    loaded = await media_registry.start(session_maker)
+    logging.info("Media registry: %d file_ids loaded", loaded)
+    loaded = await file_paths.start(session_maker)
+    logging.info("Telegram file paths: %d loaded", loaded)
+    loaded = await delivery_pricing.start(session_maker)
+    logging.info("Salon coordinates: %d salons loaded", loaded)
     logging.info("✅ Бот запущен")
 
 
 async def on_shutdown(bot: Bot):
+    # сначала досылаем уведомления, пока сессия бота ещё открыта
+    await send_queue.stop()
+    logging.info("Send queue: %s", send_queue.stats())
+    logging.info("Locale cache: %s", locale_cache_stats())
+    logging.info("Geocoder: %s", geocoder.stats())
+    logging.info("HTTP client: %s", http_client.stats())
+    await http_client.close()
+    shutdown_image_pool()
+    logging.info("Media registry: %s", media_registry.stats())
+    logging.info("Telegram file paths: %s", file_paths.stats())
+    logging.info("Salon coordinates: %s, locator: %s", delivery_pricing.stats(), salon_locator.stats())
+    logging.info("Keyboard cache: %s", keyboard_cache.stats())
+    await media_registry.close()
     logging.info("❌ Бот остановлен")
 
 
@@ -81,25 +118,54 @@ async def on_error(event: ErrorEvent):
     logging.exception("Unhandled error: %s", event)
 
 
-async def main():
+def setup_dispatcher() -> DataBaseSession:
     dp.startup.register(on_startup)
     dp.shutdown.register(on_shutdown)
     dp.errors.register(on_error)
 
+    # file_id вместо повторной загрузки картинок во всех sendPhoto/editMessageMedia
+    bot.session.middleware(MediaRegistryMiddleware(media_registry))
+
     # 1) сначала БД — кладёт session в data
-    dp.update.middleware(DataBaseSession(session_pool=session_maker))
+    db_middleware = DataBaseSession(session_pool=session_maker)
+    dp.update.middleware(db_middleware)
 
     # 2) язык — навешиваем на message и callback_query (надёжнее, чем update)
     dp.message.middleware(UserLocaleMiddleware())
     dp.callback_query.middleware(UserLocaleMiddleware())
+    return db_middleware
+
+
+async def main():
+    db_middleware = setup_dispatcher()
+    await db_middleware.check_connection()
 
     await bot.delete_webhook(drop_pending_updates=True)
     await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
 
 
+def main_webhook():
+    """Режим вебхука: aiohttp-сервер, апдейты обрабатываются параллельно."""
+    settings = WebhookSettings.from_env()
+    logging.info("Webhook mode: %s", settings.describe())
+    db_middleware = setup_dispatcher()
+    app = build_webhook_app(dp, bot, settings, on_startup=db_middleware.check_connection)
+    web.run_app(
+        app,
+        host=settings.host,
+        port=settings.port,
+        shutdown_timeout=settings.drain_timeout,
+        print=None,
+    )
+
+
 if __name__ == "__main__":
+    mode = os.getenv("BOT_MODE", "polling").strip().lower()
     try:
-        asyncio.run(main())
+        if mode == "webhook":
+            main_webhook()
+        else:
+            asyncio.run(main())
     except Exception:
         logging.exception("Fatal error in main")
         raise
@@ -3,6 +3,7 @@ from typing import Any, Awaitable, Callable, Dict
 import logging
 from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy import text as sa_text
 
@@ -12,12 +13,15 @@ logger = logging.getLogger(__name__)
 class DataBaseSession(BaseMiddleware):
     """
     Создаёт AsyncSession на время обработки апдейта и кладёт его в data['session'].
-    Подключение к БД проверяется и логируется ОДИН РАЗ при первом апдейте.
+    AsyncSession берёт соединение из пула только на первом запросе, так что
+    апдейты без обращений к БД пул не трогают; после хендлера сессия
+    закрывается и соединение возвращается в пул.
     """
-    _checked = False  # класс-флаг одноразовой проверки
 
     def __init__(self, session_pool: async_sessionmaker):
         self.session_pool = session_pool
+        self.updates = 0
+        self.checkouts = 0
         # Аккуратно логируем URL движка без пароля, если можем его получить
         try:
             bind = getattr(session_pool, "kw", {}).get("bind")
@@ -25,29 +29,36 @@ class DataBaseSession(BaseMiddleware):
                 url = bind.url
                 # SQLAlchemy URL умеет скрывать пароль
                 logger.info("Engine URL: %s", url.render_as_string(hide_password=True))
+                event.listen(bind.sync_engine, "checkout", self._on_checkout)
         except Exception as e:
             logger.warning("inspect engine failed: %s", e)
 
+    def _on_checkout(self, dbapi_conn, record, proxy) -> None:
+        self.checkouts += 1
+
+    async def check_connection(self) -> None:
+        """Разовая проверка подключения к БД — вызывается при старте бота."""
+        try:
+            async with self.session_pool() as session:
+                res = await session.execute(sa_text(
+                    "select current_database(), inet_server_addr(), inet_server_port()"
+                ))
+                logger.info("DB connect ok: %s", res.fetchone())
+        except Exception as e:
+            # Не падаем, просто логируем проблему
+            logger.error("DB connect check failed: %s", e, exc_info=True)
+
+    def stats(self) -> dict[str, int]:
+        """Сколько апдейтов обработано и сколько раз соединение бралось из пула."""
+        return {"updates": self.updates, "checkouts": self.checkouts}
+
     async def __call__(
         self,
         handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
         event: TelegramObject,
         data: Dict[str, Any],
     ):
+        self.updates += 1
         async with self.session_pool() as session:
-            # Разовая проверка подключения
-            if not type(self)._checked:
-                try:
-                    res = await session.execute(sa_text(
-                        "select current_database(), inet_server_addr(), inet_server_port()"
-                    ))
-                    row = res.fetchone()
-                    logger.info("DB connect ok: %s", row)
-                except Exception as e:
-                    # Не падаем в рантайме, просто логируем проблему
-                    logger.error("DB connect check failed: %s", e, exc_info=True)
-                finally:
-                    type(self)._checked = True
-
             data["session"] = session
             return await handler(event, data)
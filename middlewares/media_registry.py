@@ -0,0 +1,73 @@
+"""Request-middleware бота: подстановка и запоминание ``file_id`` картинок.
+
+Подключается к сессии бота (``bot.session.middleware(...)``) и видит все
+исходящие ``sendPhoto``/``editMessageMedia``, откуда бы они ни шли: меню,
+карточки товаров, админка. Если источник (URL или локальный файл) уже
+отправлялся — вместо загрузки уходит ``file_id``; после первой отправки
+``file_id`` из ответа записывается в :mod:`database.media_registry`.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import EditMessageMedia, SendPhoto
+from aiogram.methods.base import TelegramMethod, TelegramType
+from aiogram.types import InputMediaPhoto, Message
+
+from database.media_registry import MediaRegistry, media_registry
+
+logger = logging.getLogger(__name__)
+
+
+def _photo_source(method: TelegramMethod[Any]) -> Any:
+    if isinstance(method, SendPhoto):
+        return method.photo
+    if isinstance(method, EditMessageMedia) and isinstance(method.media, InputMediaPhoto):
+        return method.media.media
+    return None
+
+
+def _with_photo(method: TelegramMethod[Any], photo: Any) -> TelegramMethod[Any]:
+    if isinstance(method, SendPhoto):
+        return method.model_copy(update={"photo": photo})
+    media = method.media.model_copy(update={"media": photo})
+    return method.model_copy(update={"media": media})
+
+
+class MediaRegistryMiddleware(BaseRequestMiddleware):
+    def __init__(self, registry: MediaRegistry = media_registry) -> None:
+        self.registry = registry
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+    ) -> TelegramType:
+        source = _photo_source(method)
+        if source is None:
+            return await make_request(bot, method)
+
+        photo = self.registry.resolve(source)
+        if photo is not source:
+            try:
+                return await make_request(bot, _with_photo(method, photo))
+            except TelegramBadRequest as e:
+                if "file" not in e.message.lower():
+                    raise
+                # file_id протух (другой бот/удалён) — шлём оригинал и перезаписываем
+                logger.warning("Cached file_id rejected (%s), re-uploading %s", e.message, source)
+                self.registry.forget(source)
+
+        result = await make_request(bot, method)
+        if isinstance(result, Message) and result.photo:
+            self.registry.remember(source, result.photo[-1].file_id)
+        return result
@@ -4,25 +4,12 @@ import logging
 from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 
-from database.models import User
+from database.locale_cache import get_user_locale, normalize_locale
 from utils.i18n import i18n  # единый экземпляр I18n
 
 logger = logging.getLogger(__name__)
 
-SUPPORTED_LOCALES = {"ru", "en"}
-
-
-def _normalize(code: Optional[str]) -> Optional[str]:
-    """
-    'en-US' -> 'en', 'ru' -> 'ru'. None, если пусто/неподдерживаемо.
-    """
-    if not code:
-        return None
-    base = code.split("-")[0].lower()
-    return base if base in SUPPORTED_LOCALES else None
-
 
 class UserLocaleMiddleware(BaseMiddleware):
     async def __call__(
@@ -49,19 +36,15 @@ class UserLocaleMiddleware(BaseMiddleware):
             except Exception:
                 logger.debug("FSM get_data failed", exc_info=True)
 
-        # 2) БД
+        # 2) БД (через кэш локалей — в БД идём только на промахе)
         if not locale:
             session: Optional[AsyncSession] = data.get("session")
             if session:
-                q = select(User.language).where(User.user_id == tg_user.id)
-                res = await session.execute(q)
-                lang = res.scalar_one_or_none()
-                if lang:
-                    locale = _normalize(lang) or lang
+                locale = await get_user_locale(session, tg_user.id)
 
         # 3) Язык клиента Telegram
         if not locale:
-            locale = _normalize(getattr(tg_user, "language_code", None))
+            locale = normalize_locale(getattr(tg_user, "language_code", None))
 
         # 4) Дефолт
         if not locale:
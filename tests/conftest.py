@@ -8,6 +8,7 @@ import sys
 from pathlib import Path
 import pytest
 import pytest_asyncio
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 # Добавляем корень проекта в sys.path для импортов пакета database и прочих модулей
@@ -34,6 +35,19 @@ async def engine():
         await engine.dispose()
 
 
+@pytest.fixture
+def statements(engine):
+    """SQL, выполненный движком за тест: список ``(statement, parameters)``."""
+    seen: list[tuple[str, object]] = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        seen.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _record)
+    yield seen
+    event.remove(engine.sync_engine, "before_cursor_execute", _record)
+
+
 @pytest_asyncio.fixture
 async def session(engine):
     maker = async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
@@ -86,3 +100,24 @@ async def sample_data(session: AsyncSession):
     await session.commit()
 
     return salon, user_salon, product
+
+
+@pytest.fixture(autouse=True)
+def _reset_catalog_cache():
+    """Каждый тест работает с новой БД, поэтому снапшоты каталога не переиспользуем."""
+    from database.catalog_cache import catalog_cache
+    from database.delivery_zones import invalidate_delivery_pricing
+    from database.locale_cache import locale_cache
+    from database.membership_cache import membership_cache
+    from database.salon_locator import user_locations
+    from handlers.menu_processing import _USER_SALON_CACHE
+    from kbds.inline import keyboard_cache
+
+    catalog_cache.clear()
+    locale_cache.clear()
+    membership_cache.clear()
+    invalidate_delivery_pricing()
+    user_locations.clear()
+    _USER_SALON_CACHE.clear()
+    keyboard_cache.clear()
+    yield
@@ -2,13 +2,19 @@
 Проверки корзины и базовой обработки заказа (ORM-уровень).
 """
 
+from decimal import Decimal
+
 import pytest
 
+from database.models import Product, Salon
+
+from database.checkout import place_order
 from database.orm_query import (
     orm_add_to_cart,
+    orm_get_cart_summary,
     orm_get_user_carts,
     orm_delete_from_cart,
-    orm_create_order,
+    orm_reduce_product_in_cart,
     orm_update_order_status,
 )
 
@@ -23,6 +29,62 @@ async def test_add_to_cart_increments_quantity(session, sample_data):
     assert carts[0].quantity == 2
 
 
+@pytest.mark.asyncio
+async def test_cart_mutations_return_new_quantity(session, sample_data):
+    _, user_salon, product = sample_data
+    assert await orm_add_to_cart(session, user_salon.id, product.id) == 1
+    carts = await orm_get_user_carts(session, user_salon.id)
+    assert await orm_add_to_cart(session, user_salon.id, product.id) == 2
+    # объект из прошлой выборки не должен остаться с устаревшим количеством
+    assert (await orm_get_user_carts(session, user_salon.id))[0] is carts[0]
+    assert carts[0].quantity == 2
+
+    assert await orm_reduce_product_in_cart(session, user_salon.id, product.id) == 1
+    assert await orm_reduce_product_in_cart(session, user_salon.id, product.id) == 0
+    assert await orm_reduce_product_in_cart(session, user_salon.id, product.id) is None
+    assert await orm_get_user_carts(session, user_salon.id) == []
+
+
+@pytest.mark.asyncio
+async def test_add_to_cart_rejects_product_of_another_salon(session, sample_data):
+    _, user_salon, product = sample_data
+    other = Salon(name="Other", slug="other", currency="USD", timezone="UTC")
+    session.add(other)
+    await session.flush()
+    foreign = Product(
+        name="Foreign", description="x", price=1, image="f.jpg", category_id=product.category_id, salon_id=other.id
+    )
+    session.add(foreign)
+    await session.commit()
+
+    assert await orm_add_to_cart(session, user_salon.id, foreign.id) is None
+    assert await orm_add_to_cart(session, user_salon.id + 999, product.id) is None
+    assert await orm_get_user_carts(session, user_salon.id) == []
+
+
+@pytest.mark.asyncio
+async def test_cart_summary_totals_are_computed_in_sql(session, sample_data):
+    _, user_salon, product = sample_data
+    assert not await orm_get_cart_summary(session, user_salon.id)
+    second = Product(
+        name="Cola", description="x", price="2.50", image="c.jpg",
+        category_id=product.category_id, salon_id=product.salon_id,
+    )
+    session.add(second)
+    await session.commit()
+    await orm_add_to_cart(session, user_salon.id, product.id)
+    for _ in range(3):
+        await orm_add_to_cart(session, user_salon.id, second.id)
+
+    cart = await orm_get_cart_summary(session, user_salon.id)
+
+    assert [(line.name, line.quantity, line.line_total) for line in cart.lines] == [
+        (product.name, 1, Decimal("10")),
+        ("Cola", 3, Decimal("7.5")),
+    ]
+    assert cart.total == Decimal("17.5")
+
+
 @pytest.mark.asyncio
 async def test_delete_from_cart(session, sample_data):
     _, user_salon, product = sample_data
@@ -37,19 +99,10 @@ async def test_order_total_and_status_update(session, sample_data):
     salon, user_salon, product = sample_data
     await orm_add_to_cart(session, user_salon.id, product.id)
     await orm_add_to_cart(session, user_salon.id, product.id)
-    carts = await orm_get_user_carts(session, user_salon.id)
-    order = await orm_create_order(
-        session,
-        user_salon.id,
-        "John",
-        "+123",
-        None,
-        "addr",
-        "delivery",
-        "cash",
-        None,
-        carts,
+    order = await place_order(
+        session, user_salon.id, name="John", phone="+123", address="addr",
+        delivery_type="delivery", payment_method="cash",
     )
     assert float(order.total) == pytest.approx(20.0)
-    updated = await orm_update_order_status(session, order.id, salon.id, "DONE")
+    updated = await orm_update_order_status(session, order.order_id, salon.id, "DONE")
     assert updated.status == "DONE"
@@ -0,0 +1,109 @@
+"""Кэш каталога: повторный просмотр без запросов к БД и сброс при правках."""
+
+import pytest
+
+from database.catalog_cache import catalog_cache
+from database.orm_query import (
+    orm_add_category,
+    orm_add_product,
+    orm_change_banner_description,
+    orm_change_product_field,
+    orm_delete_product,
+    orm_add_banner_description,
+)
+from handlers.menu_processing import catalog, main_menu, products
+
+
+@pytest.mark.asyncio
+async def test_browsing_hits_db_only_once(session, sample_data, statements):
+    salon, _, product = sample_data
+
+    async def browse():
+        await main_menu(session, 0, "main", salon.id)
+        await catalog(session, 1, "catalog", salon.id)
+        await products(session, 2, "product_list", product.category_id, 1, None, salon.id)
+        await products(session, 2, "product_detail", product.category_id, 1, product.id, salon.id)
+
+    await browse()
+    loaded = len(statements)
+    assert loaded > 0
+
+    for _ in range(3):
+        await browse()
+
+    assert len(statements) == loaded
+    stats = catalog_cache.stats()
+    assert stats["hits"] >= 13
+
+
+@pytest.mark.asyncio
+async def test_admin_writes_invalidate_snapshot(session, sample_data):
+    salon, _, product = sample_data
+
+    async def product_names():
+        page = await catalog_cache.get_products_page(session, salon.id, product.category_id, 1, 10)
+        return [p.name for p in page.items]
+
+    assert len(await product_names()) == 1
+
+    await orm_add_product(
+        session,
+        {
+            "name": "Margherita",
+            "description": "classic",
+            "price": 7,
+            "image": "m.jpg",
+            "category": product.category_id,
+        },
+        salon.id,
+    )
+    assert (await product_names())[-1] == "Margherita"
+
+    await orm_change_product_field(session, product.id, salon.id, name="Renamed")
+    assert (await product_names())[0] == "Renamed"
+
+    await orm_delete_product(session, product.id, salon.id)
+    await orm_add_category(session, "Drinks", salon.id)
+    assert await product_names() == ["Margherita"]
+    snapshot = await catalog_cache.get(session, salon.id)
+    assert "Drinks" in {c.name for c in snapshot.categories}
+
+    await orm_add_banner_description(session, {"main": None}, salon.id)
+    await orm_change_banner_description(session, "main", "Hello", salon.id)
+    snapshot = await catalog_cache.get(session, salon.id)
+    assert snapshot.banner("main").description == "Hello"
+
+    assert catalog_cache.stats()["invalidations"] == 6
+
+
+@pytest.mark.asyncio
+async def test_stale_load_is_not_stored(session, sample_data):
+    salon, _, _ = sample_data
+    version = catalog_cache.version(salon.id)
+
+    snapshot = await catalog_cache.get(session, salon.id)
+    assert snapshot.version == version
+
+    catalog_cache.invalidate(salon.id)
+    assert catalog_cache.version(salon.id) == version + 1
+    fresh = await catalog_cache.get(session, salon.id)
+    assert fresh.version == version + 1
+
+
+@pytest.mark.asyncio
+async def test_keyboards_follow_snapshot_reload_after_ttl(session, sample_data, monkeypatch):
+    """Правка в другом воркере: снапшот перечитан по TTL — клавиатура тоже новая."""
+    from database.models import Category
+
+    salon, _, product = sample_data
+    _, old_kb = await catalog(session, 1, "catalog", salon.id)
+
+    category = await session.get(Category, product.category_id)
+    category.name = "Переименовано"
+    await session.commit()
+    monkeypatch.setattr(catalog_cache, "ttl", 0)
+
+    _, new_kb = await catalog(session, 1, "catalog", salon.id)
+    texts = [button.text for row in new_kb.inline_keyboard for button in row]
+    assert "Переименовано" in texts
+    assert new_kb is not old_kb
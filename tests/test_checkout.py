@@ -0,0 +1,96 @@
+"""Оформление заказа одной транзакцией: позиции, очистка корзины, лимит тарифа."""
+
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select
+
+from database.checkout import EmptyCartError, OrderLimitReached, place_order
+from database.models import Order, OrderItem, Product, Salon
+from database.orm_query import (
+    orm_add_to_cart,
+    orm_get_cart_summary,
+    orm_get_orders_count,
+    orm_get_user_carts,
+)
+
+
+def _order_kwargs(**overrides):
+    kwargs = dict(phone="+123", delivery_type="delivery_courier", payment_method="cash", address="addr")
+    kwargs.update(overrides)
+    return kwargs
+
+
+@pytest.mark.asyncio
+async def test_place_order_creates_items_and_clears_cart(session, sample_data, statements):
+    salon, user_salon, product = sample_data
+    second = Product(
+        name="Margherita", description="", price=Decimal("7.50"), image="",
+        category_id=product.category_id, salon_id=salon.id,
+    )
+    session.add(second)
+    await session.commit()
+    await orm_add_to_cart(session, user_salon.id, product.id)
+    await orm_add_to_cart(session, user_salon.id, product.id)
+    await orm_add_to_cart(session, user_salon.id, second.id)
+    cart = await orm_get_cart_summary(session, user_salon.id)
+    statements.clear()
+
+    result = await place_order(session, user_salon.id, **_order_kwargs())
+
+    # корзина, заказ, позиции, очистка корзины (на бесплатном тарифе + проверка лимита)
+    assert len(statements) <= 5
+    assert result.total == Decimal("27.50")
+    assert result.currency == "USD"
+    assert [line.quantity for line in result.lines] == [2, 1]
+    # тот же read model, что и у экрана корзины
+    assert result.lines == cart.lines
+    assert set(result.timings) >= {"cart", "order", "items", "cart_clear", "commit", "total"}
+
+    order = await session.get(Order, result.order_id)
+    assert order.name == "Ivan Petrov"
+    assert order.total == Decimal("27.50")
+    items = (await session.execute(select(OrderItem).where(OrderItem.order_id == order.id))).scalars().all()
+    assert sorted(item.product_name for item in items) == sorted([product.name, "Margherita"])
+    assert await orm_get_user_carts(session, user_salon.id) == []
+
+
+@pytest.mark.asyncio
+async def test_place_order_rejects_empty_cart(session, sample_data):
+    _, user_salon, _ = sample_data
+    with pytest.raises(EmptyCartError):
+        await place_order(session, user_salon.id, **_order_kwargs())
+
+
+@pytest.mark.asyncio
+async def test_place_order_enforces_free_plan_limit(session, sample_data):
+    salon, user_salon, product = sample_data
+    salon.free_plan = True
+    salon.order_limit = 1
+    await session.commit()
+    user_salon_id, product_id = user_salon.id, product.id
+
+    await orm_add_to_cart(session, user_salon_id, product_id)
+    await place_order(session, user_salon_id, **_order_kwargs())
+
+    await orm_add_to_cart(session, user_salon_id, product_id)
+    with pytest.raises(OrderLimitReached) as exc:
+        await place_order(session, user_salon_id, **_order_kwargs())
+
+    assert exc.value.limit == 1
+    # корзина не тронута, второй заказ не создан
+    assert len(await orm_get_user_carts(session, user_salon_id)) == 1
+    assert len((await session.execute(select(Order.id))).all()) == 1
+
+
+@pytest.mark.asyncio
+async def test_place_order_maintains_salon_counter(session, sample_data):
+    salon, user_salon, product = sample_data
+    salon_id, user_salon_id, product_id = salon.id, user_salon.id, product.id
+
+    for _ in range(3):
+        await orm_add_to_cart(session, user_salon_id, product_id)
+        await place_order(session, user_salon_id, **_order_kwargs())
+
+    assert await session.scalar(select(Salon.orders_count).where(Salon.id == salon_id)) == 3
+    assert await orm_get_orders_count(session, salon_id) == 3
@@ -0,0 +1,61 @@
+"""DataBaseSession: соединение берётся из пула только при обращении к БД."""
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from middlewares.db import DataBaseSession
+
+
+@pytest.fixture
+def checkouts(engine):
+    counter = {"n": 0, "checkin": 0}
+
+    def _checkout(dbapi_conn, record, proxy):
+        counter["n"] += 1
+
+    def _checkin(dbapi_conn, record):
+        counter["checkin"] += 1
+
+    event.listen(engine.sync_engine, "checkout", _checkout)
+    event.listen(engine.sync_engine, "checkin", _checkin)
+    yield counter
+    event.remove(engine.sync_engine, "checkout", _checkout)
+    event.remove(engine.sync_engine, "checkin", _checkin)
+
+
+@pytest.fixture
+def middleware(engine):
+    maker = async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+    return DataBaseSession(session_pool=maker)
+
+
+@pytest.mark.asyncio
+async def test_handler_without_db_checks_out_no_connection(middleware, checkouts):
+    async def handler(event, data):
+        return "ok"
+
+    assert await middleware(handler, object(), {}) == "ok"
+    assert checkouts["n"] == 0
+    assert middleware.stats() == {"updates": 1, "checkouts": 0}
+
+
+@pytest.mark.asyncio
+async def test_connection_is_taken_on_first_use_and_returned_after(middleware, checkouts):
+    seen = {}
+
+    async def handler(event, data):
+        session = data["session"]
+        assert isinstance(session, AsyncSession)
+        assert checkouts["n"] == 0
+        seen["value"] = await session.scalar(text("select 1"))
+        seen["session"] = session
+        return None
+
+    await middleware(handler, object(), {})
+
+    assert seen["value"] == 1
+    assert checkouts["n"] == 1
+    assert middleware.stats()["checkouts"] == 1
+    # после хендлера соединение возвращено в пул
+    assert checkouts["checkin"] == checkouts["n"]
@@ -0,0 +1,115 @@
+"""Зоны доставки: ступени тарифа, многоугольники, ближайший доставляющий салон."""
+
+import random
+
+import pytest
+
+from database.delivery_zones import delivery_pricing, quote_delivery, replace_delivery_zones
+from database.models import Salon
+from database.repositories import SalonRepository
+from utils.delivery import DeliveryPricing, SalonPoint, Zone, haversine_many
+from utils.geo import haversine
+
+# «Г»-образный многоугольник: вырез в правом верхнем углу проверяет вогнутость
+L_SHAPE = ((0.0, 0.0), (0.0, 2.0), (1.0, 2.0), (1.0, 1.0), (2.0, 1.0), (2.0, 0.0))
+
+
+@pytest.fixture
+def pricing():
+    return DeliveryPricing(
+        [SalonPoint(1, 0.5, 0.5), SalonPoint(2, 0.5, 3.0), SalonPoint(3, 10.0, 10.0)],
+        [
+            Zone(1, "far", 300, 10, priority=1, radius_km=200),
+            Zone(1, "near", 100, radius_km=50),
+            Zone(2, "L", 70, polygon=L_SHAPE),
+        ],
+    )
+
+
+def test_first_matching_zone_by_priority_sets_price(pricing):
+    near = pricing.quote(1, 0.6, 0.6)
+    assert (near.zone, near.cost) == ("near", 100)
+
+    far = pricing.quote(1, 1.5, 0.5)
+    assert far.zone == "far"
+    assert far.cost == int(300 + 10 * far.distance_km) + 1
+
+    assert pricing.quote(1, 5.0, 5.0) is None
+
+
+def test_polygon_zone_handles_concave_shape(pricing):
+    assert pricing.quote(2, 1.5, 0.5).zone == "L"
+    assert pricing.quote(2, 0.5, 1.5).zone == "L"
+    assert pricing.quote(2, 1.5, 1.5) is None
+
+
+def test_salon_without_zones_uses_legacy_tariff(pricing):
+    quote = pricing.quote(3, 10.0, 10.05)
+    assert quote.zone is None
+    assert quote.cost == 6
+
+
+def test_nearest_delivering_salon(pricing):
+    # до салона 2 ближе, но точка вне его многоугольника
+    assert pricing.nearest(1.5, 1.5, [1, 2]).salon_id == 1
+    assert [q.salon_id for q in pricing.quotes(0.6, 0.6)] == [1, 2, 3]
+    assert pricing.nearest(0.6, 0.6, [42]) is None
+
+
+def test_max_km_limits_only_zoneless_salons():
+    pricing = DeliveryPricing(
+        [SalonPoint(1, 55.75, 37.61), SalonPoint(2, 55.75, 38.5)],
+        [Zone(2, "region", 500, radius_km=80)],
+    )
+    # до салона 2 ~63 км, но точка в его зоне; салон 1 без зон — дальше предела
+    assert [q.salon_id for q in pricing.quotes(55.75, 39.5, max_km=30)] == [2]
+    assert [q.salon_id for q in pricing.quotes(55.75, 37.9, max_km=30)] == [1, 2]
+    assert pricing.nearest(55.75, 37.0, [1], max_km=30) is None
+    assert pricing.nearest(55.75, 37.0, [1]).salon_id == 1
+
+
+def test_vectorized_haversine_matches_scalar():
+    import numpy as np
+
+    rnd = random.Random(7)
+    points = [(rnd.uniform(-80, 80), rnd.uniform(-180, 180)) for _ in range(50)]
+    lats, lons = np.array(points).T
+    expected = [haversine(55.75, 37.61, lat, lon) for lat, lon in points]
+    assert haversine_many(55.75, 37.61, lats, lons) == pytest.approx(expected, rel=1e-9)
+
+
+@pytest.mark.asyncio
+async def test_zones_are_loaded_from_db_and_reloaded_on_changes(session):
+    salon = Salon(name="S", slug="s", currency="RUB", timezone="UTC", latitude=55.75, longitude=37.61)
+    session.add(salon)
+    await session.commit()
+    await replace_delivery_zones(session, salon.id, [Zone(salon.id, "city", 150, radius_km=5)])
+    loads = delivery_pricing.loads
+
+    assert (await quote_delivery(session, salon.id, 55.76, 37.62)).cost == 150
+    assert await quote_delivery(session, salon.id, 55.9, 37.61) is None
+    assert delivery_pricing.loads == loads + 1
+
+    await SalonRepository(session).update_location(salon.id, 55.9, 37.61)
+    assert (await quote_delivery(session, salon.id, 55.9, 37.61)).zone == "city"
+    assert delivery_pricing.loads == loads + 2
+
+
+@pytest.mark.asyncio
+async def test_snapshot_is_reloaded_when_salon_row_is_newer(session):
+    """Салон задал адрес на другом воркере: локальный снапшот о нём ещё не знает."""
+    salon = Salon(name="S", slug="s", currency="RUB", timezone="UTC")
+    session.add(salon)
+    await session.commit()
+    await delivery_pricing.get(session)
+    loads = delivery_pricing.loads
+
+    salon.latitude, salon.longitude = 55.75, 37.61
+    await session.commit()  # в обход update_location: инвалидации в этом процессе нет
+    assert await quote_delivery(session, salon.id, 55.76, 37.62) is None
+
+    quote = await quote_delivery(session, salon.id, 55.76, 37.62, salon_location=(55.75, 37.61))
+    assert quote.cost == 2
+    assert delivery_pricing.loads == loads + 1
+    await quote_delivery(session, salon.id, 55.76, 37.62, salon_location=(55.75, 37.61))
+    assert delivery_pricing.loads == loads + 1
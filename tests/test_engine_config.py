@@ -0,0 +1,66 @@
+"""Настройки движка БД из переменных окружения."""
+
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from database.config import EngineSettings
+
+
+def test_defaults_disable_echo_and_enable_pre_ping():
+    settings = EngineSettings.from_env({})
+    assert settings.echo is False
+    assert settings.pool_pre_ping is True
+
+
+def test_env_overrides():
+    settings = EngineSettings.from_env(
+        {
+            "DB_ECHO": "yes",
+            "DB_POOL_SIZE": "25",
+            "DB_MAX_OVERFLOW": "5",
+            "DB_POOL_TIMEOUT": "2.5",
+            "DB_POOL_RECYCLE": "600",
+            "DB_POOL_PRE_PING": "0",
+            "DB_STATEMENT_CACHE_SIZE": "0",
+        }
+    )
+    assert settings == EngineSettings(
+        echo=True,
+        pool_size=25,
+        max_overflow=5,
+        pool_timeout=2.5,
+        pool_recycle=600,
+        pool_pre_ping=False,
+        statement_cache_size=0,
+    )
+    assert "pool_size=25" in settings.describe()
+
+
+def test_invalid_values_fall_back_or_are_clamped():
+    settings = EngineSettings.from_env(
+        {"DB_POOL_SIZE": "0", "DB_MAX_OVERFLOW": "many", "DB_POOL_RECYCLE": "-5", "DB_ECHO": "maybe"}
+    )
+    assert settings.pool_size == 1
+    assert settings.max_overflow == EngineSettings().max_overflow
+    assert settings.pool_recycle == -1
+    assert settings.echo is False
+
+
+def test_asyncpg_kwargs_include_pool_and_statement_cache():
+    url = "postgresql+asyncpg://u:p@localhost/db"
+    kwargs = EngineSettings(pool_size=7, statement_cache_size=0).engine_kwargs(url)
+    assert kwargs["pool_size"] == 7
+    assert kwargs["connect_args"] == {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+    }
+
+    engine = create_async_engine(url, **kwargs)
+    assert engine.pool.size() == 7
+    assert engine.echo is False
+
+
+def test_sqlite_kwargs_skip_queue_pool_options():
+    kwargs = EngineSettings().engine_kwargs("sqlite+aiosqlite:///:memory:")
+    assert "pool_size" not in kwargs
+    assert "connect_args" not in kwargs
+    create_async_engine("sqlite+aiosqlite:///:memory:", **kwargs)
@@ -0,0 +1,80 @@
+"""Кэш file_path Telegram: параллельный getFile с лимитом, TTL и переживание рестарта."""
+
+import asyncio
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from database.dialects import db_now
+from database.file_paths import FilePathCache
+from database.models import TelegramFile
+
+
+class FakeBot:
+    token = "42:TOKEN"
+
+    def __init__(self) -> None:
+        self.calls: list[str] = []
+        self.active = 0
+        self.peak = 0
+        self.session = SimpleNamespace(
+            api=SimpleNamespace(file_url=lambda token, path: f"https://tg/{token}/{path}")
+        )
+
+    async def get_file(self, file_id):
+        self.calls.append(file_id)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        if file_id == "broken":
+            raise RuntimeError("file is too big")
+        return SimpleNamespace(file_path=f"photos/{file_id}.jpg")
+
+
+@pytest.fixture
+def pool(engine):
+    return async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest.mark.asyncio
+async def test_resolves_concurrently_with_cap_and_caches():
+    bot = FakeBot()
+    cache = FilePathCache(concurrency=3)
+    ids = [f"f{i}" for i in range(10)]
+
+    urls = await cache.resolve_many(bot, ids + ["f0", "broken"])
+
+    assert urls == {i: f"https://tg/42:TOKEN/photos/{i}.jpg" for i in ids}
+    assert bot.peak == 3
+    assert len(bot.calls) == 11
+
+    await cache.resolve_many(bot, ids)
+    assert len(bot.calls) == 11
+
+
+@pytest.mark.asyncio
+async def test_paths_survive_restart_until_they_expire(pool, session):
+    bot = FakeBot()
+    cache = FilePathCache()
+    await cache.start(pool)
+    await cache.resolve_many(bot, ["fresh"])
+    db_time = await session.scalar(select(db_now(session.bind.dialect.name)))
+    session.add(
+        TelegramFile(
+            file_id="stale",
+            file_path="photos/stale.jpg",
+            updated=db_time - timedelta(hours=2),
+        )
+    )
+    await session.commit()
+
+    restarted = FilePathCache()
+    assert await restarted.start(pool) == 1
+    urls = await restarted.resolve_many(bot, ["fresh", "stale"])
+
+    assert set(urls) == {"fresh", "stale"}
+    assert bot.calls == ["fresh", "stale"]
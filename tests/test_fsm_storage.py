@@ -0,0 +1,219 @@
+"""SQL-хранилище FSM: персистентность, общая БД для воркеров, склейка записей и кэш чтений."""
+
+import asyncio
+from decimal import Decimal
+
+import pytest
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from database.fsm_storage import SQLStorage, create_fsm_storage
+from database.models import FSMRecord
+
+KEY = StorageKey(bot_id=1, chat_id=10, user_id=10)
+
+
+@pytest.fixture
+def pool(engine):
+    return async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest.mark.asyncio
+async def test_state_survives_new_storage_instance(pool):
+    storage = SQLStorage(pool)
+    await storage.set_state(KEY, "OrderStates:choosing_delivery")
+    await storage.update_data(KEY, {"user_salon_id": 5, "delivery_cost": Decimal("1.50")})
+    await storage.close()
+
+    restarted = SQLStorage(pool)
+    assert await restarted.get_state(KEY) == "OrderStates:choosing_delivery"
+    assert await restarted.get_data(KEY) == {"user_salon_id": 5, "delivery_cost": Decimal("1.50")}
+
+
+@pytest.mark.asyncio
+async def test_update_data_calls_are_coalesced(pool, statements):
+    storage = SQLStorage(pool, flush_delay=60)
+    await storage.set_state(KEY, "OrderStates:entering_phone")
+    for i in range(10):
+        await storage.update_data(KEY, {f"field_{i}": i})
+    writes_before_flush = [sql for sql, _ in statements if sql.lstrip().upper().startswith("INSERT")]
+    assert writes_before_flush == []
+
+    await storage.flush()
+
+    writes = [sql for sql, _ in statements if sql.lstrip().upper().startswith("INSERT")]
+    assert len(writes) == 1
+    assert storage.stats()["db_writes"] == 1
+    await storage.close()
+
+
+@pytest.mark.asyncio
+async def test_default_storage_is_shared_between_workers(pool):
+    worker_a, worker_b = SQLStorage(pool), SQLStorage(pool)
+    assert await worker_b.get_state(KEY) is None
+
+    await worker_a.set_state(KEY, "OrderStates:choosing_delivery")
+    await worker_a.update_data(KEY, {"delivery": "courier"})
+
+    assert await worker_b.get_state(KEY) == "OrderStates:choosing_delivery"
+    assert await worker_b.get_data(KEY) == {"delivery": "courier"}
+
+
+@pytest.mark.asyncio
+async def test_unserializable_data_fails_in_the_handler(pool):
+    storage = SQLStorage(pool, flush_delay=60)
+    with pytest.raises(TypeError):
+        await storage.update_data(KEY, {"when": object()})
+    assert storage.stats()["pending"] == 0
+
+
+@pytest.mark.asyncio
+async def test_failing_record_is_dropped_without_blocking_others(pool, monkeypatch):
+    storage = SQLStorage(pool, flush_delay=60, max_attempts=2)
+    bad = StorageKey(bot_id=1, chat_id=20, user_id=20)
+    bad_key = storage.key_builder.build(bad)
+    flush_batch = storage._flush_batch
+
+    async def failing(batch):
+        if bad_key in batch:
+            raise RuntimeError("constraint violation")
+        await flush_batch(batch)
+
+    monkeypatch.setattr(storage, "_flush_batch", failing)
+    await storage.update_data(KEY, {"phone": "+100"})
+    await storage.update_data(bad, {"phone": "+200"})
+
+    with pytest.raises(RuntimeError):
+        await storage.flush()
+    assert await SQLStorage(pool).get_data(KEY) == {"phone": "+100"}
+    assert storage.stats()["pending"] == 1
+
+    with pytest.raises(RuntimeError):
+        await storage.flush()
+    stats = storage.stats()
+    assert (stats["pending"], stats["dropped"], stats["db_writes"]) == (0, 1, 1)
+    await storage.close()
+
+
+@pytest.mark.asyncio
+async def test_failing_write_is_reported_to_its_own_handler(pool, monkeypatch, caplog):
+    storage = SQLStorage(pool, flush_delay=0)
+    bad = StorageKey(bot_id=1, chat_id=20, user_id=20)
+    bad_key = storage.key_builder.build(bad)
+    flush_batch = storage._flush_batch
+
+    async def failing(batch):
+        if bad_key in batch:
+            raise RuntimeError("constraint violation")
+        await flush_batch(batch)
+
+    monkeypatch.setattr(storage, "_flush_batch", failing)
+    # обе записи ждут одного flush-lock: первая не должна писать чужой ключ
+    async with storage._flush_lock:
+        good_write = asyncio.create_task(storage.set_state(KEY, "OrderStates:entering_phone"))
+        bad_write = asyncio.create_task(storage.set_state(bad, "OrderStates:entering_phone"))
+        await asyncio.sleep(0)
+
+    results = await asyncio.gather(good_write, bad_write, return_exceptions=True)
+    assert results[0] is None
+    assert isinstance(results[1], RuntimeError)
+    assert storage.stats()["dropped"] == 1
+    assert f"FSM record {bad_key} dropped" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_reads_are_served_from_cache(pool, statements):
+    storage = SQLStorage(pool, cache_ttl=2, flush_delay=0)
+    await storage.update_data(KEY, {"phone": "+100"})
+    statements.clear()
+
+    for _ in range(5):
+        assert await storage.get_data(KEY) == {"phone": "+100"}
+        assert await storage.get_state(KEY) is None
+
+    assert statements == []
+    assert storage.stats()["db_reads"] == 1
+
+
+@pytest.mark.asyncio
+async def test_writes_touch_only_their_column_without_reading(pool, statements):
+    storage = SQLStorage(pool, cache_ttl=2, flush_delay=0)
+    await storage.set_data(KEY, {"phone": "+100"})
+    statements.clear()
+
+    await storage.set_state(KEY, "OrderStates:entering_address")
+    await storage.update_data(KEY, {"address": "Main st."})
+    await storage.update_data(KEY, {"entrance": "2"})
+
+    verbs = [sql.lstrip().split()[0].upper() for sql, _ in statements]
+    # set_state — только upsert; update_data читает один раз, дальше — из кэша
+    assert verbs == ["INSERT", "SELECT", "INSERT", "INSERT"]
+    restarted = SQLStorage(pool)
+    assert await restarted.get_state(KEY) == "OrderStates:entering_address"
+    assert await restarted.get_data(KEY) == {"phone": "+100", "address": "Main st.", "entrance": "2"}
+
+
+@pytest.mark.asyncio
+async def test_state_write_keeps_data_written_by_other_worker(pool):
+    worker_a, worker_b = SQLStorage(pool), SQLStorage(pool)
+    await worker_a.set_data(KEY, {"phone": "+100"})
+    await worker_b.set_state(KEY, "OrderStates:entering_phone")
+
+    assert await worker_a.get_data(KEY) == {"phone": "+100"}
+    assert await worker_a.get_state(KEY) == "OrderStates:entering_phone"
+
+
+@pytest.mark.asyncio
+async def test_update_data_on_two_workers_keeps_both_changes(pool):
+    worker_a, worker_b = SQLStorage(pool), SQLStorage(pool)
+    await worker_b.update_data(KEY, {"phone": "+100"})
+    await worker_a.update_data(KEY, {"address": "Main st."})
+    await worker_b.update_data(KEY, {"entrance": "2"})
+
+    expected = {"phone": "+100", "address": "Main st.", "entrance": "2"}
+    assert await worker_a.get_data(KEY) == expected
+    assert await SQLStorage(pool).get_data(KEY) == expected
+
+
+@pytest.mark.asyncio
+async def test_clear_deletes_row(pool, session):
+    storage = SQLStorage(pool, flush_delay=0)
+    await storage.set_state(KEY, "AddSalon:name")
+    await storage.set_data(KEY, {"name": "Salon"})
+    assert await session.scalar(select(FSMRecord.state)) == "AddSalon:name"
+
+    await storage.set_state(KEY, None)
+    await storage.set_data(KEY, {})
+    session.expire_all()
+    assert await session.scalar(select(FSMRecord.key)) is None
+
+
+@pytest.mark.asyncio
+async def test_sqlite_file_backend(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'fsm.sqlite3'}"
+    storage = create_fsm_storage({"FSM_STORAGE_URL": url})
+    await storage.update_data(KEY, {"address": "Main st."})
+    await storage.close()
+
+    reopened = create_fsm_storage({"FSM_STORAGE_URL": url})
+    assert await reopened.get_data(KEY) == {"address": "Main st."}
+    await reopened.close()
+
+
+def test_env_settings_default_to_db_only(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'fsm.sqlite3'}"
+    storage = create_fsm_storage({"FSM_STORAGE_URL": url})
+    assert (storage.cache_ttl, storage.flush_delay) == (0.0, 0.0)
+
+    storage = create_fsm_storage(
+        {"FSM_STORAGE_URL": url, "FSM_CACHE_TTL": "soon", "FSM_FLUSH_DELAY": "-1"}
+    )
+    assert (storage.cache_ttl, storage.flush_delay) == (0.0, 0.0)
+
+
+def test_memory_backend_is_still_available():
+    assert isinstance(create_fsm_storage({"FSM_STORAGE": "memory"}), MemoryStorage)
+    with pytest.raises(RuntimeError):
+        create_fsm_storage({"FSM_STORAGE": "redis"})
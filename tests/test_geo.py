@@ -0,0 +1,100 @@
+"""Geocoder против локальной заглушки Nominatim: кэш, склейка запросов, троттлинг."""
+
+import asyncio
+import time
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from utils.geo import Geocoder
+from utils.http import HttpClient
+
+
+class StubNominatim:
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.hits: list[tuple[str, float]] = []
+        self.app = web.Application()
+        self.app.router.add_get("/reverse", self.reverse)
+        self.app.router.add_get("/search", self.search)
+
+    async def reverse(self, request: web.Request) -> web.Response:
+        self.hits.append(("reverse", time.monotonic()))
+        await asyncio.sleep(self.delay)
+        if float(request.query["lat"]) == 0:
+            return web.json_response({"error": "Unable to geocode"})
+        assert request.headers["User-Agent"] == "pizza-bot/1.0"
+        return web.json_response(
+            {
+                "display_name": "full",
+                "address": {"road": "Main St", "house_number": "1", "city": "Town"},
+            }
+        )
+
+    async def search(self, request: web.Request) -> web.Response:
+        self.hits.append(("search", time.monotonic()))
+        return web.json_response([{"lat": "55.75", "lon": "37.61"}])
+
+
+@pytest_asyncio.fixture
+async def stub():
+    stub = StubNominatim(delay=0.05)
+    server = TestServer(stub.app)
+    await server.start_server()
+    stub.url = str(server.make_url(""))
+    yield stub
+    await server.close()
+
+
+@pytest_asyncio.fixture
+async def client():
+    client = HttpClient()
+    yield client
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_reverse_coalesces_and_caches(stub, client):
+    geocoder = Geocoder(stub.url, min_interval=0, client=client)
+    results = await asyncio.gather(
+        *(geocoder.reverse(55.7512341, 37.6184449) for _ in range(5))
+    )
+    assert results == ["Main St, 1, Town"] * 5
+    assert len(stub.hits) == 1
+
+    # в пределах точности округления — тот же ключ кэша
+    assert await geocoder.reverse(55.75118, 37.61838) == "Main St, 1, Town"
+    assert len(stub.hits) == 1
+    assert geocoder.stats()["inflight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_reverse_failure_not_cached(stub, client):
+    geocoder = Geocoder(stub.url, min_interval=0, client=client)
+    assert await geocoder.reverse(0, 0) is None
+    assert await geocoder.reverse(0, 0) is None
+    assert len(stub.hits) == 2
+
+
+@pytest.mark.asyncio
+async def test_requests_are_rate_limited(stub, client):
+    geocoder = Geocoder(stub.url, min_interval=0.2, client=client)
+    started = time.monotonic()
+    await asyncio.gather(
+        geocoder.reverse(1, 1),
+        geocoder.reverse(2, 2),
+        geocoder.search("Red Square"),
+    )
+    assert len(stub.hits) == 3
+    # три запроса с интервалом 0.2 с — не быстрее 0.4 с
+    assert time.monotonic() - started >= 0.4
+
+
+@pytest.mark.asyncio
+async def test_search_returns_coordinates(stub, client):
+    geocoder = Geocoder(stub.url, min_interval=0, client=client)
+    assert await geocoder.search("Red  Square") == (55.75, 37.61)
+    assert await geocoder.search("red square") == (55.75, 37.61)
+    assert len(stub.hits) == 1
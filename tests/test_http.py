@@ -0,0 +1,123 @@
+"""Общий HTTP-клиент: повторы, Retry-After, лимит запросов на хост."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from utils.http import HttpClient, HttpSettings
+
+FAST = HttpSettings(retries=2, backoff=0, http2=False)
+
+
+def make_client(handler, settings: HttpSettings = FAST) -> HttpClient:
+    return HttpClient(settings, transport=httpx.MockTransport(handler))
+
+
+@pytest.mark.asyncio
+async def test_get_is_retried_on_server_errors():
+    statuses = iter([503, 502, 200])
+    calls = []
+
+    def handler(request):
+        calls.append(request.method)
+        return httpx.Response(next(statuses))
+
+    client = make_client(handler)
+    response = await client.get("https://example.test/a")
+    await client.close()
+
+    assert response.status_code == 200
+    assert len(calls) == 3
+    assert client.stats()["retries"] == 2
+
+
+@pytest.mark.asyncio
+async def test_post_is_not_retried_after_it_reached_server():
+    calls = []
+
+    def handler(request):
+        calls.append(request.method)
+        return httpx.Response(500)
+
+    client = make_client(handler)
+    response = await client.post("https://example.test/a", data={"x": "1"})
+    assert response.status_code == 500
+    assert len(calls) == 1
+
+    # явная идемпотентность разрешает повтор
+    response = await client.post("https://example.test/a", idempotent=True)
+    await client.close()
+    assert response.status_code == 500
+    assert len(calls) == 4
+
+
+@pytest.mark.asyncio
+async def test_connect_errors_are_retried_for_any_method():
+    attempts = []
+
+    def handler(request):
+        attempts.append(request.method)
+        if len(attempts) < 2:
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(201)
+
+    client = make_client(handler)
+    response = await client.post("https://example.test/a")
+    await client.close()
+
+    assert response.status_code == 201
+    assert len(attempts) == 2
+
+
+@pytest.mark.asyncio
+async def test_retry_after_header_is_honoured(monkeypatch):
+    delays = []
+    real_sleep = asyncio.sleep
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr("utils.http.asyncio.sleep", fake_sleep)
+    statuses = iter([429, 200])
+
+    def handler(request):
+        return httpx.Response(next(statuses), headers={"Retry-After": "3"})
+
+    client = make_client(handler)
+    response = await client.get("https://example.test/a")
+    await client.close()
+
+    assert response.status_code == 200
+    assert delays == [3.0]
+
+
+@pytest.mark.asyncio
+async def test_per_host_concurrency_limit():
+    active = {"example.test": 0, "other.test": 0}
+    peak = dict(active)
+
+    async def handler(request):
+        host = request.url.host
+        active[host] += 1
+        peak[host] = max(peak[host], active[host])
+        await asyncio.sleep(0.01)
+        active[host] -= 1
+        return httpx.Response(200)
+
+    client = make_client(handler, HttpSettings(per_host_limit=2, http2=False))
+    await asyncio.gather(
+        *(client.get("https://example.test/x") for _ in range(6)),
+        *(client.get("https://other.test/x") for _ in range(6)),
+    )
+    await client.close()
+
+    assert peak == {"example.test": 2, "other.test": 2}
+
+
+def test_settings_from_env_are_clamped(monkeypatch):
+    monkeypatch.setenv("HTTP_PER_HOST_LIMIT", "0")
+    monkeypatch.setenv("HTTP_RETRIES", "-2")
+    settings = HttpSettings.from_env()
+    assert (settings.per_host_limit, settings.retries) == (1, 0)
@@ -0,0 +1,63 @@
+"""Пережатие фото товаров и превью."""
+
+import io
+
+import pytest
+from PIL import Image
+
+from utils import images
+from utils.images import MAIN_MAX_SIDE, THUMB_SIZE, process_image, process_image_async
+
+
+def _png(size, mode="RGB", color=(200, 30, 30)) -> bytes:
+    out = io.BytesIO()
+    Image.new(mode, size, color).save(out, "PNG")
+    return out.getvalue()
+
+
+def _open(data: bytes) -> Image.Image:
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    return image
+
+
+def test_large_image_is_downscaled_and_thumbnailed():
+    result = process_image(_png((3000, 1500)))
+
+    main = _open(result.main)
+    thumb = _open(result.thumbnail)
+    assert main.format == thumb.format == "JPEG"
+    assert main.size == (MAIN_MAX_SIDE, MAIN_MAX_SIDE // 2)
+    assert (result.width, result.height) == main.size
+    assert thumb.size == (THUMB_SIZE, THUMB_SIZE)
+    assert len(result.thumbnail) < len(result.main)
+
+
+def test_small_image_is_not_upscaled_and_alpha_is_flattened():
+    result = process_image(_png((200, 100), mode="RGBA", color=(0, 0, 0, 0)))
+
+    main = _open(result.main)
+    assert main.size == (200, 100)
+    assert main.mode == "RGB"
+    # прозрачный фон становится белым, а не чёрным
+    assert min(main.getpixel((100, 50))) > 240
+
+
+def test_exif_orientation_is_applied():
+    out = io.BytesIO()
+    exif = Image.Exif()
+    exif[0x0112] = 6  # повёрнуто на 90°
+    Image.new("RGB", (400, 200)).save(out, "JPEG", exif=exif)
+
+    main = _open(process_image(out.getvalue()).main)
+    assert main.size == (200, 400)
+    assert "exif" not in main.info
+
+
+@pytest.mark.asyncio
+async def test_processing_runs_in_process_pool():
+    try:
+        result = await process_image_async(_png((800, 600)))
+    finally:
+        images.shutdown_image_pool()
+    assert _open(result.thumbnail).size == (THUMB_SIZE, THUMB_SIZE)
@@ -0,0 +1,161 @@
+"""Поиск товаров в инлайн-режиме: ранжирование, префиксы, порции через next_offset."""
+
+import importlib.util
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.dialects import postgresql
+
+from database.membership_cache import membership_cache
+from database.models import Category, Product, Salon
+from database.orm_query import _product_search_vector, orm_add_user, orm_search_products
+from handlers import inline_mode
+
+
+@pytest_asyncio.fixture
+async def menu(session, sample_data):
+    salon, user_salon, pepperoni = sample_data
+    drinks = Category(name="Drinks", salon_id=salon.id)
+    session.add(drinks)
+    await session.flush()
+    items = [
+        Product(name="Margherita", description="tomato, mozzarella", price=8,
+                image="https://cdn.example/m.jpg", category_id=pepperoni.category_id, salon_id=salon.id),
+        Product(name="Four cheese", description="with mozzarella and gorgonzola", price=9,
+                image="https://cdn.example/c.jpg", category_id=pepperoni.category_id, salon_id=salon.id),
+        Product(name="Mozzarella sticks", description="fried", price=5,
+                image="https://cdn.example/s.jpg", category_id=pepperoni.category_id, salon_id=salon.id),
+        Product(name="Cola", description="cold drink", price=2,
+                image="https://cdn.example/k.jpg", category_id=drinks.id, salon_id=salon.id),
+    ]
+    session.add_all(items)
+    await session.commit()
+    return salon, user_salon, drinks
+
+
+@pytest.mark.asyncio
+async def test_search_ranks_name_prefix_matches_first(session, menu):
+    salon, _, _ = menu
+
+    found = await orm_search_products(session, salon.id, "mozz")
+
+    assert [p.name for p in found] == ["Mozzarella sticks", "Margherita", "Four cheese"]
+
+
+@pytest.mark.asyncio
+async def test_search_requires_every_word_and_respects_category(session, menu):
+    salon, _, drinks = menu
+
+    assert [p.name for p in await orm_search_products(session, salon.id, "mozz gorgon")] == [
+        "Four cheese"
+    ]
+    assert [p.name for p in await orm_search_products(
+        session, salon.id, "co", category_id=drinks.id
+    )] == ["Cola"]
+    assert await orm_search_products(session, salon.id, "100%_") == []
+
+
+@pytest.mark.asyncio
+async def test_empty_search_pages_through_all_products(session, menu):
+    salon, _, _ = menu
+
+    first = await orm_search_products(session, salon.id, "", limit=3)
+    rest = await orm_search_products(session, salon.id, "", limit=3, offset=3)
+
+    ids = [p.id for p in first + rest]
+    assert ids == sorted(ids) and len(ids) == 5
+
+
+def test_postgres_vector_matches_migration_index():
+    path = Path(__file__).parents[1] / "alembic/versions/a7b9c1d3e5f7_add_product_search_indexes.py"
+    spec = importlib.util.spec_from_file_location("search_migration", path)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    compiled = str(
+        _product_search_vector().compile(dialect=postgresql.dialect())
+    ).replace("product.", "")
+
+    normalize = lambda sql: "".join(sql.split()).strip("()")  # noqa: E731
+    assert normalize(compiled) == normalize(migration.SEARCH_VECTOR)
+
+
+@pytest.mark.asyncio
+async def test_inline_answer_uses_next_offset(session, menu, monkeypatch):
+    salon, user_salon, _ = menu
+    monkeypatch.setattr(inline_mode, "INLINE_PAGE_SIZE", 2)
+    answers = []
+
+    async def answer(results, **kwargs):
+        answers.append((results, kwargs))
+
+    def query(text, offset=""):
+        return SimpleNamespace(
+            query=text,
+            offset=offset,
+            from_user=SimpleNamespace(id=user_salon.user_id),
+            bot=None,
+            answer=answer,
+        )
+
+    await inline_mode.answer_products_inline(query(f"salon_{salon.id} mozz"), session)
+    results, kwargs = answers[-1]
+    assert [r.title for r in results] == ["Mozzarella sticks", "Margherita"]
+    assert kwargs["next_offset"] == "2"
+    assert kwargs["is_personal"] and kwargs["cache_time"] == inline_mode.INLINE_CACHE_TIME
+
+    await inline_mode.answer_products_inline(query(f"salon_{salon.id} mozz", "2"), session)
+    results, kwargs = answers[-1]
+    assert [r.title for r in results] == ["Four cheese"]
+    assert kwargs["next_offset"] == ""
+
+
+@pytest.mark.asyncio
+async def test_category_only_query_resolves_salon_in_one_lookup(session, menu, statements):
+    salon, user_salon, drinks = menu
+    user_id = user_salon.user_id
+    for i in range(5):
+        other = Salon(name=f"Other{i}", slug=f"other{i}", currency="USD", timezone="UTC")
+        session.add(other)
+        await session.flush()
+        session.add(Category(name=f"C{i}", salon_id=other.id))
+        await orm_add_user(session, user_id, other.id)
+
+    answers = []
+
+    async def answer(results, **kwargs):
+        answers.append(results)
+
+    query = SimpleNamespace(
+        query=f"cat_{drinks.id}", offset="", from_user=SimpleNamespace(id=user_id),
+        bot=None, answer=answer,
+    )
+    statements.clear()
+    await inline_mode.answer_products_inline(query, session)
+    assert [r.title for r in answers[-1]] == ["Cola"]
+    assert len(membership_cache.get(user_id)) == 6
+    first_run = [sql for sql, _ in statements]
+    statements.clear()
+
+    await inline_mode.answer_products_inline(query, session)
+
+    assert sum("FROM category" in sql for sql in first_run) == 1
+    # членство уже в кэше — в user_salon ходим только через join с категорией
+    assert not any(
+        sql.lstrip().startswith("SELECT user_salon.salon_id") for sql, _ in statements
+    )
+    assert [r.title for r in answers[-1]] == ["Cola"]
+
+
+@pytest.mark.asyncio
+async def test_joining_salon_invalidates_membership(session, menu):
+    salon, user_salon, _ = menu
+    membership_cache.set(user_salon.user_id, (salon.id,))
+    other = Salon(name="Other", slug="other", currency="USD", timezone="UTC")
+    session.add(other)
+    await session.flush()
+
+    await orm_add_user(session, user_salon.user_id, other.id)
+
+    assert membership_cache.get(user_salon.user_id) is None
@@ -52,3 +52,42 @@ def test_product_list_has_no_cart_button() -> None:
     all_texts = [button.text for row in markup.inline_keyboard for button in row]
 
     assert _("Корзина 🛒") not in all_texts
+
+
+def test_menu_keyboards_are_cached_per_locale() -> None:
+    """Одинаковый запрос отдаёт тот же объект; другая локаль — свою клавиатуру."""
+
+    from kbds.inline import get_user_cart, get_user_main_btns, keyboard_cache
+    from utils.i18n import i18n
+
+    assert get_user_main_btns(level=0) is get_user_main_btns(level=0)
+    assert get_user_main_btns(level=0) is not get_user_main_btns(level=1)
+    cart = get_user_cart(level=3, page=2, pagination_btns=[("◀", "previous")], product_id=7)
+    assert get_user_cart(level=3, page=2, pagination_btns=[("◀", "previous")], product_id=7) is cart
+    assert get_user_cart(level=3, page=2, pagination_btns=[], product_id=7) is not cart
+
+    token = i18n.ctx_locale.set("en")
+    try:
+        en_menu = get_user_main_btns(level=0)
+    finally:
+        i18n.ctx_locale.reset(token)
+    assert en_menu is not get_user_main_btns(level=0)
+    assert keyboard_cache.stats()["hits"] >= 3
+
+
+def test_catalog_keyboards_follow_catalog_key() -> None:
+    """Клавиатуры каталога кэшируются по ключу загрузки снапшота."""
+
+    from kbds.inline import get_user_catalog_btns
+
+    old = [SimpleNamespace(id=1, name="Волосы")]
+    new = [SimpleNamespace(id=1, name="Уход за волосами")]
+
+    first = get_user_catalog_btns(level=1, categories=old, catalog_key=(5, 0))
+    assert get_user_catalog_btns(level=1, categories=old, catalog_key=(5, 0)) is first
+    assert get_user_catalog_btns(level=1, categories=old, catalog_key=(6, 0)) is not first
+
+    edited = get_user_catalog_btns(level=1, categories=new, catalog_key=(5, 1))
+    assert [b.text for b in edited.inline_keyboard[-1]] == ["Уход за волосами"]
+    # без ключа клавиатура строится заново
+    assert get_user_catalog_btns(level=1, categories=old) is not first
@@ -0,0 +1,59 @@
+"""Кэш локалей: middleware ходит в БД один раз, смена языка сбрасывает запись."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from database.locale_cache import locale_cache, locale_cache_stats
+from database.models import User
+from database.orm_query import orm_set_user_language
+from middlewares.user_locale import UserLocaleMiddleware
+from utils.i18n import i18n
+
+
+async def _run(middleware, session, user_id, language_code=None) -> str:
+    event_obj = SimpleNamespace(from_user=SimpleNamespace(id=user_id, language_code=language_code))
+
+    async def handler(event, data):
+        return i18n.ctx_locale.get()
+
+    return await middleware(handler, event_obj, {"session": session})
+
+
+@pytest.mark.asyncio
+async def test_locale_is_read_from_db_once(session, statements):
+    session.add(User(user_id=1, language="en"))
+    await session.commit()
+    statements.clear()
+
+    middleware = UserLocaleMiddleware()
+    for _ in range(5):
+        assert await _run(middleware, session, 1) == "en"
+
+    assert len(statements) == 1
+    stats = locale_cache_stats()
+    assert stats["hits"] == 4 and stats["misses"] == 1
+    assert stats["hit_rate"] == 0.8
+
+
+@pytest.mark.asyncio
+async def test_unknown_user_is_cached_and_falls_back_to_telegram(session, statements):
+    middleware = UserLocaleMiddleware()
+
+    assert await _run(middleware, session, 42, "en-US") == "en"
+    assert await _run(middleware, session, 42, "de") == "ru"
+    assert len(statements) == 1
+
+
+@pytest.mark.asyncio
+async def test_set_language_invalidates_cache(session):
+    session.add(User(user_id=7, language="ru"))
+    await session.commit()
+
+    middleware = UserLocaleMiddleware()
+    assert await _run(middleware, session, 7) == "ru"
+    assert 7 in locale_cache
+
+    await orm_set_user_language(session, 7, "en")
+    assert 7 not in locale_cache
+    assert await _run(middleware, session, 7) == "en"
@@ -0,0 +1,105 @@
+"""Реестр file_id: подстановка в исходящие фото, локальные файлы, персистентность."""
+
+import os
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import EditMessageMedia, SendPhoto
+from aiogram.types import Chat, FSInputFile, InputMediaPhoto, Message, PhotoSize
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from database.media_registry import MediaRegistry
+from middlewares.media_registry import MediaRegistryMiddleware
+
+URL = "https://cdn.example/banner.jpg"
+
+
+class FakeTelegram:
+    """make_request, который «загружает» новые файлы и отвергает неизвестные file_id."""
+
+    def __init__(self) -> None:
+        self.sent: list = []
+        self.uploads = 0
+        self.valid_ids: set[str] = set()
+
+    async def __call__(self, bot, method):
+        photo = method.photo if isinstance(method, SendPhoto) else method.media.media
+        self.sent.append(photo)
+        if isinstance(photo, str) and photo.startswith("AgAC"):
+            if photo not in self.valid_ids:
+                raise TelegramBadRequest(method, "Bad Request: wrong file identifier")
+            file_id = photo
+        else:
+            self.uploads += 1
+            file_id = f"AgAC{self.uploads}"
+            self.valid_ids.add(file_id)
+        return Message(
+            message_id=1,
+            date=0,
+            chat=Chat(id=1, type="private"),
+            photo=[PhotoSize(file_id=file_id, file_unique_id="u", width=10, height=10)],
+        )
+
+
+@pytest.mark.asyncio
+async def test_url_is_uploaded_once_then_sent_by_file_id():
+    telegram = FakeTelegram()
+    middleware = MediaRegistryMiddleware(MediaRegistry())
+
+    await middleware(telegram, None, SendPhoto(chat_id=1, photo=URL))
+    await middleware(telegram, None, SendPhoto(chat_id=1, photo=URL))
+    await middleware(
+        telegram,
+        None,
+        EditMessageMedia(chat_id=1, message_id=1, media=InputMediaPhoto(media=URL, caption="c")),
+    )
+
+    assert telegram.uploads == 1
+    assert telegram.sent == [URL, "AgAC1", "AgAC1"]
+    assert middleware.registry.stats()["substitutions"] == 2
+
+
+@pytest.mark.asyncio
+async def test_local_file_key_tracks_modification_time(tmp_path):
+    path = tmp_path / "product_list.png"
+    path.write_bytes(b"png")
+    telegram = FakeTelegram()
+    middleware = MediaRegistryMiddleware(MediaRegistry())
+
+    await middleware(telegram, None, SendPhoto(chat_id=1, photo=FSInputFile(path)))
+    await middleware(telegram, None, SendPhoto(chat_id=1, photo=FSInputFile(path)))
+    assert telegram.uploads == 1
+
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    await middleware(telegram, None, SendPhoto(chat_id=1, photo=FSInputFile(path)))
+    assert telegram.uploads == 2
+
+
+@pytest.mark.asyncio
+async def test_rejected_file_id_falls_back_to_source():
+    telegram = FakeTelegram()
+    registry = MediaRegistry()
+    registry.remember(URL, "AgACstale")
+    middleware = MediaRegistryMiddleware(registry)
+
+    response = await middleware(telegram, None, SendPhoto(chat_id=1, photo=URL))
+
+    assert telegram.sent == ["AgACstale", URL]
+    assert response.photo[-1].file_id == "AgAC1"
+    assert registry.get(URL) == "AgAC1"
+
+
+@pytest.mark.asyncio
+async def test_registry_persists_between_restarts(engine):
+    pool = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    registry = MediaRegistry(flush_delay=60)
+    await registry.start(pool)
+    registry.remember(URL, "AgAC1")
+    registry.remember("https://cdn.example/other.jpg", "AgAC2")
+    registry.forget("https://cdn.example/other.jpg")
+    await registry.close()
+
+    restarted = MediaRegistry()
+    assert await restarted.start(pool) == 1
+    assert restarted.get(URL) == "AgAC1"
@@ -119,31 +119,17 @@ async def test_full_order_flow(monkeypatch):
         async def get_by_id(self, salon_id):
             return SimpleNamespace(id=1, latitude=1.0, longitude=1.0, free_plan=False, order_limit=999)
 
-    async def fake_orm_get_user_carts(session, user_salon_id):
-        return [SimpleNamespace(id=1)]
-
-    async def fake_notify(callback, state, session, user_salon_id):
+    async def fake_notify(callback, state, session, user_salon_id, order=None):
         session.notified = True
 
-    async def fake_orm_clear_cart(session, user_salon_id):
-        session.cleared = True
-
-    async def fake_orm_create_order(*args, **kwargs):
-        session_arg = args[0] if args else kwargs.get("session")
-        if session_arg:
-            session_arg.order_params = {**kwargs, "session": session_arg}
-        return SimpleNamespace(id=1)
-
-    async def fake_orm_get_orders_count(session, salon_id):
-        return 0
-
-    def fake_haversine(*args, **kwargs):
-        return 1.0
+    async def fake_place_order(session, user_salon_id, **kwargs):
+        session.order_params = {**kwargs, "session": session}
+        return SimpleNamespace(order_id=1, lines=())
 
-    def fake_calc_delivery_cost(*args, **kwargs):
-        return 100
+    async def fake_quote_delivery(session, salon_id, lat, lon, salon_location=None):
+        return SimpleNamespace(salon_id=salon_id, distance_km=1.0, cost=100, zone=None)
 
-    def fake_get_address_from_coords(lat, lon):
+    async def fake_get_address_from_coords(lat, lon):
         return "Address"
 
     monkeypatch.setattr(start_module, "orm_get_user", fake_orm_get_user)
@@ -153,17 +139,12 @@ async def test_full_order_flow(monkeypatch):
     monkeypatch.setattr(courier_module, "orm_get_user", fake_orm_get_user)
     monkeypatch.setattr(courier_module, "get_order_summary", fake_get_order_summary)
     monkeypatch.setattr(courier_module, "SalonRepository", FakeSalonRepository)
-    monkeypatch.setattr(courier_module, "haversine", fake_haversine)
-    monkeypatch.setattr(courier_module, "calc_delivery_cost", fake_calc_delivery_cost)
+    monkeypatch.setattr(courier_module, "quote_delivery", fake_quote_delivery)
     monkeypatch.setattr(courier_module, "get_address_from_coords", fake_get_address_from_coords)
     monkeypatch.setattr(courier_module, "_", lambda s: s)
 
-    monkeypatch.setattr(helpers_module, "orm_get_user_carts", fake_orm_get_user_carts)
     monkeypatch.setattr(helpers_module, "notify_salon_about_order", fake_notify)
-    monkeypatch.setattr(helpers_module, "orm_clear_cart", fake_orm_clear_cart)
-    monkeypatch.setattr(helpers_module, "orm_create_order", fake_orm_create_order)
-    monkeypatch.setattr(helpers_module, "orm_get_orders_count", fake_orm_get_orders_count)
-    monkeypatch.setattr(helpers_module, "SalonRepository", FakeSalonRepository)
+    monkeypatch.setattr(helpers_module, "place_order", fake_place_order)
     monkeypatch.setattr(helpers_module, "get_order_summary", fake_get_order_summary)
     monkeypatch.setattr(helpers_module, "_", lambda s: s)
 
@@ -197,3 +178,4 @@ async def test_full_order_flow(monkeypatch):
     assert summary_msg.answers[-1][0] == "Спасибо! Ваш заказ принят 👍"
     assert session.order_params["address"] == "Address"
     assert session.order_params["phone"] == "+12345"
+    assert session.notified
@@ -3,11 +3,11 @@
 """
 
 import pytest
+from sqlalchemy import select
 from database.models import Salon, Category, Product, User, UserSalon
+from database.checkout import place_order
 from database.orm_query import (
     orm_add_to_cart,
-    orm_get_user_carts,
-    orm_create_order,
     orm_get_order,
     orm_get_orders,
     orm_get_orders_count,
@@ -34,22 +34,13 @@ async def test_order_visibility_by_salon(session, sample_data):
     await session.commit()
 
     await orm_add_to_cart(session, user_salon1.id, product1.id)
-    carts = await orm_get_user_carts(session, user_salon1.id)
-    order = await orm_create_order(
-        session,
-        user_salon1.id,
-        "John",
-        "+123",
-        None,
-        "addr",
-        "delivery",
-        "cash",
-        None,
-        carts,
+    order = await place_order(
+        session, user_salon1.id, name="John", phone="+123", address="addr",
+        delivery_type="delivery", payment_method="cash",
     )
 
-    assert await orm_get_order(session, order.id, salon1.id) is not None
-    assert await orm_get_order(session, order.id, salon2.id) is None
+    assert await orm_get_order(session, order.order_id, salon1.id) is not None
+    assert await orm_get_order(session, order.order_id, salon2.id) is None
 
     orders_s2 = await orm_get_orders(session, salon2.id)
     assert orders_s2 == []
@@ -59,19 +50,91 @@ async def test_order_visibility_by_salon(session, sample_data):
 async def test_orders_count(session, sample_data):
     salon1, user_salon1, product1 = sample_data
     await orm_add_to_cart(session, user_salon1.id, product1.id)
-    carts = await orm_get_user_carts(session, user_salon1.id)
-    await orm_create_order(
-        session,
-        user_salon1.id,
-        "John",
-        "+123",
-        None,
-        "addr",
-        "delivery",
-        "cash",
-        None,
-        carts,
+    await place_order(
+        session, user_salon1.id, name="John", phone="+123", address="addr",
+        delivery_type="delivery", payment_method="cash",
     )
 
     count1 = await orm_get_orders_count(session, salon1.id)
     assert count1 == 1
+
+
+@pytest.mark.asyncio
+async def test_reconcile_orders_count(session, sample_data):
+    from sqlalchemy import update
+
+    from database.reconcile import reconcile_orders_count
+
+    salon1, user_salon1, product1 = sample_data
+    salon_id = salon1.id
+    await orm_add_to_cart(session, user_salon1.id, product1.id)
+    await place_order(
+        session, user_salon1.id, name="John", phone="+123", address="addr",
+        delivery_type="delivery", payment_method="cash",
+    )
+    assert await reconcile_orders_count(session, fix=False) == {}
+
+    await session.execute(update(Salon).where(Salon.id == salon_id).values(orders_count=7))
+    await session.commit()
+
+    assert await reconcile_orders_count(session, fix=False) == {salon_id: (7, 1)}
+    assert await reconcile_orders_count(session) == {salon_id: (7, 1)}
+    assert await session.scalar(select(Salon.orders_count).where(Salon.id == salon_id)) == 1
+
+
+@pytest.mark.asyncio
+async def test_orders_keyset_pagination_and_filters(session, sample_data):
+    from datetime import datetime, timedelta
+
+    from database.models import Order
+    from database.orm_query import orm_get_orders_page
+    from handlersadmin.orders import OrdersPageCallBack, orders_kb
+
+    salon, user_salon, _ = sample_data
+    base = datetime(2025, 1, 1, 12, 0)
+    for i in range(25):
+        session.add(
+            Order(
+                user_salon_id=user_salon.id,
+                name="John",
+                phone="+1",
+                delivery_type="delivery",
+                payment_method="cash",
+                status="DONE" if i % 5 == 0 else "NEW",
+                total=i,
+                # пары с одинаковым created проверяют tie-break по id
+                created=base + timedelta(minutes=i // 2),
+            )
+        )
+    await session.commit()
+
+    seen = []
+    page = await orm_get_orders_page(session, salon.id, limit=10)
+    assert not page.has_newer
+    while True:
+        seen.extend(row.id for row in page.items)
+        if not page.has_older:
+            break
+        last = page.items[-1]
+        page = await orm_get_orders_page(session, salon.id, after=(last.created, last.id), limit=10)
+    assert len(seen) == 25 and len(set(seen)) == 25
+    created = [(o.created, o.id) for o in (await session.execute(select(Order))).scalars()]
+    assert seen == [oid for _, oid in sorted(created, reverse=True)]
+
+    # назад к новым от последней страницы
+    first = page.items[0]
+    newer = await orm_get_orders_page(session, salon.id, before=(first.created, first.id), limit=10)
+    assert [row.id for row in newer.items] == seen[10:20]
+    assert newer.has_newer and newer.has_older
+
+    done = await orm_get_orders_page(session, salon.id, status="DONE", limit=10)
+    assert len(done.items) == 5 and {row.status for row in done.items} == {"DONE"}
+
+    recent = await orm_get_orders_page(
+        session, salon.id, created_from=base + timedelta(minutes=10), limit=10
+    )
+    assert len(recent.items) == 5
+
+    kb = orders_kb(page, OrdersPageCallBack(), salon)
+    callbacks = [b.callback_data for row in kb.inline_keyboard for b in row if b.callback_data]
+    assert all(len(c.encode()) <= 64 for c in callbacks)
@@ -0,0 +1,83 @@
+"""Постраничная выборка товаров на стороне БД."""
+
+import pytest
+
+from database.models import Product
+from database.orm_query import orm_get_product_position, orm_get_products_page
+from handlers.menu_processing import products
+from utils.paginator import Paginator
+
+
+async def _add_products(session, salon, category_id, count):
+    items = [
+        Product(
+            name=f"P{i}",
+            description="",
+            price=i,
+            image="",
+            category_id=category_id,
+            salon_id=salon.id,
+        )
+        for i in range(count)
+    ]
+    session.add_all(items)
+    await session.commit()
+    return items
+
+
+@pytest.mark.asyncio
+async def test_products_page_returns_only_requested_slice(session, sample_data):
+    salon, _, product = sample_data
+    extra = await _add_products(session, salon, product.category_id, 6)
+
+    page = await orm_get_products_page(session, salon.id, product.category_id, page=2, per_page=3)
+    assert page.total == 7
+    assert page.page == 2
+    assert [p.id for p in page.items] == [p.id for p in extra[2:5]]
+
+
+@pytest.mark.asyncio
+async def test_products_page_clamps_past_the_end(session, sample_data):
+    salon, _, product = sample_data
+    await _add_products(session, salon, product.category_id, 3)
+
+    page = await orm_get_products_page(session, salon.id, product.category_id, page=10, per_page=3)
+    assert page.page == 2
+    assert page.total == 4
+    assert len(page.items) == 1
+
+    empty = await orm_get_products_page(session, salon.id, 9999, page=3, per_page=3)
+    assert empty == ([], 0, 1)
+
+
+@pytest.mark.asyncio
+async def test_product_position_uses_listing_order(session, sample_data):
+    salon, _, product = sample_data
+    extra = await _add_products(session, salon, product.category_id, 4)
+
+    assert await orm_get_product_position(session, product.id, salon.id, product.category_id) == 1
+    assert await orm_get_product_position(session, extra[2].id, salon.id, product.category_id) == 4
+    assert await orm_get_product_position(session, extra[2].id, salon.id, 9999) is None
+
+
+def test_paged_paginator_uses_total() -> None:
+    paginator = Paginator(["d", "e", "f"], page=2, per_page=3, total=8)
+    assert paginator.get_page() == ["d", "e", "f"]
+    assert paginator.pages == 3
+    assert paginator.has_next() == 3
+    assert paginator.has_previous() == 1
+    with pytest.raises(IndexError):
+        paginator.get_next()
+
+
+@pytest.mark.asyncio
+async def test_product_detail_opens_requested_product(session, sample_data):
+    salon, _, product = sample_data
+    extra = await _add_products(session, salon, product.category_id, 4)
+
+    image, kbds = await products(
+        session, 2, "product_detail", product.category_id, 1, extra[1].id, salon.id
+    )
+    # Товар без фото — вместо InputMediaPhoto приходит текст
+    assert extra[1].name in image
+    assert "Товар 3 из 5" in image
@@ -0,0 +1,104 @@
+"""
+Регрессия планов запросов: горячие функции orm_query идут по индексам,
+а не полным сканированием таблиц (EXPLAIN QUERY PLAN в SQLite).
+"""
+
+import re
+
+import pytest
+
+from database.catalog_cache import catalog_cache
+from database.checkout import place_order
+from database.orm_query import (
+    orm_add_to_cart,
+    orm_get_categories,
+    orm_get_order,
+    orm_get_orders,
+    orm_get_product_position,
+    orm_get_products_page,
+    orm_get_cart_summary,
+    orm_get_user_carts,
+)
+
+HOT_TABLES = {"product", "category", "banner", "cart", "orders", "order_item", "user_salon"}
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+
+
+async def _plans(session, statements) -> list[str]:
+    """Планы выполненных с прошлого вызова SELECT-ов; лог запросов очищается."""
+    conn = await session.connection()
+    details: list[str] = []
+    for statement, parameters in list(statements):
+        if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            continue
+        result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        details.extend(row[-1] for row in result.all())
+    statements.clear()
+    return details
+
+
+def _assert_no_full_scans(details: list[str]) -> None:
+    scans = [d for d in details if (m := FULL_SCAN.match(d)) and m.group(1) in HOT_TABLES]
+    assert not scans, f"full table scans: {scans}\nplan: {details}"
+
+
+def _assert_uses(details: list[str], index: str) -> None:
+    assert any(index in d for d in details), f"{index} not used; plan: {details}"
+
+
+@pytest.mark.asyncio
+async def test_catalog_queries_use_indexes(session, sample_data, statements):
+    salon, _, product = sample_data
+    statements.clear()
+
+    await orm_get_categories(session, salon.id)
+    details = await _plans(session, statements)
+    _assert_no_full_scans(details)
+    _assert_uses(details, "ix_category_salon_id")
+
+    await orm_get_products_page(session, salon.id, product.category_id, page=1, per_page=3)
+    details = await _plans(session, statements)
+    _assert_no_full_scans(details)
+    _assert_uses(details, "ix_product_salon_category")
+
+    await orm_get_product_position(session, product.id, salon.id, product.category_id)
+    details = await _plans(session, statements)
+    _assert_no_full_scans(details)
+    _assert_uses(details, "ix_product_salon_category")
+
+    await catalog_cache.get(session, salon.id)
+    details = await _plans(session, statements)
+    _assert_no_full_scans(details)
+    _assert_uses(details, "ix_banner_salon_id")
+
+
+@pytest.mark.asyncio
+async def test_cart_and_order_queries_use_indexes(session, sample_data, statements):
+    salon, user_salon, product = sample_data
+    await orm_add_to_cart(session, user_salon.id, product.id)
+    order = await place_order(
+        session, user_salon.id, name="John", phone="+123", address="addr",
+        delivery_type="delivery", payment_method="cash",
+    )
+    statements.clear()
+
+    await orm_get_user_carts(session, user_salon.id)
+    details = await _plans(session, statements)
+    _assert_no_full_scans(details)
+    _assert_uses(details, "ix_cart_user_salon_product")
+
+    await orm_get_cart_summary(session, user_salon.id)
+    details = await _plans(session, statements)
+    _assert_no_full_scans(details)
+    _assert_uses(details, "ix_cart_user_salon_product")
+
+    await orm_get_orders(session, salon.id)
+    details = await _plans(session, statements)
+    _assert_no_full_scans(details)
+    _assert_uses(details, "ix_user_salon_salon_id")
+    _assert_uses(details, "ix_orders_user_salon_created")
+
+    await orm_get_order(session, order.order_id, salon.id)
+    details = await _plans(session, statements)
+    _assert_no_full_scans(details)
+    _assert_uses(details, "ix_order_item_order_id")
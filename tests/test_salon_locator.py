@@ -0,0 +1,33 @@
+"""Сортировка салонов по расстоянию до пользователя на общем снапшоте координат."""
+
+import pytest
+
+from database.delivery_zones import delivery_pricing
+from database.models import Salon
+from database.repositories import SalonRepository
+from database.salon_locator import salon_locator
+
+
+@pytest.mark.asyncio
+async def test_locator_shares_the_delivery_snapshot(session):
+    salons = [
+        Salon(name=f"S{i}", slug=f"s{i}", currency="RUB", timezone="UTC", latitude=lat, longitude=lon)
+        for i, (lat, lon) in enumerate([(55.75, 37.61), (55.76, 37.64), (59.93, 30.31)])
+    ]
+    salons.append(Salon(name="Nowhere", slug="nowhere", currency="RUB", timezone="UTC"))
+    session.add_all(salons)
+    await session.commit()
+    ids = [s.id for s in salons]
+    loads = delivery_pricing.loads
+
+    assert await salon_locator.order_by_distance(session, 55.75, 37.61, ids[::-1]) == [
+        ids[0], ids[1], ids[2], ids[3]
+    ]
+
+    await SalonRepository(session).update_location(ids[2], 55.751, 37.611)
+    assert await salon_locator.order_by_distance(session, 55.76, 37.64, ids[::-1]) == [
+        ids[1], ids[2], ids[0], ids[3]
+    ]
+    # поиск и тарификация читают один снапшот: перенос салона перечитывает его один раз
+    assert (await delivery_pricing.get(session)).location(ids[2]) == (55.751, 37.611)
+    assert delivery_pricing.loads == loads + 2
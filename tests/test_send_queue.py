@@ -0,0 +1,129 @@
+"""Очередь отправки: приоритеты, лимиты на чат, flood wait, ошибки API."""
+
+import asyncio
+import time
+
+import pytest
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from utils.send_queue import Priority, SendQueue, TokenBucket
+
+
+class FakeBot:
+    def __init__(self, fail: dict | None = None) -> None:
+        self.sent: list[tuple[int, str, float]] = []
+        self.fail = fail or {}
+
+    async def __call__(self, method):
+        error = self.fail.pop(method.text, None)
+        if error is not None:
+            raise error(method)
+        self.sent.append((method.chat_id, method.text, time.monotonic()))
+        return True
+
+
+def msg(chat_id: int, text: str) -> SendMessage:
+    return SendMessage(chat_id=chat_id, text=text)
+
+
+def test_token_bucket_delay():
+    now = [0.0]
+    bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0])
+    bucket.take()
+    bucket.take()
+    assert bucket.delay() == pytest.approx(0.5)
+    now[0] = 0.25
+    assert bucket.delay() == pytest.approx(0.25)
+    now[0] = 10
+    assert bucket.delay() == 0
+
+
+@pytest.mark.asyncio
+async def test_customer_lane_goes_first_and_chat_order_is_kept():
+    bot = FakeBot()
+    queue = SendQueue(chat_burst=5)
+    queue.enqueue(bot, msg(-100, "group 1"), priority=Priority.GROUP)
+    queue.enqueue(bot, msg(-100, "group 2"), priority=Priority.GROUP)
+    queue.enqueue(bot, msg(1, "customer"), priority=Priority.CUSTOMER)
+
+    await queue.stop()
+
+    assert [text for _, text, _ in bot.sent] == ["customer", "group 1", "group 2"]
+    assert queue.stats()["sent"] == 3
+
+
+@pytest.mark.asyncio
+async def test_per_chat_rate_does_not_hold_back_other_chats():
+    bot = FakeBot()
+    queue = SendQueue(private_rate=10, chat_burst=1)
+    started = time.monotonic()
+    for i in range(3):
+        queue.enqueue(bot, msg(1, f"a{i}"))
+    queue.enqueue(bot, msg(2, "b"))
+
+    await queue.stop()
+
+    times = {text: at - started for _, text, at in bot.sent}
+    assert times["a2"] >= 0.18
+    assert times["b"] < 0.05
+
+
+@pytest.mark.asyncio
+async def test_retry_after_freezes_chat_and_resends():
+    flood = lambda method: TelegramRetryAfter(method, "Too Many Requests", retry_after=0.2)  # noqa: E731
+    bot = FakeBot(fail={"first": flood})
+    queue = SendQueue()
+    started = time.monotonic()
+    queue.enqueue(bot, msg(1, "first"))
+    queue.enqueue(bot, msg(1, "second"))
+    queue.enqueue(bot, msg(2, "other"))
+
+    await queue.stop()
+
+    assert [text for _, text, _ in bot.sent] == ["other", "first", "second"]
+    assert bot.sent[1][2] - started >= 0.2
+    stats = queue.stats()
+    assert (stats["flood_waits"], stats["retried"], stats["sent"]) == (1, 1, 3)
+
+
+@pytest.mark.asyncio
+async def test_api_errors_are_counted_not_retried_and_overflow_is_dropped():
+    blocked = lambda method: TelegramForbiddenError(method, "bot was blocked by the user")  # noqa: E731
+    bot = FakeBot(fail={"blocked": blocked})
+    queue = SendQueue(maxsize=2)
+
+    assert queue.enqueue(bot, msg(1, "blocked"))
+    assert queue.enqueue(bot, msg(2, "ok"))
+    assert not queue.enqueue(bot, msg(3, "overflow"))
+    await queue.stop()
+
+    stats = queue.stats()
+    assert (stats["sent"], stats["failed"], stats["retried"], stats["dropped"]) == (1, 1, 0, 1)
+
+
+@pytest.mark.asyncio
+async def test_stop_drops_what_it_could_not_send_in_time():
+    bot = FakeBot()
+    queue = SendQueue(private_rate=1, chat_burst=1)
+    for i in range(3):
+        queue.enqueue(bot, msg(1, str(i)))
+
+    await queue.stop(timeout=0.1)
+    await asyncio.sleep(0)
+
+    assert len(bot.sent) == 1
+    assert queue.stats()["dropped"] == 2
+
+
+def test_from_env_clamps_rates_and_burst(monkeypatch):
+    monkeypatch.setenv("SEND_GLOBAL_RATE", "0.5")
+    monkeypatch.setenv("SEND_PRIVATE_RATE", "0")
+    monkeypatch.setenv("SEND_CHAT_BURST", "0.2")
+    queue = SendQueue.from_env()
+    assert queue._global.capacity == 1
+    assert queue.private_rate > 0
+    assert queue.chat_burst == 1
+
+    monkeypatch.setenv("SEND_GLOBAL_RATE", "-3")
+    assert SendQueue.from_env()._global.rate > 0
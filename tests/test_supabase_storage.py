@@ -0,0 +1,150 @@
+"""Загрузка фото в Supabase: поток без буферизации, дедупликация, пакетная загрузка."""
+
+import hashlib
+import io
+import json
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from PIL import Image
+
+from utils.images import process_image
+from utils import supabase_storage as storage
+from utils.http import HttpClient, HttpSettings
+
+PHOTOS = {"a": b"A" * 200_000, "b": b"B" * 1000, "a-copy": b"A" * 200_000}
+
+
+class FakeBot:
+    token = "42:TOKEN"
+
+    def __init__(self) -> None:
+        self.downloads: list[str] = []
+        self.session = SimpleNamespace(
+            api=SimpleNamespace(is_local=False, file_url=lambda token, path: f"tg://{path}"),
+            stream_content=self._stream,
+        )
+
+    async def download(self, file_id):
+        self.downloads.append(file_id)
+        return io.BytesIO(PHOTOS[file_id])
+
+    async def get_file(self, file_id):
+        return SimpleNamespace(file_path=file_id)
+
+    async def _stream(self, url, chunk_size=65536):
+        file_id = url.removeprefix("tg://")
+        self.downloads.append(file_id)
+        data = PHOTOS[file_id]
+        for i in range(0, len(data), chunk_size):
+            yield data[i:i + chunk_size]
+
+
+class FakeStorage:
+    """Минимальная имитация Storage REST API в памяти."""
+
+    def __init__(self) -> None:
+        self.objects: dict[str, bytes] = {}
+        self.chunked_uploads = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path.removeprefix("/storage/v1/object/")
+        if request.method == "POST" and path == "move":
+            body = json.loads(await request.aread())
+            if body["destinationKey"] in self.objects:
+                return httpx.Response(400, json={"error": "Duplicate"})
+            self.objects[body["destinationKey"]] = self.objects.pop(body["sourceKey"])
+            return httpx.Response(200)
+        if request.method == "POST":
+            if "content-length" not in request.headers:
+                self.chunked_uploads += 1
+            self.objects[path.removeprefix("bucket/")] = await request.aread()
+            return httpx.Response(200)
+        if request.method == "HEAD":
+            key = path.removeprefix("public/bucket/")
+            return httpx.Response(200 if key in self.objects else 404)
+        if request.method == "DELETE":
+            for key in json.loads(await request.aread())["prefixes"]:
+                self.objects.pop(key, None)
+            return httpx.Response(200)
+        return httpx.Response(405)
+
+
+@pytest.fixture
+def fake_storage(monkeypatch):
+    backend = FakeStorage()
+    client = HttpClient(HttpSettings(backoff=0, http2=False), transport=httpx.MockTransport(backend))
+    monkeypatch.setattr(storage, "http_client", client)
+    monkeypatch.setattr(storage, "SUPABASE_URL", "https://sb.test")
+    monkeypatch.setattr(storage, "SUPABASE_API_KEY", "key")
+    monkeypatch.setattr(storage, "SUPABASE_BUCKET", "bucket")
+    monkeypatch.setattr(storage, "_upload_limit", None)
+    storage._uploaded.clear()
+    storage._product_photos.clear()
+    yield backend
+    storage._uploaded.clear()
+    storage._product_photos.clear()
+
+
+def _name(data: bytes) -> str:
+    return f"{hashlib.sha256(data).hexdigest()[:32]}.jpg"
+
+
+@pytest.mark.asyncio
+async def test_upload_streams_and_names_by_content_hash(fake_storage):
+    bot = FakeBot()
+    url = await storage.upload_photo_from_telegram(bot, "a", file_unique_id="ua")
+
+    assert url == f"https://sb.test/storage/v1/object/public/bucket/{_name(PHOTOS['a'])}"
+    assert fake_storage.objects == {_name(PHOTOS["a"]): PHOTOS["a"]}
+    assert fake_storage.chunked_uploads == 1
+
+
+@pytest.mark.asyncio
+async def test_duplicate_uploads_are_skipped(fake_storage):
+    bot = FakeBot()
+    first = await storage.upload_photo_from_telegram(bot, "a", file_unique_id="ua")
+    # то же фото Telegram — без скачивания
+    again = await storage.upload_photo_from_telegram(bot, "a", file_unique_id="ua")
+    # другое фото с тем же содержимым — один объект в хранилище
+    copy = await storage.upload_photo_from_telegram(bot, "a-copy", file_unique_id="ua2")
+
+    assert first == again == copy
+    assert bot.downloads == ["a", "a-copy"]
+    assert list(fake_storage.objects) == [_name(PHOTOS["a"])]
+
+
+@pytest.mark.asyncio
+async def test_batch_upload_isolates_failures(fake_storage):
+    bot = FakeBot()
+    results = await storage.upload_photos_from_telegram(
+        bot, [("a", "ua"), ("missing", "um"), ("b", "ub")]
+    )
+
+    assert results[0].endswith(_name(PHOTOS["a"]))
+    assert isinstance(results[1], KeyError)
+    assert results[2].endswith(_name(PHOTOS["b"]))
+    assert set(fake_storage.objects) == {_name(PHOTOS["a"]), _name(PHOTOS["b"])}
+
+
+@pytest.mark.asyncio
+async def test_product_photo_gets_compressed_main_and_thumbnail(fake_storage, monkeypatch):
+    out = io.BytesIO()
+    Image.new("RGB", (2000, 1000), (10, 120, 200)).save(out, "PNG")
+    monkeypatch.setitem(PHOTOS, "png", out.getvalue())
+
+    async def in_process(data):
+        return process_image(data)
+
+    monkeypatch.setattr(storage, "process_image_async", in_process)
+    bot = FakeBot()
+    image_url, thumb_url = await storage.upload_product_photo(bot, "png", file_unique_id="up")
+    again = await storage.upload_product_photo(bot, "png", file_unique_id="up")
+
+    assert again == (image_url, thumb_url)
+    assert bot.downloads == ["png"]
+    assert thumb_url.endswith("_thumb.jpg")
+    main_key, thumb_key = image_url.rsplit("/", 1)[1], thumb_url.rsplit("/", 1)[1]
+    assert set(fake_storage.objects) == {main_key, thumb_key}
+    assert Image.open(io.BytesIO(fake_storage.objects[thumb_key])).size == (320, 320)
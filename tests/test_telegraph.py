@@ -1,5 +1,3 @@
-from types import SimpleNamespace
-
 import pytest
 
 from utils import telegraph
@@ -21,13 +19,7 @@ class DummyClient:
         self.response = response
         self.calls = calls
 
-    async def __aenter__(self):
-        return self
-
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        return False
-
-    async def post(self, url, data):
+    async def post(self, url, data, **kwargs):
         self.calls.append((url, data))
         return self.response
 
@@ -38,12 +30,8 @@ async def test_create_telegraph_page_success(monkeypatch):
     payload = {"ok": True, "result": {"url": "https://telegra.ph/page"}}
     dummy_response = DummyResponse(payload)
 
-    def client_factory(**_: dict):
-        return DummyClient(dummy_response, calls)
-
-    dummy_httpx = SimpleNamespace(AsyncClient=client_factory)
     monkeypatch.setenv("TELEGRAPH_ACCESS_TOKEN", "token")
-    monkeypatch.setattr(telegraph, "httpx", dummy_httpx)
+    monkeypatch.setattr(telegraph, "http_client", DummyClient(dummy_response, calls))
 
     url = await telegraph.create_telegraph_page("Title", "Content")
 
@@ -0,0 +1,170 @@
+"""Вебхук-режим: фейковые апдейты через aiohttp-сервер, лимит параллелизма и drain."""
+
+import asyncio
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+from aiogram import Bot, Dispatcher, Router, types
+
+from utils.webhook import WEBHOOK_HANDLER_KEY, WebhookSettings, build_webhook_app
+
+SECRET = "s3cret"
+
+
+def make_update(update_id: int, text: str = "hi") -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": 1, "type": "private"},
+            "from": {"id": 1, "is_bot": False, "first_name": "Test"},
+            "text": text,
+        },
+    }
+
+
+class Probe:
+    """Хендлер, который считает одновременные вызовы и ждёт сигнала."""
+
+    def __init__(self) -> None:
+        self.release = asyncio.Event()
+        self.active = 0
+        self.peak = 0
+        self.seen: list[int] = []
+
+    async def handle(self, message: types.Message) -> None:
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await self.release.wait()
+            self.seen.append(message.message_id)
+        finally:
+            self.active -= 1
+
+
+def build(probe: Probe, **overrides):
+    router = Router()
+    router.message()(probe.handle)
+    dp = Dispatcher()
+    dp.include_router(router)
+    bot = Bot(token="42:TEST")
+    settings = WebhookSettings(secret=SECRET, **overrides)
+    return build_webhook_app(dp, bot, settings)
+
+
+async def post(client: TestClient, update: dict, secret: str = SECRET):
+    return await client.post(
+        "/webhook", json=update, headers={"X-Telegram-Bot-Api-Secret-Token": secret}
+    )
+
+
+async def wait_for(predicate, timeout: float = 2.0) -> None:
+    async def _poll():
+        while not predicate():
+            await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(_poll(), timeout)
+
+
+@pytest.mark.asyncio
+async def test_rejects_wrong_secret():
+    probe = Probe()
+    async with TestClient(TestServer(build(probe))) as client:
+        resp = await post(client, make_update(1), secret="wrong")
+        assert resp.status == 401
+    assert probe.seen == []
+
+
+@pytest.mark.asyncio
+async def test_updates_run_concurrently_within_limit():
+    probe = Probe()
+    app = build(probe, max_concurrency=3)
+    handler = app[WEBHOOK_HANDLER_KEY]
+    async with TestClient(TestServer(app)) as client:
+        for update_id in range(1, 11):
+            resp = await post(client, make_update(update_id))
+            assert resp.status == 200
+
+        await wait_for(lambda: probe.active == 3)
+        assert handler.pending == 10
+
+        probe.release.set()
+        await wait_for(lambda: len(probe.seen) == 10)
+
+        health = await (await client.get("/healthz")).json()
+
+    assert probe.peak == 3
+    assert sorted(probe.seen) == list(range(1, 11))
+    assert health["processed"] == 10 and health["pending"] == 0
+
+
+@pytest.mark.asyncio
+async def test_backpressure_returns_503():
+    probe = Probe()
+    app = build(probe, max_concurrency=1, max_pending=2)
+    async with TestClient(TestServer(app)) as client:
+        assert (await post(client, make_update(1))).status == 200
+        assert (await post(client, make_update(2))).status == 200
+        resp = await post(client, make_update(3))
+        assert resp.status == 503
+        assert resp.headers["Retry-After"] == "1"
+        probe.release.set()
+        await wait_for(lambda: len(probe.seen) == 2)
+    assert app[WEBHOOK_HANDLER_KEY].rejected == 1
+
+
+@pytest.mark.asyncio
+async def test_shutdown_drains_accepted_updates():
+    probe = Probe()
+    app = build(probe, max_concurrency=2)
+    handler = app[WEBHOOK_HANDLER_KEY]
+    client = TestClient(TestServer(app))
+    await client.start_server()
+    for update_id in range(1, 5):
+        assert (await post(client, make_update(update_id))).status == 200
+    await wait_for(lambda: probe.active == 2)
+
+    asyncio.get_running_loop().call_later(0.05, probe.release.set)
+    await client.close()
+
+    assert sorted(probe.seen) == [1, 2, 3, 4]
+    assert handler.stats()["processed"] == 4
+
+
+@pytest.mark.asyncio
+async def test_bot_session_closes_after_dispatcher_shutdown():
+    events: list[str] = []
+    dp = Dispatcher()
+    bot = Bot(token="42:TEST")
+
+    async def on_shutdown() -> None:
+        events.append("dispatcher")
+
+    async def close_session() -> None:
+        events.append("session")
+
+    dp.shutdown.register(on_shutdown)
+    bot.session.close = close_session
+    app = build_webhook_app(dp, bot, WebhookSettings(secret=SECRET))
+    async with TestClient(TestServer(app)):
+        pass
+
+    assert events == ["dispatcher", "session"]
+
+
+def test_settings_from_env():
+    settings = WebhookSettings.from_env(
+        {
+            "WEBHOOK_URL": "https://bot.example.com/",
+            "WEBHOOK_PATH": "tg",
+            "WEBHOOK_PORT": "9000",
+            "WEBHOOK_SECRET": "x",
+        }
+    )
+    assert settings.webhook_url == "https://bot.example.com/tg"
+    assert settings.port == 9000
+    assert "secret=***" in settings.describe()
+
+    settings = WebhookSettings.from_env({"WEBHOOK_MAX_CONCURRENCY": "0", "WEBHOOK_PORT": "x"})
+    assert (settings.max_concurrency, settings.port) == (1, 8080)
@@ -0,0 +1,110 @@
+"""Небольшие in-process кэши для горячих путей бота.
+
+Кэши данных из БД (каталог, язык и салоны пользователя, координаты салонов
+и зоны доставки) сбрасываются hook-ами инвалидации на путях записи. Сброс
+действует только в процессе, где прошла запись: другой воркер увидит
+изменение, когда истечёт TTL его кэша. Поэтому у каждого такого кэша есть
+переменная ``*_TTL`` — она и ограничивает, сколько другие воркеры могут
+отдавать устаревшие данные.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+class TTLCache(Generic[K, V]):
+    """Ограниченный LRU-кэш с необязательным временем жизни записей.
+
+    * ``maxsize`` — максимум записей; при переполнении вытесняется самая
+      давно использованная.
+    * ``ttl`` — время жизни записи в секундах (``None`` — без истечения).
+
+    Ведёт счётчики попаданий/промахов, чтобы их можно было отдавать в метрики.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: OrderedDict[K, tuple[float | None, V]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: K, default: Any = None) -> V | Any:
+        """Возвращает значение по ключу или ``default``, если его нет/истекло."""
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= self._clock():
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        """Кладёт значение; ``ttl`` переопределяет время жизни по умолчанию."""
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = self._clock() + ttl if ttl is not None else None
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: K, default: Any = None) -> V | Any:
+        """Удаляет запись и возвращает её значение."""
+        entry = self._data.pop(key, _MISSING)
+        if entry is _MISSING:
+            return default
+        return entry[1]
+
+    def clear(self) -> None:
+        """Полностью очищает кэш и обнуляет счётчики."""
+        self._data.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def __contains__(self, key: object) -> bool:
+        entry = self._data.get(key, _MISSING)  # type: ignore[arg-type]
+        if entry is _MISSING:
+            return False
+        expires_at = entry[0]
+        return expires_at is None or expires_at > self._clock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def hit_rate(self) -> float:
+        """Доля попаданий среди всех обращений (0.0, если обращений не было)."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict[str, float]:
+        """Снимок счётчиков для логов и метрик."""
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hit_rate, 4),
+        }
@@ -0,0 +1,211 @@
+"""Расчёт стоимости доставки по зонам салонов (векторно, NumPy).
+
+Зона салона — круг ``radius_km`` вокруг салона или многоугольник из точек
+``(lat, lon)``; цена в зоне — ``price + price_per_km * расстояние``. Зоны
+салона упорядочены по ``priority`` (затем по цене): точка тарифицируется
+первой зоной, в которую попала, — так задаются ступени «до 3 км», «до 7 км»
+или отдельный многоугольник центра города.
+
+Салон без зон доставляет куда угодно по старому тарифу
+:func:`utils.geo.calc_delivery_cost`.
+
+:class:`DeliveryPricing` один раз раскладывает координаты салонов, зоны и
+рёбра многоугольников в массивы; запрос — это haversine до всех салонов и
+проверка «точка в многоугольнике» одной векторной операцией по рёбрам тех
+зон, в габариты которых попала точка, без цикла по салонам в Python.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Iterable, Sequence
+
+import numpy as np
+
+
+EARTH_RADIUS_KM = 6371.0
+
+
+@dataclass(frozen=True, slots=True)
+class SalonPoint:
+    salon_id: int
+    latitude: float
+    longitude: float
+
+
+@dataclass(frozen=True, slots=True)
+class Zone:
+    salon_id: int
+    name: str
+    price: float
+    price_per_km: float = 0.0
+    priority: int = 0
+    radius_km: float | None = None
+    polygon: tuple[tuple[float, float], ...] | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class DeliveryQuote:
+    salon_id: int
+    distance_km: float
+    cost: int
+    zone: str | None = None
+
+
+def haversine_many(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Расстояния (км) от точки до массива точек; координаты в градусах."""
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class DeliveryPricing:
+    """Неизменяемый снимок салонов и зон, подготовленный для векторных запросов."""
+
+    def __init__(self, salons: Iterable[SalonPoint], zones: Iterable[Zone]) -> None:
+        salons = list(salons)
+        self.salon_ids = np.array([s.salon_id for s in salons], dtype=np.int64)
+        self.lats = np.array([s.latitude for s in salons], dtype=np.float64)
+        self.lons = np.array([s.longitude for s in salons], dtype=np.float64)
+        self._index = {salon_id: i for i, salon_id in enumerate(self.salon_ids.tolist())}
+
+        # зоны салонов без координат не к чему привязать
+        zones = sorted(
+            (z for z in zones if z.salon_id in self._index),
+            key=lambda z: (self._index[z.salon_id], z.priority, z.price),
+        )
+        self.zone_names = [z.name for z in zones]
+        self.zone_salon = np.array([self._index[z.salon_id] for z in zones], dtype=np.int64)
+        self.zone_price = np.array([z.price for z in zones], dtype=np.float64)
+        self.zone_per_km = np.array([z.price_per_km for z in zones], dtype=np.float64)
+        self.zone_radius = np.array(
+            [np.nan if z.radius_km is None else z.radius_km for z in zones], dtype=np.float64
+        )
+        # зоны салона i — срез zone_offsets[i]:zone_offsets[i + 1]
+        self.zone_offsets = np.searchsorted(self.zone_salon, np.arange(len(salons) + 1))
+        self.has_zones = np.diff(self.zone_offsets) > 0
+
+        # рёбра многоугольников подряд по зонам + габариты зоны для отсева
+        edges: list[tuple[float, float, float, float]] = []
+        edge_offsets = [0]
+        bbox = np.full((len(zones), 4), np.nan)
+        for zone_no, zone in enumerate(zones):
+            if zone.radius_km is None and zone.polygon and len(zone.polygon) >= 3:
+                ring = list(zone.polygon)
+                edges.extend(
+                    (a_lat, a_lon, b_lat, b_lon)
+                    for (a_lat, a_lon), (b_lat, b_lon) in zip(ring, ring[1:] + ring[:1])
+                )
+                ring_lats, ring_lons = zip(*ring)
+                bbox[zone_no] = (min(ring_lats), max(ring_lats), min(ring_lons), max(ring_lons))
+            edge_offsets.append(len(edges))
+        self.edges = np.array(edges, dtype=np.float64).reshape(-1, 4)
+        self.edge_offsets = np.array(edge_offsets, dtype=np.int64)
+        self.zone_bbox = tuple(np.ascontiguousarray(bbox[:, k]) for k in range(4))
+
+    def __len__(self) -> int:
+        return len(self.salon_ids)
+
+    def location(self, salon_id: int) -> tuple[float, float] | None:
+        """Координаты салона в снапшоте; ``None`` — салона в нём нет."""
+        i = self._index.get(salon_id)
+        return None if i is None else (float(self.lats[i]), float(self.lons[i]))
+
+    def _inside_polygons(self, lat: float, lon: float, zones: np.ndarray) -> np.ndarray:
+        """Для каждой из ``zones``: лежит ли точка в её многоугольнике (ray casting)."""
+        inside = np.zeros(len(zones), dtype=bool)
+        min_lat, max_lat, min_lon, max_lon = (self.zone_bbox[k][zones] for k in range(4))
+        near = np.flatnonzero((min_lat <= lat) & (lat <= max_lat) & (min_lon <= lon) & (lon <= max_lon))
+        if not len(near):
+            return inside
+        starts = self.edge_offsets[zones[near]]
+        counts = self.edge_offsets[zones[near] + 1] - starts
+        owner = np.repeat(np.arange(len(near)), counts)
+        # номера рёбер всех отобранных зон без цикла: start зоны + сдвиг внутри неё
+        shift = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        edge_idx = starts[owner] + shift
+        lat1, lon1, lat2, lon2 = self.edges[edge_idx].T
+        crosses = (lat1 > lat) != (lat2 > lat)
+        dlat = np.where(crosses, lat2 - lat1, 1.0)
+        hits = crosses & (lon < lon1 + (lat - lat1) * (lon2 - lon1) / dlat)
+        inside[near] = np.bincount(owner, weights=hits, minlength=len(near)) % 2 == 1
+        return inside
+
+    def _candidates(self, salon_ids: Sequence[int] | None) -> tuple[np.ndarray, np.ndarray]:
+        """Индексы салонов и их зон, по которым идёт расчёт."""
+        if salon_ids is None:
+            return np.arange(len(self)), np.arange(len(self.zone_names))
+        salons = np.array(
+            sorted({self._index[i] for i in salon_ids if i in self._index}), dtype=np.int64
+        )
+        ranges = [np.arange(self.zone_offsets[i], self.zone_offsets[i + 1]) for i in salons]
+        zones = np.concatenate(ranges) if ranges else np.empty(0, dtype=np.int64)
+        return salons, zones.astype(np.int64)
+
+    def quotes(
+        self,
+        lat: float,
+        lon: float,
+        salon_ids: Sequence[int] | None = None,
+        limit: int | None = None,
+        max_km: float | None = None,
+    ) -> list[DeliveryQuote]:
+        """
+        Салоны (все или из ``salon_ids``), доставляющие в точку, от ближайшего.
+
+        ``max_km`` ограничивает салоны без зон: они «доставляют куда угодно»,
+        а у салонов с зонами дальность задают сами зоны.
+        """
+        salons, zones = self._candidates(salon_ids)
+        if not len(salons):
+            return []
+        distances = np.zeros(len(self))
+        distances[salons] = haversine_many(lat, lon, self.lats[salons], self.lons[salons])
+
+        matched = zones[
+            (self.zone_radius[zones] >= distances[self.zone_salon[zones]])
+            | self._inside_polygons(lat, lon, zones)
+        ]
+        # зоны отсортированы по салону и приоритету: первая совпавшая у салона — его тариф
+        zoned, first = np.unique(self.zone_salon[matched], return_index=True)
+        matched = matched[first]
+        # салоны без зон — по старому тарифу (как calc_delivery_cost)
+        zoneless = salons[~self.has_zones[salons]]
+        if max_km is not None:
+            zoneless = zoneless[distances[zoneless] <= max_km]
+
+        found = np.concatenate([zoned, zoneless])
+        zone_of = np.concatenate([matched, np.full(len(zoneless), -1, dtype=np.int64)])
+        costs = np.concatenate([
+            np.ceil(self.zone_price[matched] + self.zone_per_km[matched] * distances[zoned]),
+            np.maximum(1, np.ceil(distances[zoneless])),
+        ])
+
+        order = np.argsort(distances[found], kind="stable")[:limit]
+        return [
+            DeliveryQuote(
+                salon_id=int(self.salon_ids[found[i]]),
+                distance_km=float(distances[found[i]]),
+                cost=int(costs[i]),
+                zone=self.zone_names[zone_of[i]] if zone_of[i] >= 0 else None,
+            )
+            for i in order
+        ]
+
+    def quote(self, salon_id: int, lat: float, lon: float) -> DeliveryQuote | None:
+        """Цена доставки салона в точку; ``None`` — точка вне его зон (или салона нет)."""
+        found = self.quotes(lat, lon, [salon_id], limit=1)
+        return found[0] if found else None
+
+    def nearest(
+        self,
+        lat: float,
+        lon: float,
+        salon_ids: Sequence[int] | None = None,
+        max_km: float | None = None,
+    ) -> DeliveryQuote | None:
+        """Ближайший салон, который доставляет в точку (``max_km`` — как в :meth:`quotes`)."""
+        found = self.quotes(lat, lon, salon_ids, limit=1, max_km=max_km)
+        return found[0] if found else None
@@ -0,0 +1,25 @@
+"""Числовые настройки из переменных окружения для кэшей и фоновых сервисов."""
+
+from __future__ import annotations
+
+import logging
+import os
+from typing import Mapping
+
+logger = logging.getLogger(__name__)
+
+
+def env_number(name: str, default: float, env: Mapping[str, str] | None = None) -> float:
+    """Число из ``name``; пустое или нечисловое значение — ``default`` с предупреждением в лог.
+
+    ``env`` — источник вместо ``os.environ`` (настройки, которые собираются из
+    переданного словаря, например в тестах).
+    """
+    raw = (os.environ if env is None else env).get(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        return float(raw)
+    except ValueError:
+        logger.warning("Invalid %s=%r, using %s", name, raw, default)
+        return default
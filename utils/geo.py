@@ -1,6 +1,136 @@
-import httpx
-import requests
+"""Геокодирование через Nominatim и расчёт расстояния/стоимости доставки.
+
+:class:`Geocoder` — асинхронный клиент Nominatim:
+
+* запросы идут через общий пул :data:`utils.http.http_client`;
+* LRU+TTL-кэш обратного геокодирования по координатам, округлённым до
+  ``GEOCODE_PRECISION`` знаков (4 знака ≈ 11 м);
+* одинаковые одновременные запросы склеиваются в один;
+* не чаще одного запроса в ``GEOCODE_MIN_INTERVAL`` секунд — политика
+  публичного Nominatim (1 rps).
+
+Адрес сервиса задаётся ``NOMINATIM_URL`` (например, свой инстанс или
+локальная заглушка в тестах).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
 from math import radians, cos, sin, asin, sqrt, ceil
+from typing import Any, Awaitable, Callable, Hashable
+
+from utils.cache import TTLCache
+from utils.env import env_number
+from utils.http import HttpClient, http_client
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NOMINATIM_URL = "https://nominatim.openstreetmap.org"
+USER_AGENT = "pizza-bot/1.0"
+
+
+class Geocoder:
+    """Асинхронный клиент Nominatim с кэшем, склейкой запросов и троттлингом."""
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_NOMINATIM_URL,
+        *,
+        user_agent: str = USER_AGENT,
+        timeout: float = 7.0,
+        min_interval: float = 1.0,
+        precision: int = 4,
+        cache_ttl: float | None = 24 * 3600,
+        cache_size: int = 10_000,
+        client: HttpClient | None = None,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self.min_interval = min_interval
+        self.precision = precision
+        self.client = client or http_client
+        self._cache: TTLCache[Hashable, Any] = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self._throttle_lock = asyncio.Lock()
+        self._last_request = 0.0
+        self.requests = 0
+
+    async def reverse(self, lat: float, lon: float) -> str | None:
+        """Короткий адрес по координатам или ``None``, если он не найден."""
+        key = ("reverse", round(lat, self.precision), round(lon, self.precision))
+        return await self._cached(key, lambda: self._reverse(key[1], key[2]))
+
+    async def search(self, address: str) -> tuple[float, float] | None:
+        """Координаты ``(lat, lon)`` по адресу или ``None``."""
+        key = ("search", " ".join(address.lower().split()))
+        return await self._cached(key, lambda: self._search(address))
+
+    async def _cached(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        if key in self._cache:
+            return self._cache.get(key)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch_and_store(key, fetch))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield: отмена одного ожидающего не отменяет запрос для остальных
+        return await asyncio.shield(task)
+
+    async def _fetch_and_store(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        result = await fetch()
+        if result is not None:
+            self._cache.set(key, result)
+        return result
+
+    async def _get(self, path: str, params: dict[str, Any]) -> Any:
+        async with self._throttle_lock:
+            wait = self._last_request + self.min_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._last_request = time.monotonic()
+            self.requests += 1
+        response = await self.client.get(
+            f"{self.base_url}{path}",
+            params=params,
+            headers={"User-Agent": self.user_agent},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def _reverse(self, lat: float, lon: float) -> str | None:
+        params = {"format": "json", "lat": lat, "lon": lon, "zoom": 18, "addressdetails": 1}
+        try:
+            data = await self._get("/reverse", params)
+        except Exception as e:
+            logger.warning("Ошибка при получении адреса: %s", e)
+            return None
+        # передаем не весь data, а только address, но prettify_address работает и с data
+        return prettify_address(data) or data.get("display_name")
+
+    async def _search(self, address: str) -> tuple[float, float] | None:
+        try:
+            data = await self._get("/search", {"q": address, "format": "json", "limit": 1})
+        except Exception as e:
+            logger.warning("Ошибка геокодирования адреса: %s", e)
+            return None
+        if data:
+            return float(data[0]["lat"]), float(data[0]["lon"])
+        return None
+
+    def stats(self) -> dict[str, Any]:
+        return {"requests": self.requests, "inflight": len(self._inflight), "cache": self._cache.stats()}
+
+
+geocoder = Geocoder(
+    os.getenv("NOMINATIM_URL") or DEFAULT_NOMINATIM_URL,
+    min_interval=env_number("GEOCODE_MIN_INTERVAL", 1.0),
+    precision=int(env_number("GEOCODE_PRECISION", 4)),
+)
 
 
 async def geocode_address(address: str) -> tuple[float, float] | None:
@@ -8,21 +138,7 @@ async def geocode_address(address: str) -> tuple[float, float] | None:
     Асинхронное геокодирование адреса (название улицы, города и т.д.) через Nominatim API.
     Возвращает (latitude, longitude) или None.
     """
-    url = "https://nominatim.openstreetmap.org/search"
-    params = {
-        "q": address,
-        "format": "json",
-        "limit": 1,
-    }
-
-    async with httpx.AsyncClient(timeout=10) as client:
-        response = await client.get(url, params=params, headers={"User-Agent": "telegram-bot"})
-        data = response.json()
-        if data:
-            lat = float(data[0]["lat"])
-            lon = float(data[0]["lon"])
-            return lat, lon
-        return None
+    return await geocoder.search(address)
 
 
 def haversine(lat1, lon1, lat2, lon2):
@@ -67,31 +183,6 @@ def prettify_address(address_json):
     return ", ".join(parts) if parts else None
 
 
-
-
-def get_address_from_coords(lat, lon):
-    url = "https://nominatim.openstreetmap.org/reverse"
-    params = {
-        "format": "json",
-        "lat": lat,
-        "lon": lon,
-        "zoom": 18,
-        "addressdetails": 1,
-    }
-    headers = {
-        "User-Agent": "pizza-bot/1.0"
-    }
-    try:
-        resp = requests.get(url, params=params, headers=headers, timeout=7)
-        data = resp.json()
-        # передаем не весь data, а только address, но твой prettify_address работает и с data
-        short_addr = prettify_address(data)
-        if short_addr:
-            return short_addr
-        # если не удалось — возвращаем полный адрес
-        return data.get("display_name")
-    except Exception as e:
-        print(f"Ошибка при получении адреса: {e}")
-        return None
-
-
+async def get_address_from_coords(lat: float, lon: float) -> str | None:
+    """Короткий адрес по координатам (через кэш :data:`geocoder`)."""
+    return await geocoder.reverse(lat, lon)
@@ -0,0 +1,201 @@
+"""Общий исходящий HTTP-клиент для интеграций (Telegraph, Nominatim, Supabase).
+
+Один ``httpx.AsyncClient`` на процесс вместо клиента на каждый вызов:
+keep-alive и HTTP/2 (если установлен ``h2``) экономят TLS-рукопожатия.
+Поверх пула — ограничение одновременных запросов на хост, таймауты и
+повторы с экспоненциальной задержкой.
+
+Повторяются ошибки соединения/таймауты и ответы 429/5xx, но для
+неидемпотентных методов (POST, PATCH) — только если запрос заведомо не
+дошёл до сервера (ошибка установления соединения). ``Retry-After``
+учитывается.
+
+Открывается в ``on_startup`` и закрывается в ``on_shutdown``; до этого
+клиент создаётся лениво при первом запросе, поэтому скрипты и тесты
+работают без явного старта.
+
+Настройки окружения: ``HTTP_TIMEOUT``, ``HTTP_CONNECT_TIMEOUT``,
+``HTTP_MAX_CONNECTIONS``, ``HTTP_PER_HOST_LIMIT``, ``HTTP_RETRIES``,
+``HTTP_BACKOFF``, ``HTTP2``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+from dataclasses import dataclass
+from typing import Any
+from urllib.parse import urlsplit
+
+import httpx
+
+from utils.env import env_number
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+try:  # HTTP/2 нужен пакет h2
+    import h2  # noqa: F401
+except ImportError:  # pragma: no cover - h2 входит в requirements
+    _HTTP2_AVAILABLE = False
+else:
+    _HTTP2_AVAILABLE = True
+
+
+@dataclass(frozen=True)
+class HttpSettings:
+    timeout: float = 10.0
+    connect_timeout: float = 5.0
+    max_connections: int = 100
+    max_keepalive: int = 20
+    per_host_limit: int = 10
+    retries: int = 2
+    backoff: float = 0.5
+    max_backoff: float = 10.0
+    http2: bool = True
+
+    @classmethod
+    def from_env(cls) -> "HttpSettings":
+        return cls(
+            timeout=env_number("HTTP_TIMEOUT", cls.timeout),
+            connect_timeout=env_number("HTTP_CONNECT_TIMEOUT", cls.connect_timeout),
+            max_connections=max(1, int(env_number("HTTP_MAX_CONNECTIONS", cls.max_connections))),
+            per_host_limit=max(1, int(env_number("HTTP_PER_HOST_LIMIT", cls.per_host_limit))),
+            retries=max(0, int(env_number("HTTP_RETRIES", cls.retries))),
+            backoff=env_number("HTTP_BACKOFF", cls.backoff),
+            http2=os.getenv("HTTP2", "1").lower() not in {"0", "false", "no"},
+        )
+
+
+class HttpClient:
+    """Пул соединений с лимитами на хост и повторами."""
+
+    def __init__(
+        self,
+        settings: HttpSettings | None = None,
+        *,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self.settings = settings or HttpSettings()
+        self._transport = transport
+        self._client: httpx.AsyncClient | None = None
+        self._host_limits: dict[str, asyncio.Semaphore] = {}
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            s = self.settings
+            self._client = httpx.AsyncClient(
+                http2=s.http2 and _HTTP2_AVAILABLE,
+                timeout=httpx.Timeout(s.timeout, connect=s.connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=s.max_connections,
+                    max_keepalive_connections=s.max_keepalive,
+                ),
+                transport=self._transport,
+            )
+        return self._client
+
+    async def start(self) -> None:
+        self.client  # noqa: B018 - создаём пул заранее
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._host_limits.clear()
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = self._host_limits[host] = asyncio.Semaphore(self.settings.per_host_limit)
+        return limit
+
+    def _delay(self, attempt: int, response: httpx.Response | None) -> float:
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), self.settings.max_backoff)
+        delay = self.settings.backoff * (2 ** attempt)
+        return min(delay, self.settings.max_backoff) * random.uniform(0.5, 1.0)
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        retries: int | None = None,
+        idempotent: bool | None = None,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """
+        Выполняет запрос с повторами. Ошибочный финальный статус не
+        поднимает исключение — проверяйте ``raise_for_status()`` сами.
+
+        ``idempotent=True`` разрешает повторять POST, который безопасно
+        выполнить дважды (например, загрузку с upsert).
+        """
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        attempts = 1 + (self.settings.retries if retries is None else retries)
+        limit = self._host_limit(url)
+
+        for attempt in range(attempts):
+            last = attempt == attempts - 1
+            response = None
+            try:
+                async with limit:
+                    self.requests += 1
+                    response = await self.client.request(method, url, **kwargs)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout):
+                # запрос не ушёл на сервер — безопасно повторить любой метод
+                if last:
+                    self.failures += 1
+                    raise
+            except httpx.TransportError:
+                if last or not idempotent:
+                    self.failures += 1
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or last or not idempotent:
+                    return response
+                await response.aclose()
+
+            self.retries += 1
+            delay = self._delay(attempt, response)
+            logger.debug("Retry %s %s in %.2fs (attempt %d)", method, url, delay, attempt + 1)
+            await asyncio.sleep(delay)
+
+        raise AssertionError("unreachable")  # pragma: no cover
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def put(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("PUT", url, **kwargs)
+
+    async def delete(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("DELETE", url, **kwargs)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "failures": self.failures,
+            "hosts": len(self._host_limits),
+        }
+
+
+http_client = HttpClient(HttpSettings.from_env())
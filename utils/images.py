@@ -0,0 +1,87 @@
+"""Подготовка фото товаров перед загрузкой: пережатие и превью.
+
+Декодирование и ресайз — чистая CPU-работа, поэтому :func:`process_image`
+выполняется в пуле процессов (:func:`process_image_async`) и не держит
+event loop. Пул создаётся лениво, размер — ``IMAGE_WORKERS`` (по
+умолчанию 2), закрывается :func:`shutdown_image_pool` в ``on_shutdown``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+from PIL import Image, ImageOps
+
+from utils.env import env_number
+
+MAIN_MAX_SIDE = 1280
+MAIN_QUALITY = 82
+THUMB_SIZE = 320
+THUMB_QUALITY = 70
+
+_executor: ProcessPoolExecutor | None = None
+
+
+class ProcessedImage(NamedTuple):
+    main: bytes
+    thumbnail: bytes
+    width: int
+    height: int
+
+
+def _to_rgb(image: Image.Image) -> Image.Image:
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB") if image.mode != "RGB" else image
+
+
+def _encode(image: Image.Image, quality: int) -> bytes:
+    out = io.BytesIO()
+    # без exif: метаданные камеры не нужны и только раздувают файл
+    image.save(out, "JPEG", quality=quality, optimize=True, progressive=True)
+    return out.getvalue()
+
+
+def process_image(data: bytes) -> ProcessedImage:
+    """
+    Возвращает JPEG не больше ``MAIN_MAX_SIDE`` по длинной стороне и
+    квадратное превью ``THUMB_SIZE``×``THUMB_SIZE`` (центральный кроп).
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        image = _to_rgb(ImageOps.exif_transpose(source))
+
+    main = image.copy()
+    main.thumbnail((MAIN_MAX_SIDE, MAIN_MAX_SIDE), Image.Resampling.LANCZOS)
+    thumb = ImageOps.fit(image, (THUMB_SIZE, THUMB_SIZE), Image.Resampling.LANCZOS)
+    return ProcessedImage(
+        main=_encode(main, MAIN_QUALITY),
+        thumbnail=_encode(thumb, THUMB_QUALITY),
+        width=main.width,
+        height=main.height,
+    )
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        workers = max(1, int(env_number("IMAGE_WORKERS", 2)))
+        _executor = ProcessPoolExecutor(max_workers=workers)
+    return _executor
+
+
+async def process_image_async(data: bytes) -> ProcessedImage:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), process_image, data)
+
+
+def shutdown_image_pool() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
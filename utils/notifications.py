@@ -1,11 +1,18 @@
+import logging
+
 from aiogram.types import (
     CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 )
 from aiogram.fsm.context import FSMContext
+from aiogram.methods import SendContact, SendMessage
 from sqlalchemy.ext.asyncio import AsyncSession
+from database.checkout import CheckoutResult
 from database.repositories import SalonRepository
 from database.models import UserSalon
 from utils.orders import get_order_summary
+from utils.send_queue import Priority, send_queue
+
+logger = logging.getLogger(__name__)
 
 
 def get_contact_kb(user_id: int) -> InlineKeyboardMarkup:
@@ -25,42 +32,70 @@ async def notify_salon_about_order(
     state: FSMContext,
     session: AsyncSession,
     user_salon_id: int,
+    order: CheckoutResult | None = None,
 ) -> None:
+    """
+    Ставит чек в очередь отправки в группу салона. С результатом ``place_order`` (``order``)
+    салон, клиент и позиции берутся из него, без повторных запросов к БД.
+    """
     data    = await state.get_data()
     user_id = callback.from_user.id
     phone   = data.get("phone") or "Нет номера"
 
     assert data.get("user_salon_id") is not None, "user_salon_id missing in FSM state"
 
-    user = await session.get(UserSalon, user_salon_id)
-    if not user or not user.salon_id:
-        print(f"[notify] salon_id не найден для user_id={user_id}")
-        return
+    if order is not None:
+        group_chat_id = order.group_chat_id
+        first_name = order.customer_first_name
+        if not group_chat_id:
+            logger.warning("group_chat_id не найден для salon_id=%s", order.salon_id)
+            return
+        group_summary = await get_order_summary(
+            session,
+            user_salon_id,
+            data,
+            for_group=True,
+            lines=order.lines,
+            currency_code=order.currency,
+        )
+    else:
+        user = await session.get(UserSalon, user_salon_id)
+        if not user or not user.salon_id:
+            logger.warning("salon_id не найден для user_id=%s", user_id)
+            return
 
-    repo = SalonRepository(session)
-    salon = await repo.get_by_id(user.salon_id)
-    if not salon or not salon.group_chat_id:
-        print(f"[notify] group_chat_id не найден для salon_id={user.salon_id}")
-        return
+        repo = SalonRepository(session)
+        salon = await repo.get_by_id(user.salon_id)
+        if not salon or not salon.group_chat_id:
+            logger.warning("group_chat_id не найден для salon_id=%s", user.salon_id)
+            return
+        group_chat_id = salon.group_chat_id
+        first_name = user.first_name
+        group_summary = await get_order_summary(
+            session, user.id, data, for_group=True
+        )
 
     # ---------- чек для группы салона ----------
-    group_summary = await get_order_summary(
-        session, user.id, data, for_group=True
-    )
-    await callback.bot.send_message(
-        salon.group_chat_id,
-        group_summary,
-        parse_mode="HTML",
-        reply_markup=get_contact_kb(user_id)
+    # отправляет фоновая очередь: хендлер не ждёт Telegram и не ловит 429
+    send_queue.enqueue(
+        callback.bot,
+        SendMessage(
+            chat_id=group_chat_id,
+            text=group_summary,
+            parse_mode="HTML",
+            reply_markup=get_contact_kb(user_id),
+        ),
+        priority=Priority.GROUP,
     )
 
     # ---------- контакт клиента ----------
     if phone and phone != "Нет номера":
-        try:
-            await callback.bot.send_contact(
-                chat_id=salon.group_chat_id,
+        send_queue.enqueue(
+            callback.bot,
+            SendContact(
+                chat_id=group_chat_id,
                 phone_number=phone,
-                first_name=user.first_name or "Клиент"
-            )
-        except Exception as e:
-            print(f"[notify] Ошибка отправки contact: {e}")
+                first_name=first_name or "Клиент",
+            ),
+            priority=Priority.GROUP,
+        )
@@ -1,7 +1,8 @@
-from typing import Dict, Optional
+from decimal import Decimal
+from typing import Dict, Optional, Sequence
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from database.orm_query import orm_get_user_carts
+from database.orm_query import CartLine, orm_get_cart_summary
 from database.repositories import SalonRepository
 from database.models import UserSalon
 from utils.currency import get_currency_symbol
@@ -11,23 +12,31 @@ async def get_order_summary(
     session: AsyncSession,
     user_salon_id: int,
     state_data: dict,
-    for_group: bool = False
+    for_group: bool = False,
+    lines: Optional[Sequence[CartLine]] = None,
+    currency_code: Optional[str] = None,
 ) -> str:
-    cart_items = await orm_get_user_carts(session, user_salon_id)
-    user_salon = await session.get(UserSalon, user_salon_id)
-    salon_id = user_salon.salon_id if user_salon else None
-    repo = SalonRepository(session)
-    salon = await repo.get_by_id(salon_id) if salon_id else None
-    currency = get_currency_symbol(salon.currency) if salon else "RUB"
+    """
+    Текст чека. Если переданы ``lines`` и ``currency_code`` (например, из
+    результата ``place_order``), корзина и салон из БД не читаются.
+    """
+    if lines is None:
+        cart = await orm_get_cart_summary(session, user_salon_id)
+        lines, total = cart.lines, cart.total
+    else:
+        total = sum((line.line_total for line in lines), Decimal(0))
+    if currency_code is None:
+        user_salon = await session.get(UserSalon, user_salon_id)
+        salon_id = user_salon.salon_id if user_salon else None
+        repo = SalonRepository(session)
+        salon = await repo.get_by_id(salon_id) if salon_id else None
+        currency_code = salon.currency if salon else None
+    currency = get_currency_symbol(currency_code) if currency_code else "RUB"
 
-    lines = []
-    total = 0
-    for item in cart_items:
-        item_cost = item.product.price * item.quantity
-        total += item_cost
-        lines.append(
-            f"- 🛒 {item.product.name} — {item.quantity} x {item.product.price:.0f}{currency} = {item_cost:.0f}{currency}"
-        )
+    text_lines = [
+        f"- 🛒 {line.name} — {line.quantity} x {line.price:.0f}{currency} = {line.line_total:.0f}{currency}"
+        for line in lines
+    ]
 
     delivery_cost = int(state_data.get("delivery_cost") or 0)
     delivery_type = state_data.get("delivery")
@@ -42,7 +51,7 @@ async def get_order_summary(
     total_with_delivery = total + delivery_cost
 
     text = "🆕 <b>Новый заказ!</b>\n\n"
-    text += "🛍 <b>Состав:</b>\n" + "\n".join(lines)
+    text += "🛍 <b>Состав:</b>\n" + "\n".join(text_lines)
     text += f"\n\n🚚 <b>Доставка:</b> {delivery_text}"
 
     if delivery_type == "delivery_pickup" and state_data.get("pickup_time"):
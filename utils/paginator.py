@@ -3,15 +3,27 @@ import math
 
 # Простой пагинатор
 class Paginator:
-    def __init__(self, array: list | tuple, page: int=1, per_page: int=1):
+    """Пагинатор по списку.
+
+    Два режима:
+
+    * в памяти — ``array`` содержит все элементы, страница вырезается срезом;
+    * постраничный (DB-backed) — передан ``total``, а ``array`` уже содержит
+      только элементы текущей страницы (например, из ``orm_get_products_page``).
+    """
+
+    def __init__(self, array: list | tuple, page: int=1, per_page: int=1, total: int | None = None):
         self.array = array
         self.per_page = per_page
         self.page = page
-        self.len = len(self.array)
+        self.is_paged = total is not None
+        self.len = total if self.is_paged else len(self.array)
         # math.ceil - округление в большую сторону до целого числа
         self.pages = math.ceil(self.len / self.per_page)
 
     def __get_slice(self):
+        if self.is_paged:
+            return self.array
         start = (self.page - 1) * self.per_page
         stop = start + self.per_page
         return self.array[start:stop]
@@ -31,13 +43,17 @@ class Paginator:
         return False
 
     def get_next(self):
+        if self.is_paged:
+            raise IndexError('Paged paginator holds only the current page. Load the next page from the DB.')
         if self.page < self.pages:
             self.page += 1
             return self.get_page()
         raise IndexError(f'Next page does not exist. Use has_next() to check before.')
 
     def get_previous(self):
+        if self.is_paged:
+            raise IndexError('Paged paginator holds only the current page. Load the previous page from the DB.')
         if self.page > 1:
             self.page -= 1
             return self.__get_slice()
-        raise IndexError(f'Previous page does not exist. Use has_previous() to check before.')
\ No newline at end of file
+        raise IndexError(f'Previous page does not exist. Use has_previous() to check before.')
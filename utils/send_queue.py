@@ -0,0 +1,329 @@
+"""Фоновая очередь исходящих уведомлений Telegram.
+
+Хендлер кладёт готовый метод (``SendMessage``, ``SendContact`` …) в
+очередь и сразу возвращается; отправкой занимается фоновый воркер:
+
+* лимиты — «ведро токенов» на весь бот (``SEND_GLOBAL_RATE``, по умолчанию
+  25 сообщений/с) и на каждый чат: личный — 1/с, группа — 20/мин
+  (``SEND_PRIVATE_RATE``, ``SEND_GROUP_RATE``, всплеск ``SEND_CHAT_BURST``);
+* ``TelegramRetryAfter`` — чат замораживается на ``retry_after`` секунд,
+  сообщение возвращается в начало своей полосы;
+* сетевые/серверные ошибки повторяются с экспоненциальной задержкой,
+  остальные ошибки API (бот заблокирован, неверный чат) — логируются и
+  считаются в ``failed``;
+* полосы приоритета: клиентские сообщения (:attr:`Priority.CUSTOMER`)
+  уходят раньше уведомлений в группы салонов (:attr:`Priority.GROUP`);
+* порядок внутри одного чата сохраняется.
+
+Воркер стартует лениво при первой постановке в очередь (или явно в
+``on_startup``); ``stop`` в ``on_shutdown`` дожидается отправки остатка.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Callable
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramAPIError,
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
+from aiogram.methods.base import TelegramMethod
+
+from utils.cache import TTLCache
+from utils.env import env_number
+
+logger = logging.getLogger(__name__)
+
+# Нижняя граница скоростей из окружения (сообщений в секунду): 0 и меньше
+# остановили бы отправку совсем
+MIN_RATE = 0.01
+
+
+class Priority(IntEnum):
+    CUSTOMER = 0
+    GROUP = 1
+
+
+class TokenBucket:
+    """``rate`` токенов в секунду, не больше ``capacity`` про запас."""
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if rate <= 0 or capacity < 1:
+            raise ValueError("rate must be positive and capacity at least 1")
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self) -> float:
+        """Сколько секунд ждать до свободного токена (0 — можно сейчас)."""
+        self._refill()
+        return 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+
+    def take(self) -> None:
+        self._refill()
+        self._tokens -= 1
+
+
+@dataclass
+class _Job:
+    bot: Bot
+    method: TelegramMethod[Any]
+    priority: Priority
+    enqueued_at: float
+    attempts: int = 0
+    chat_id: Any = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.chat_id = getattr(self.method, "chat_id", None)
+
+
+def _is_group(chat_id: Any) -> bool:
+    # у групп и каналов отрицательный id; "@username" — всегда канал/группа
+    return isinstance(chat_id, str) or (isinstance(chat_id, int) and chat_id < 0)
+
+
+class SendQueue:
+    def __init__(
+        self,
+        *,
+        global_rate: float = 25.0,
+        private_rate: float = 1.0,
+        group_rate: float = 20 / 60,
+        chat_burst: float = 3.0,
+        concurrency: int = 4,
+        max_retries: int = 5,
+        maxsize: int = 10_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.private_rate = private_rate
+        self.group_rate = group_rate
+        self.chat_burst = chat_burst
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.maxsize = maxsize
+        self._clock = clock
+        self._global = TokenBucket(global_rate, capacity=max(1.0, global_rate), clock=clock)
+        # ведро простаивающего чата всё равно было бы полным — его можно забыть
+        self._buckets: TTLCache[Any, TokenBucket] = TTLCache(maxsize=10_000, ttl=600, clock=clock)
+        self._not_before: dict[Any, float] = {}
+        self._lanes: dict[Priority, deque[_Job]] = {p: deque() for p in Priority}
+        self._in_flight: set[Any] = set()
+        self._tasks: set[asyncio.Task] = set()
+        self._worker: asyncio.Task | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._slots: asyncio.Semaphore | None = None
+
+        self.enqueued = 0
+        self.sent = 0
+        self.retried = 0
+        self.flood_waits = 0
+        self.failed = 0
+        self.dropped = 0
+        self.max_delay = 0.0
+
+    @classmethod
+    def from_env(cls) -> "SendQueue":
+        return cls(
+            global_rate=max(MIN_RATE, env_number("SEND_GLOBAL_RATE", 25.0)),
+            private_rate=max(MIN_RATE, env_number("SEND_PRIVATE_RATE", 1.0)),
+            group_rate=max(MIN_RATE, env_number("SEND_GROUP_RATE", 20 / 60)),
+            chat_burst=max(1.0, env_number("SEND_CHAT_BURST", 3.0)),
+        )
+
+    # ---------- постановка в очередь ----------
+
+    def enqueue(
+        self,
+        bot: Bot,
+        method: TelegramMethod[Any],
+        *,
+        priority: Priority = Priority.CUSTOMER,
+    ) -> bool:
+        """Ставит метод в очередь; ``False`` — очередь переполнена, метод отброшен."""
+        if self.queued() >= self.maxsize:
+            self.dropped += 1
+            logger.warning("Send queue is full, dropping %s", type(method).__name__)
+            return False
+        self._lanes[priority].append(_Job(bot, method, priority, self._clock()))
+        self.enqueued += 1
+        self._ensure_worker()
+        self._wakeup.set()
+        return True
+
+    def queued(self) -> int:
+        return sum(len(lane) for lane in self._lanes.values())
+
+    # ---------- жизненный цикл ----------
+
+    async def start(self) -> None:
+        self._ensure_worker()
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and not self._worker.done():
+            return
+        self._wakeup = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._worker = asyncio.create_task(self._run(), name="send-queue")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Ждёт до ``timeout`` секунд, пока очередь опустеет, затем останавливает воркер."""
+        deadline = self._clock() + timeout
+        while (self.queued() or self._tasks) and self._clock() < deadline:
+            if self._worker is None or self._worker.done():
+                break
+            await asyncio.sleep(0.05)
+
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+        left = self.queued()
+        if left:
+            logger.warning("Send queue stopped with %d unsent messages", left)
+            self.dropped += left
+            for lane in self._lanes.values():
+                lane.clear()
+
+    # ---------- воркер ----------
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            job, wait = self._next_job()
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._slots.acquire()
+            task = asyncio.create_task(self._send(job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _bucket(self, chat_id: Any) -> TokenBucket:
+        bucket = self._buckets.get(chat_id)
+        if bucket is None:
+            rate = self.group_rate if _is_group(chat_id) else self.private_rate
+            bucket = TokenBucket(rate, capacity=self.chat_burst, clock=self._clock)
+            self._buckets.set(chat_id, bucket)
+        return bucket
+
+    def _chat_delay(self, chat_id: Any, now: float) -> float:
+        frozen = self._not_before.get(chat_id, 0.0) - now
+        if frozen <= 0:
+            self._not_before.pop(chat_id, None)
+        if chat_id is None:
+            return max(frozen, 0.0)
+        return max(frozen, self._bucket(chat_id).delay())
+
+    def _next_job(self) -> tuple[_Job | None, float | None]:
+        """Первая готовая к отправке задача в порядке приоритета и время до следующей."""
+        if not self.queued():
+            return None, None
+        global_wait = self._global.delay()
+        if global_wait > 0:
+            return None, global_wait
+
+        now = self._clock()
+        wait: float | None = None
+        blocked: set[Any] = set()
+        for priority in Priority:
+            lane = self._lanes[priority]
+            for index, job in enumerate(lane):
+                chat_id = job.chat_id
+                if chat_id in blocked:
+                    continue
+                # пока предыдущее сообщение чата в пути, следующие ждут — порядок сохраняется
+                if chat_id in self._in_flight:
+                    blocked.add(chat_id)
+                    continue
+                delay = self._chat_delay(chat_id, now)
+                if delay > 0:
+                    blocked.add(chat_id)
+                    wait = delay if wait is None else min(wait, delay)
+                    continue
+                del lane[index]
+                self._global.take()
+                if chat_id is not None:
+                    self._bucket(chat_id).take()
+                self._in_flight.add(chat_id)
+                return job, 0.0
+        return None, wait
+
+    async def _send(self, job: _Job) -> None:
+        try:
+            await job.bot(job.method)
+        except TelegramRetryAfter as e:
+            self.flood_waits += 1
+            logger.warning("Flood wait %ss for chat %s", e.retry_after, job.chat_id)
+            self._not_before[job.chat_id] = self._clock() + e.retry_after
+            self._retry(job, e)
+        except (TelegramNetworkError, TelegramServerError) as e:
+            self._not_before[job.chat_id] = self._clock() + min(2 ** job.attempts, 30)
+            self._retry(job, e)
+        except TelegramAPIError as e:
+            self.failed += 1
+            logger.warning("%s to chat %s failed: %s", type(job.method).__name__, job.chat_id, e.message)
+        except Exception:
+            self.failed += 1
+            logger.exception("%s to chat %s failed", type(job.method).__name__, job.chat_id)
+        else:
+            self.sent += 1
+            self.max_delay = max(self.max_delay, self._clock() - job.enqueued_at)
+        finally:
+            self._in_flight.discard(job.chat_id)
+            self._slots.release()
+            self._wakeup.set()
+
+    def _retry(self, job: _Job, error: Exception) -> None:
+        if job.attempts >= self.max_retries:
+            self.failed += 1
+            logger.error("Giving up on chat %s after %d retries: %s", job.chat_id, job.attempts, error)
+            return
+        job.attempts += 1
+        self.retried += 1
+        # в начало полосы: более поздние сообщения того же чата не обгонят его
+        self._lanes[job.priority].appendleft(job)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "retried": self.retried,
+            "flood_waits": self.flood_waits,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "queued": {p.name.lower(): len(lane) for p, lane in self._lanes.items()},
+            "in_flight": len(self._tasks),
+            "max_delay": round(self.max_delay, 3),
+        }
+
+
+# воркер поднимается в on_startup (start), останавливается в on_shutdown (stop)
+send_queue = SendQueue.from_env()
@@ -1,54 +1,268 @@
+"""Фото товаров и баннеров в Supabase Storage через REST API.
+
+Запросы идут через общий пул :data:`utils.http.http_client`. Файл из
+Telegram не буферизуется целиком: чанки скачивания сразу уходят в тело
+запроса загрузки, попутно считается SHA-256.
+
+Дедупликация в два уровня:
+
+* ``file_unique_id`` — одно и то же фото Telegram, отправленное повторно,
+  вообще не скачивается (ответ берётся из кэша);
+* хэш содержимого — объект хранится под именем ``<sha256[:32]>.jpg``;
+  файл сначала пишется во временный ``tmp/<uuid>.jpg`` и переносится
+  (``move``), а если объект с таким хэшем уже есть — временный удаляется.
+
+Фото товаров идут через :func:`upload_product_photo`: файл пережимается
+и получает превью (:mod:`utils.images`), поэтому читается в память
+целиком — декодеру нужен весь файл.
+
+Число одновременных загрузок ограничено ``SUPABASE_UPLOAD_CONCURRENCY``.
+"""
+
+import asyncio
+import hashlib
+import logging
 import os
 import uuid
-import asyncio
-from io import BytesIO
-from typing import Optional
+from typing import AsyncIterator, Iterable, Optional
 
-from supabase import create_client
 from aiogram import Bot
 
+from utils.cache import TTLCache
+from utils.env import env_number
+from utils.http import http_client
+from utils.images import process_image_async
+
+logger = logging.getLogger(__name__)
+
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_API_KEY = os.getenv("SUPABASE_API_KEY")
 SUPABASE_BUCKET = os.getenv("SUPABASE_BUCKET")
+UPLOAD_CONCURRENCY = max(1, int(env_number("SUPABASE_UPLOAD_CONCURRENCY", 4)))
+CHUNK_SIZE = 64 * 1024
+
+# file_unique_id -> public URL (или (main, thumbnail) для фото товаров)
+_uploaded: TTLCache[str, str] = TTLCache(maxsize=5000, ttl=None)
+_product_photos: TTLCache[str, tuple[str, str]] = TTLCache(maxsize=5000, ttl=None)
+_upload_limit: asyncio.Semaphore | None = None
 
-_client = create_client(SUPABASE_URL, SUPABASE_API_KEY) if SUPABASE_URL and SUPABASE_API_KEY else None
 
-async def upload_photo_from_telegram(bot: Bot, file_id: str, filename: Optional[str] = None) -> str:
-    """Download file from Telegram and upload it to Supabase. Return public URL."""
-    if _client is None:
+def _require_config() -> None:
+    if not (SUPABASE_URL and SUPABASE_API_KEY):
         raise RuntimeError("Supabase client is not configured")
 
-    if not filename:
-        filename = f"{uuid.uuid4()}.jpg"
 
-    file_io = await bot.download(file_id)
-    data = file_io.read()
+def _limit() -> asyncio.Semaphore:
+    global _upload_limit
+    if _upload_limit is None:
+        _upload_limit = asyncio.Semaphore(UPLOAD_CONCURRENCY)
+    return _upload_limit
+
 
-    # Передаём опции как словарь, строки!
-    options = {
-        "content-type": "image/jpeg",
-        "x-upsert": "true"
+def _headers(**extra: str) -> dict[str, str]:
+    return {
+        "Authorization": f"Bearer {SUPABASE_API_KEY}",
+        "apikey": SUPABASE_API_KEY or "",
+        **extra,
     }
 
-    loop = asyncio.get_running_loop()
-    await loop.run_in_executor(
-        None,
-        lambda: _client.storage.from_(SUPABASE_BUCKET).upload(filename, data, options)
+
+def _storage_url(path: str) -> str:
+    return f"{SUPABASE_URL.rstrip('/')}/storage/v1/object/{path}"
+
+
+def _object_url(path: str = "") -> str:
+    return _storage_url(f"{SUPABASE_BUCKET}/{path}" if path else SUPABASE_BUCKET)
+
+
+def get_public_url(filename: str) -> str:
+    return _storage_url(f"public/{SUPABASE_BUCKET}/{filename}")
+
+
+class _HashingStream:
+    """Пропускает чанки насквозь, считая SHA-256 и размер."""
+
+    def __init__(self, chunks: AsyncIterator[bytes]) -> None:
+        self._chunks = chunks
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._chunks:
+            self.sha256.update(chunk)
+            self.size += len(chunk)
+            yield chunk
+
+
+async def _telegram_chunks(bot: Bot, file_id: str) -> AsyncIterator[bytes]:
+    if bot.session.api.is_local:
+        # локальный Bot API отдаёт файл с диска — стримить по сети нечего
+        file_io = await bot.download(file_id)
+        yield file_io.read()
+        return
+    file = await bot.get_file(file_id)
+    url = bot.session.api.file_url(bot.token, file.file_path)
+    async for chunk in bot.session.stream_content(url, chunk_size=CHUNK_SIZE):
+        yield chunk
+
+
+async def _object_exists(filename: str) -> bool:
+    response = await http_client.request("HEAD", get_public_url(filename))
+    return response.status_code == 200
+
+
+async def _upload_stream(
+    chunks: AsyncIterator[bytes], filename: str, *, upsert: bool
+) -> None:
+    # Тело — одноразовый поток, поэтому повторять запрос нельзя
+    response = await http_client.post(
+        _object_url(filename),
+        content=chunks,
+        headers=_headers(**{"Content-Type": "image/jpeg", "x-upsert": str(upsert).lower()}),
+        retries=0,
     )
+    response.raise_for_status()
 
-    return _client.storage.from_(SUPABASE_BUCKET).get_public_url(filename)
 
+async def _move(source: str, destination: str) -> bool:
+    """Переименовывает объект; ``False``, если ``destination`` уже есть."""
+    response = await http_client.post(
+        _storage_url("move"),
+        json={"bucketId": SUPABASE_BUCKET, "sourceKey": source, "destinationKey": destination},
+        headers=_headers(),
+    )
+    if response.is_success:
+        return True
+    if response.status_code in (400, 409) and await _object_exists(destination):
+        return False
+    response.raise_for_status()
+    return True
 
-async def delete_photo_from_supabase(filename: str):
-    if _client is None:
-        raise RuntimeError("Supabase client is not configured")
 
-    loop = asyncio.get_running_loop()
-    await loop.run_in_executor(
-        None,
-        lambda: _client.storage.from_(SUPABASE_BUCKET).remove([filename])
+async def upload_photo_from_telegram(
+    bot: Bot,
+    file_id: str,
+    filename: Optional[str] = None,
+    *,
+    file_unique_id: Optional[str] = None,
+) -> str:
+    """Download file from Telegram and upload it to Supabase. Return public URL.
+
+    Без ``filename`` имя выбирается по хэшу содержимого, и одинаковые
+    картинки хранятся один раз.
+    """
+    _require_config()
+
+    if file_unique_id and filename is None:
+        cached = _uploaded.get(file_unique_id)
+        if cached:
+            return cached
+
+    async with _limit():
+        if filename:
+            await _upload_stream(_telegram_chunks(bot, file_id), filename, upsert=True)
+            return get_public_url(filename)
+
+        stream = _HashingStream(_telegram_chunks(bot, file_id))
+        tmp_name = f"tmp/{uuid.uuid4()}.jpg"
+        try:
+            await _upload_stream(stream, tmp_name, upsert=False)
+            filename = f"{stream.sha256.hexdigest()[:32]}.jpg"
+            moved = await _move(tmp_name, filename)
+        except Exception:
+            await _remove_quietly(tmp_name)
+            raise
+        if not moved:
+            logger.info("Photo %s already stored (%d bytes), skipping duplicate", filename, stream.size)
+            await _remove_quietly(tmp_name)
+
+    url = get_public_url(filename)
+    if file_unique_id:
+        _uploaded.set(file_unique_id, url)
+    return url
+
+
+async def upload_bytes(data: bytes, suffix: str = "") -> str:
+    """Загружает готовые байты JPEG под именем по хэшу; дубликаты пропускаются."""
+    _require_config()
+    filename = f"{hashlib.sha256(data).hexdigest()[:32]}{suffix}.jpg"
+    async with _limit():
+        if not await _object_exists(filename):
+            response = await http_client.post(
+                _object_url(filename),
+                content=data,
+                headers=_headers(**{"Content-Type": "image/jpeg", "x-upsert": "true"}),
+                idempotent=True,
+            )
+            response.raise_for_status()
+    return get_public_url(filename)
+
+
+async def upload_product_photo(
+    bot: Bot, file_id: str, *, file_unique_id: Optional[str] = None
+) -> tuple[str, str]:
+    """
+    Пережимает фото товара, делает превью и загружает оба файла.
+
+    :return: ``(image_url, thumbnail_url)``.
+    """
+    _require_config()
+    if file_unique_id:
+        cached = _product_photos.get(file_unique_id)
+        if cached:
+            return cached
+
+    file_io = await bot.download(file_id)
+    processed = await process_image_async(file_io.read())
+    urls = await asyncio.gather(
+        upload_bytes(processed.main),
+        upload_bytes(processed.thumbnail, suffix="_thumb"),
+    )
+    result = (urls[0], urls[1])
+    if file_unique_id:
+        _product_photos.set(file_unique_id, result)
+    return result
+
+
+async def upload_photos_from_telegram(
+    bot: Bot, photos: Iterable[tuple[str, Optional[str]]]
+) -> list[str | BaseException]:
+    """
+    Параллельная загрузка пачки фото ``(file_id, file_unique_id)`` для
+    импорта. Параллелизм ограничен тем же семафором, что и одиночные
+    загрузки; ошибка одного фото не прерывает остальные и возвращается
+    на его месте.
+    """
+    return await asyncio.gather(
+        *(
+            upload_photo_from_telegram(bot, file_id, file_unique_id=unique_id)
+            for file_id, unique_id in photos
+        ),
+        return_exceptions=True,
+    )
+
+
+async def _remove(paths: list[str]) -> None:
+    response = await http_client.delete(
+        _object_url(), json={"prefixes": paths}, headers=_headers()
     )
+    response.raise_for_status()
+
+
+async def _remove_quietly(path: str) -> None:
+    try:
+        await _remove([path])
+    except Exception:
+        logger.warning("Failed to remove temporary upload %s", path, exc_info=True)
+
+
+async def delete_photo_from_supabase(filename: str):
+    _require_config()
+    await _remove([filename])
+    # удаления редки — проще сбросить кэши file_unique_id целиком
+    _uploaded.clear()
+    _product_photos.clear()
+
 
 def get_path_from_url(url: str) -> str:
     return url.split("/")[-1]
-
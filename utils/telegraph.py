@@ -7,7 +7,7 @@ import logging
 import os
 from typing import Any
 
-import httpx
+from utils.http import http_client
 
 
 async def create_telegraph_page(title: str, content: str) -> str | None:
@@ -29,9 +29,10 @@ async def create_telegraph_page(title: str, content: str) -> str | None:
     }
 
     try:
-        async with httpx.AsyncClient(timeout=10) as client:
-            response = await client.post("https://api.telegra.ph/createPage", data=payload)
-            response.raise_for_status()
+        response = await http_client.post(
+            "https://api.telegra.ph/createPage", data=payload, timeout=10
+        )
+        response.raise_for_status()
     except Exception:
         logging.exception("Failed to create Telegraph page")
         return None
@@ -0,0 +1,230 @@
+"""Приём апдейтов через вебхук (aiohttp) вместо long polling.
+
+Настройки читаются из переменных окружения:
+
+* ``WEBHOOK_URL`` — публичный адрес (``https://bot.example.com``); если задан,
+  вебхук регистрируется в Telegram при старте;
+* ``WEBHOOK_PATH`` — путь, на который Telegram шлёт апдейты (``/webhook``);
+* ``WEBHOOK_HOST`` / ``WEBHOOK_PORT`` — где слушает aiohttp (``0.0.0.0:8080``);
+* ``WEBHOOK_SECRET`` — значение заголовка ``X-Telegram-Bot-Api-Secret-Token``;
+* ``WEBHOOK_MAX_CONCURRENCY`` — сколько апдейтов обрабатывается одновременно;
+* ``WEBHOOK_MAX_PENDING`` — сколько апдейтов может ждать очереди, сверх этого
+  отвечаем 503 и Telegram повторит доставку позже;
+* ``WEBHOOK_DRAIN_TIMEOUT`` — сколько секунд при остановке дожидаться
+  уже принятых апдейтов.
+
+Воркеры не хранят состояние между запросами (кроме FSM), поэтому их можно
+запускать несколько за балансировщиком.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Mapping, Optional
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+from utils.env import env_number
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_HANDLER_KEY: web.AppKey["BoundedRequestHandler"] = web.AppKey("webhook_handler")
+
+
+@dataclass(frozen=True)
+class WebhookSettings:
+    """Параметры вебхук-сервера."""
+
+    url: Optional[str] = None
+    path: str = "/webhook"
+    host: str = "0.0.0.0"
+    port: int = 8080
+    secret: Optional[str] = None
+    max_concurrency: int = 64
+    max_pending: int = 1000
+    drain_timeout: int = 30
+
+    @classmethod
+    def from_env(cls, env: Mapping[str, str] | None = None) -> "WebhookSettings":
+        env = os.environ if env is None else env
+        default = cls()
+        path = env.get("WEBHOOK_PATH") or default.path
+        if not path.startswith("/"):
+            path = f"/{path}"
+        return cls(
+            url=(env.get("WEBHOOK_URL") or "").rstrip("/") or None,
+            path=path,
+            host=env.get("WEBHOOK_HOST") or default.host,
+            port=max(1, int(env_number("WEBHOOK_PORT", default.port, env))),
+            secret=env.get("WEBHOOK_SECRET") or None,
+            max_concurrency=max(
+                1, int(env_number("WEBHOOK_MAX_CONCURRENCY", default.max_concurrency, env))
+            ),
+            max_pending=max(1, int(env_number("WEBHOOK_MAX_PENDING", default.max_pending, env))),
+            drain_timeout=max(
+                0, int(env_number("WEBHOOK_DRAIN_TIMEOUT", default.drain_timeout, env))
+            ),
+        )
+
+    @property
+    def webhook_url(self) -> Optional[str]:
+        """Полный адрес для ``set_webhook`` или None, если он не задан."""
+        return f"{self.url}{self.path}" if self.url else None
+
+    def describe(self) -> str:
+        """Строка для стартового лога (без секрета)."""
+        values = asdict(self)
+        values["secret"] = "***" if self.secret else None
+        return ", ".join(f"{key}={value}" for key, value in values.items())
+
+
+class BoundedRequestHandler(SimpleRequestHandler):
+    """
+    Обработчик вебхука: сразу отвечает Telegram 200 и обрабатывает апдейт
+    в фоне, но не более ``max_concurrency`` одновременно.
+
+    Если в работе и в очереди уже ``max_pending`` апдейтов, либо сервер
+    останавливается, запрос отклоняется с 503 — Telegram доставит его повторно
+    (возможно, другому воркеру). При остановке принятые апдейты дорабатывают
+    в пределах ``drain_timeout`` секунд.
+    """
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        bot: Bot,
+        secret_token: Optional[str] = None,
+        max_concurrency: int = 64,
+        max_pending: int = 1000,
+        drain_timeout: float = 30,
+        **data: Any,
+    ) -> None:
+        super().__init__(
+            dispatcher=dispatcher,
+            bot=bot,
+            handle_in_background=True,
+            secret_token=secret_token,
+            **data,
+        )
+        self.max_pending = max_pending
+        self.drain_timeout = drain_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._draining = False
+        self.in_flight = 0
+        self.processed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    @property
+    def pending(self) -> int:
+        """Принятые, но ещё не завершённые апдейты (в работе + в очереди)."""
+        return len(self._background_feed_update_tasks)
+
+    async def _background_feed_update(self, bot: Bot, update: dict[str, Any]) -> None:
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                await super()._background_feed_update(bot=bot, update=update)
+                self.processed += 1
+            except Exception:
+                self.failed += 1
+                logger.exception("Webhook update %s failed", update.get("update_id"))
+            finally:
+                self.in_flight -= 1
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if self._draining or self.pending >= self.max_pending:
+            self.rejected += 1
+            return web.Response(status=503, text="Busy", headers={"Retry-After": "1"})
+        return await super().handle(request)
+
+    __call__ = handle
+
+    async def drain(self) -> None:
+        """Перестаёт принимать апдейты и дожидается уже принятых."""
+        self._draining = True
+        tasks = set(self._background_feed_update_tasks)
+        if not tasks:
+            return
+        logger.info("Draining %d webhook updates (timeout %ss)", len(tasks), self.drain_timeout)
+        _, not_done = await asyncio.wait(tasks, timeout=self.drain_timeout)
+        for task in not_done:
+            task.cancel()
+        if not_done:
+            logger.warning("Cancelled %d webhook updates after drain timeout", len(not_done))
+            await asyncio.gather(*not_done, return_exceptions=True)
+
+    async def close(self) -> None:
+        await self.drain()
+        await super().close()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "pending": self.pending,
+            "in_flight": self.in_flight,
+            "processed": self.processed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+
+
+def build_webhook_app(
+    dispatcher: Dispatcher,
+    bot: Bot,
+    settings: WebhookSettings,
+    on_startup: Optional[Callable[[], Awaitable[None]]] = None,
+    **data: Any,
+) -> web.Application:
+    """
+    Собирает aiohttp-приложение: маршрут вебхука, ``/healthz`` для балансировщика
+    и регистрацию вебхука в Telegram при старте (если задан ``WEBHOOK_URL``).
+    """
+    app = web.Application()
+    handler = BoundedRequestHandler(
+        dispatcher=dispatcher,
+        bot=bot,
+        secret_token=settings.secret,
+        max_concurrency=settings.max_concurrency,
+        max_pending=settings.max_pending,
+        drain_timeout=settings.drain_timeout,
+        **data,
+    )
+    # Без handler.register: он ставит закрытие сессии бота первым в on_shutdown
+    app.router.add_route("POST", settings.path, handler.handle)
+    app[WEBHOOK_HANDLER_KEY] = handler
+
+    async def healthz(request: web.Request) -> web.Response:
+        return web.json_response({"status": "ok", **handler.stats()})
+
+    app.router.add_get("/healthz", healthz)
+
+    async def _startup(app: web.Application) -> None:
+        if on_startup is not None:
+            await on_startup()
+        if settings.webhook_url:
+            await bot.set_webhook(
+                settings.webhook_url,
+                secret_token=settings.secret,
+                allowed_updates=dispatcher.resolve_used_update_types(),
+                max_connections=min(100, settings.max_concurrency),
+            )
+            logger.info("Webhook set: %s", settings.webhook_url)
+
+    async def _drain(app: web.Application) -> None:
+        await handler.drain()
+
+    async def _close(app: web.Application) -> None:
+        await handler.close()
+
+    app.on_startup.append(_startup)
+    # Остановка: дорабатываем принятые апдейты, затем shutdown диспетчера
+    # (on_shutdown бота досылает уведомления) и только потом закрываем сессию бота
+    app.on_shutdown.append(_drain)
+    setup_application(app, dispatcher, bot=bot, **data)
+    app.on_shutdown.append(_close)
+    return app